@@ -1,8 +1,16 @@
 # api_clients.py
 
 import os
+import re
 import httpx  # 'requests'의 비동기 버전
 import uuid # Azure API 호출 시 필요
+from typing import List, NamedTuple, Optional
+
+from rate_limiter import AzureRateLimiter
+from translation_memory import TranslationMemory, normalize_source
+import instrumentation
+import resilience
+from resilience import RetryPolicy, TranslationFailure
 
 
 
@@ -13,23 +21,39 @@ AZURE_TRANSLATOR_KEY = os.getenv("AZURE_TRANSLATOR_KEY")
 AZURE_TRANSLATOR_ENDPOINT = os.getenv("AZURE_TRANSLATOR_ENDPOINT")
 AZURE_TRANSLATOR_REGION = os.getenv("AZURE_TRANSLATOR_REGION")
 
-async def call_azure_translation(session: httpx.AsyncClient, text_to_translate: str) -> str:
+# Azure /translate 요청 1회당 한도 (배열 원소 수 / 전체 문자 수)
+AZURE_MAX_ELEMENTS_PER_REQUEST = 1000
+AZURE_MAX_CHARS_PER_REQUEST = 50000
+
+# 긴 텍스트를 나눌 문장 경계 (문장 부호 + 뒤따르는 공백, 또는 줄바꿈)
+_SENTENCE_END = re.compile(r'(?<=[。！？!?.])\s*|\n+')
+
+STATUS_OK = "ok"
+STATUS_CONFIG_ERROR = "config_error" # .env에 Azure 설정이 없음
+STATUS_INVALID_RESPONSE = "invalid_response" # 응답을 해석할 수 없음
+
+
+class Translation(NamedTuple):
     """
-    검증된 텍스트를 받아 Azure Translator API로 번역합니다. (비동기)
-    'session'을 매개변수로 받아 커넥션 풀을 재사용합니다.
+    텍스트 하나의 번역 결과입니다.
+    실패하면 text는 ""이고 status에 실패 종류(resilience.STATUS_* 등), error에 상세 내용이 들어갑니다.
     """
-    if not all([AZURE_TRANSLATOR_KEY, AZURE_TRANSLATOR_ENDPOINT, AZURE_TRANSLATOR_REGION]):
-        return "[Azure 오류: .env 설정 누락]"
-        
-    if not text_to_translate.strip():
-        return "" # 빈 텍스트는 요청하지 않음
+    text: str
+    status: str = STATUS_OK
+    error: Optional[str] = None
 
-    # API 엔드포인트 및 헤더 구성
+    @property
+    def ok(self) -> bool:
+        return self.status == STATUS_OK
+
+
+def _build_request(from_lang: str, to_lang: str):
+    """번역 요청에 필요한 URL, 쿼리 파라미터, 헤더를 구성합니다."""
     constructed_url = AZURE_TRANSLATOR_ENDPOINT.rstrip('/') + '/translate'
     params = {
         'api-version': '3.0',
-        'from': 'ja',
-        'to': 'ko'
+        'from': from_lang,
+        'to': to_lang
     }
     headers = {
         'Ocp-Apim-Subscription-Key': AZURE_TRANSLATOR_KEY,
@@ -37,21 +61,195 @@ async def call_azure_translation(session: httpx.AsyncClient, text_to_translate:
         'Content-type': 'application/json',
         'X-ClientTraceId': str(uuid.uuid4()) # 요청 추적을 위한 ID
     }
-    body = [{'text': text_to_translate}]
-
-    try:
-        # 비동기 POST 요청
-        response = await session.post(constructed_url, params=params, headers=headers, json=body)
-        
-        response.raise_for_status() # 4xx, 5xx 오류가 발생하면 예외를 일으킴
-        
-        # 번역 결과 파싱
-        result_json = response.json()
-        return result_json[0]['translations'][0]['text']
-
-    except httpx.HTTPStatusError as e:
-        print(f"🚨 [Azure 오류] API가 오류 상태 코드를 반환: {e.response.status_code} - {e.response.text}")
-        return f"[Azure 오류: {e.response.status_code}]"
-    except Exception as e:
-        print(f"🚨 [Azure 오류] API 호출 중 예외 발생: {e}")
-        return f"[Azure 오류: {e}]"
\ No newline at end of file
+    return constructed_url, params, headers
+
+
+def _pack_batches(texts: List[str],
+                  max_elements: int = AZURE_MAX_ELEMENTS_PER_REQUEST,
+                  max_chars: int = AZURE_MAX_CHARS_PER_REQUEST) -> List[List[int]]:
+    """
+    번역할 텍스트들을 Azure 한도(원소 수 / 문자 수) 안에서 요청 단위로 묶습니다.
+    빈 텍스트는 건너뛰며, 결과는 원래 리스트의 인덱스 묶음입니다.
+    (한도보다 긴 텍스트는 미리 _split_long_text로 나눠서 넘깁니다. 그래도 남으면 단독 요청으로 보냄)
+    """
+    batches = []
+    current, current_chars = [], 0
+    for idx, text in enumerate(texts):
+        if not text.strip():
+            continue
+        n_chars = len(text)
+        if current and (len(current) >= max_elements or current_chars + n_chars > max_chars):
+            batches.append(current)
+            current, current_chars = [], 0
+        current.append(idx)
+        current_chars += n_chars
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _split_long_text(text: str, max_chars: int = AZURE_MAX_CHARS_PER_REQUEST) -> List[str]:
+    """
+    요청 한도(max_chars)보다 긴 텍스트를 문장 경계에서 max_chars 이하의 조각들로 나눕니다.
+    조각을 그대로 이어 붙이면 원문이 됩니다. (경계의 공백 / 줄바꿈은 앞 조각에 붙음)
+    문장 하나가 한도보다 길면 한도에서 자릅니다. 한도 이하의 텍스트는 [text]
+    """
+    if len(text) <= max_chars:
+        return [text]
+    sentences, start = [], 0
+    for match in _SENTENCE_END.finditer(text):
+        if match.end() > start:
+            sentences.append(text[start:match.end()])
+            start = match.end()
+    if start < len(text):
+        sentences.append(text[start:])
+
+    pieces, current = [], ""
+    for sentence in sentences:
+        while len(sentence) > max_chars: # 문장 부호 없이 긴 텍스트
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if len(current) + len(sentence) > max_chars:
+            pieces.append(current)
+            current = ""
+        current += sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _join_translated(pieces: List[str], translated: List[str]) -> str:
+    """나눠서 번역한 조각들을 다시 잇습니다. 원문 조각 끝의 공백 / 줄바꿈을 살리고, 없으면 공백 하나로 이음"""
+    joined = ""
+    for i, (piece, text) in enumerate(zip(pieces, translated)):
+        joined += text.strip()
+        if i + 1 < len(pieces):
+            trailing = piece[len(piece.rstrip()):]
+            joined += trailing or " "
+    return joined
+
+
+async def call_azure_translation_batch(session: httpx.AsyncClient, texts: List[str],
+                                       from_lang: str = 'ja', to_lang: str = 'ko',
+                                       limiter: Optional[AzureRateLimiter] = None,
+                                       memory: Optional[TranslationMemory] = None,
+                                       policy: Optional[RetryPolicy] = None,
+                                       memory_lookup: bool = True) -> List[Translation]:
+    """
+    여러 텍스트를 Azure Translator API로 한꺼번에 번역합니다. (비동기)
+    한 페이지(또는 여러 페이지)의 블록들을 요청 한도 안에서 묶어 보내고,
+    결과는 입력과 같은 순서/길이의 Translation 리스트로 돌려줍니다. 빈 텍스트는 ""(ok)로 채워집니다.
+    'limiter'를 넘기면 공유 속도 제한을 따릅니다.
+    429 / 5xx / 타임아웃은 'policy'(기본: .env의 RetryPolicy)대로 재시도하고, 끝내 실패한 배치는
+    번역문 대신 실패 상태(Translation.status / error)로 돌려줍니다.
+    'memory'를 넘기면 번역 메모리에 있는 텍스트는 API를 호출하지 않고, 새 번역은 메모리에 저장합니다.
+    memory_lookup=False면 저장만 합니다. (호출자가 이미 메모리를 조회한 경우: RoutingBackend)
+    """
+    results = [Translation("")] * len(texts)
+    pending = [i for i, t in enumerate(texts) if t.strip()]
+
+    # 1. 번역 메모리 조회 (캐시 적중분은 바로 채움)
+    if memory is not None and memory_lookup and pending:
+        cached = memory.get_many([texts[i] for i in pending], from_lang, to_lang)
+        for i, value in zip(pending, cached):
+            if value is not None:
+                results[i] = Translation(value)
+        pending = [i for i, value in zip(pending, cached) if value is None]
+        instrumentation.count("translate.tm_hits", len(cached) - len(pending))
+
+    if not pending:
+        return results
+    if not all([AZURE_TRANSLATOR_KEY, AZURE_TRANSLATOR_ENDPOINT, AZURE_TRANSLATOR_REGION]):
+        for i in pending:
+            results[i] = Translation("", STATUS_CONFIG_ERROR, ".env 설정 누락")
+        return results
+
+    # 2. 같은 호출 안의 중복 텍스트(반복 캡션 등)는 한 번만 전송
+    owners = {}
+    for i in pending:
+        owners.setdefault(normalize_source(texts[i]), []).append(i)
+    unique_texts = [texts[idxs[0]] for idxs in owners.values()]
+    unique_owners = list(owners.values())
+    new_pairs = []
+    instrumentation.count("translate.deduplicated", len(pending) - len(unique_texts))
+
+    # 요청 한도보다 긴 텍스트는 문장 경계에서 나눠 조각별로 보내고, 번역 후 다시 이음
+    segments, segment_owner = [], [] # 보낼 조각 / 조각이 속한 unique_texts 인덱스
+    for idx, text in enumerate(unique_texts):
+        for piece in _split_long_text(text):
+            segments.append(piece)
+            segment_owner.append(idx)
+    translated_segments: List[Optional[str]] = [None] * len(segments)
+    failures = {} # unique_texts 인덱스 -> 실패한 Translation (조각 하나라도 실패하면 텍스트 전체 실패)
+    if len(segments) > len(unique_texts):
+        instrumentation.count("translate.split_texts", len(segments) - len(unique_texts))
+
+    policy = policy or RetryPolicy.from_env()
+    breaker = resilience.breaker_for(AZURE_TRANSLATOR_ENDPOINT)
+
+    for batch in _pack_batches(segments):
+        body = [{'text': segments[seg]} for seg in batch]
+        n_chars = sum(len(segments[seg]) for seg in batch)
+
+        async def _post():
+            # 재시도 / 헤징마다 새 추적 ID로 요청 1회를 보냄
+            constructed_url, params, headers = _build_request(from_lang, to_lang)
+            instrumentation.count("translate.requests")
+            instrumentation.count("translate.chars_sent", n_chars)
+            with instrumentation.span("translate.request", elements=len(body), chars=n_chars):
+                return await session.post(constructed_url, params=params, headers=headers, json=body)
+
+        try:
+            response = await resilience.send_with_retries(_post, n_chars, policy, breaker, limiter)
+
+            # 번역 결과 파싱 (응답 배열은 요청 배열과 같은 순서)
+            result_json = response.json()
+            for seg, item in zip(batch, result_json):
+                translated_segments[seg] = item['translations'][0]['text']
+
+        except TranslationFailure as e:
+            instrumentation.count("translate.errors")
+            print(f"🚨 [Azure 오류] 번역 요청 실패 ({e.status}): {e.detail}")
+            for seg in batch:
+                failures.setdefault(segment_owner[seg], Translation("", e.status, e.detail))
+        except Exception as e:
+            instrumentation.count("translate.errors")
+            print(f"🚨 [Azure 오류] API 호출 중 예외 발생: {e}")
+            for seg in batch:
+                failures.setdefault(segment_owner[seg], Translation("", STATUS_INVALID_RESPONSE, str(e)))
+
+    # 조각 번역을 원래 텍스트 단위로 다시 이어 결과에 채움
+    owned_segments = {}
+    for seg, idx in enumerate(segment_owner):
+        owned_segments.setdefault(idx, []).append(seg)
+    for idx, segs in owned_segments.items():
+        result = failures.get(idx)
+        if result is None and any(translated_segments[seg] is None for seg in segs):
+            result = Translation("", STATUS_INVALID_RESPONSE, "응답에 번역 결과가 모자랍니다.")
+        if result is None:
+            translated = _join_translated([segments[seg] for seg in segs], [translated_segments[seg] for seg in segs])
+            result = Translation(translated)
+            new_pairs.append((unique_texts[idx], translated))
+        for owner in unique_owners[idx]:
+            results[owner] = result
+
+    # 3. 성공한 번역만 메모리에 저장 (실패는 저장하지 않음)
+    if memory is not None:
+        memory.put_many(new_pairs, from_lang, to_lang)
+
+    return results
+
+
+async def call_azure_translation(session: httpx.AsyncClient, text_to_translate: str) -> Translation:
+    """
+    검증된 텍스트를 받아 Azure Translator API로 번역합니다. (비동기)
+    'session'을 매개변수로 받아 커넥션 풀을 재사용합니다.
+    """
+    if not text_to_translate.strip():
+        return Translation("") # 빈 텍스트는 요청하지 않음
+
+    results = await call_azure_translation_batch(session, [text_to_translate])
+    return results[0]
@@ -0,0 +1,126 @@
+# benchmarks/bench_ocr_batch.py
+"""
+OCR 배치(OCR_BATCH_PAGES > 1 또는 예산이 있을 때의 자동 배치, ocr_processor.read_raw_lines_batch) 결과 일치 벤치마크입니다.
+같은 페이지 세트를 한 장씩 OCR한 결과와 여러 장을 한 배치로 OCR한 결과를 페이지마다 비교하고
+(줄 수, 텍스트 일치율, 상자 좌표 차이) 두 방식의 페이지당 시간을 출력합니다.
+크기가 다른 페이지가 섞인 배치에서도 한 장씩 읽을 때와 같은 배율로 검출되는지 확인하는 용도입니다.
+
+사용법:
+    python benchmarks/bench_ocr_batch.py --generate 6        # 크기가 다른 합성 페이지 6장 (A4 / B5 / 양면)
+    python benchmarks/bench_ocr_batch.py --pages path/to/pages --batch 4 --out benchmarks/results/ocr_batch.json
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from synthetic_corpus import load_font, render_page  # noqa: E402
+from bench_preprocess import _list_pages, _similarity  # noqa: E402
+
+import numpy as np  # noqa: E402
+
+PAGE_SIZES = [(1240, 1754), (1039, 1476), (2480, 1754)] # A4 / B5 / A4 양면 (150dpi)
+BOX_TOLERANCE_PX = 2 # 이 이하의 상자 좌표 차이는 같은 결과로 봄
+
+
+def _generate_pages(out_dir: Path, count: int, seed: int = 0):
+    """크기가 다른 페이지를 번갈아 생성 (한 배치에 여러 크기가 섞이도록)"""
+    font, sentences = load_font(28)
+    rng = random.Random(seed)
+    for i in range(count):
+        width, height = PAGE_SIZES[i % len(PAGE_SIZES)]
+        (out_dir / f"page_{i + 1:03d}.png").write_bytes(
+            render_page(rng, font, sentences, width=width, height=height, columns=2 if width < height else 4))
+
+
+def _max_box_shift(single, batched) -> float:
+    """같은 텍스트 줄끼리 짝지어 본 상자 좌표 차이의 최댓값 (px, 짝이 없는 줄은 제외)"""
+    remaining = list(zip(batched.texts, np.asarray(batched.boxes).tolist()))
+    shift = 0.0
+    for text, box in zip(single.texts, np.asarray(single.boxes).tolist()):
+        for j, (other_text, other_box) in enumerate(remaining):
+            if other_text == text:
+                shift = max(shift, max(abs(a - b) for a, b in zip(box, other_box)))
+                del remaining[j]
+                break
+    return shift
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR 배치 vs 한 장씩 결과 일치 벤치마크")
+    parser.add_argument("--pages", type=Path, default=None, help="고정 페이지 세트 이미지 폴더")
+    parser.add_argument("--generate", type=int, default=0, help="--pages 대신 크기가 섞인 합성 페이지를 이 수만큼 생성")
+    parser.add_argument("--batch", type=int, default=4, help="배치 하나에 넣을 페이지 수")
+    parser.add_argument("--out", type=Path, default=None, help="결과 JSON 경로")
+    args = parser.parse_args()
+
+    import ocr_processor
+
+    with tempfile.TemporaryDirectory(prefix="bench_ocr_batch_") as tmp:
+        pages_dir = args.pages
+        if pages_dir is None:
+            if args.generate <= 0:
+                parser.error("--pages 또는 --generate 중 하나를 지정하세요.")
+            pages_dir = Path(tmp)
+            _generate_pages(pages_dir, args.generate)
+        pages = _list_pages(pages_dir)
+        if not pages:
+            print(f"🚨 [오류] {pages_dir} 에서 이미지를 찾지 못했습니다.")
+            return
+        images = [ocr_processor.decode_image(page) for page in pages]
+
+    # 첫 호출의 지연 로딩(모델 가중치, CUDA 초기화 등)은 측정에서 제외 (워밍업)
+    ocr_processor.read_raw_lines(images[0])
+
+    started = time.perf_counter()
+    single = [ocr_processor.read_raw_lines(img) for img in images]
+    single_sec = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batched = []
+    for start in range(0, len(images), args.batch):
+        batched.extend(ocr_processor.read_raw_lines_batch(images[start:start + args.batch]))
+    batched_sec = time.perf_counter() - started
+
+    per_page = {}
+    print(f"\n--- 페이지 {len(pages)}장, 배치 {args.batch}장 ---")
+    for page, img, one, many in zip(pages, images, single, batched):
+        per_page[page.name] = {
+            'size': [img.shape[1], img.shape[0]],
+            'lines_single': len(one.texts),
+            'lines_batched': len(many.texts),
+            'text_similarity': _similarity(list(one.texts), list(many.texts)),
+            'max_box_shift_px': _max_box_shift(one, many),
+        }
+        r = per_page[page.name]
+        print(f"  [{page.name}] {r['size'][0]}x{r['size'][1]} | 줄 {r['lines_single']} / {r['lines_batched']} | "
+              f"텍스트 일치율 {r['text_similarity']:.1%} | 상자 차이 최대 {r['max_box_shift_px']:.0f}px")
+
+    summary = {
+        'pages': len(pages),
+        'batch': args.batch,
+        'single_sec_per_page': single_sec / len(pages),
+        'batched_sec_per_page': batched_sec / len(pages),
+        'min_text_similarity': min(r['text_similarity'] for r in per_page.values()),
+        'identical_pages': sum(r['text_similarity'] == 1.0 and r['lines_single'] == r['lines_batched']
+                               and r['max_box_shift_px'] <= BOX_TOLERANCE_PX for r in per_page.values()),
+        'per_page': per_page,
+    }
+    print(f"  -> 한 장씩 {summary['single_sec_per_page']:.2f}초/페이지, 배치 {summary['batched_sec_per_page']:.2f}초/페이지 | "
+          f"결과가 같은 페이지 {summary['identical_pages']}/{len(pages)} (최저 일치율 {summary['min_text_similarity']:.1%})")
+    if args.out is not None:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"✅ [저장 완료] {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/bench_ocr_pool.py
+"""
+OCR 실행 방식(스레드 vs 프로세스 풀) 처리량 비교 벤치마크입니다.
+고정된 페이지 세트(이미지 폴더)를 같은 워커 수로 두 방식에서 OCR하고 pages/sec와 속도 향상 배율을 출력합니다.
+
+사용법:
+    python benchmarks/bench_ocr_pool.py --pages path/to/sample_pages --workers 4
+"""
+
+import sys
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import ocr_processor  # noqa: E402
+from ocr_pool import OcrProcessPool  # noqa: E402
+
+
+def _list_pages(pages_dir: Path):
+    pages = []
+    for ext in ("*.jpg", "*.jpeg", "*.png"):
+        pages.extend(pages_dir.rglob(ext))
+    return sorted(pages)
+
+
+async def _run_thread_mode(pages, workers: int) -> float:
+    semaphore = asyncio.Semaphore(workers)
+
+    async def _one(path):
+        async with semaphore:
+            await asyncio.to_thread(ocr_processor.extract_structured_data, path)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_one(p) for p in pages))
+    return time.perf_counter() - started
+
+
+async def _run_process_mode(pages, workers: int) -> float:
+    pool = OcrProcessPool(workers=workers)
+    try:
+        # 워커별 모델 로드 시간은 측정에서 제외 (워밍업)
+        await asyncio.gather(*(pool.read_raw_lines(pages[0]) for _ in range(workers)))
+        started = time.perf_counter()
+        await asyncio.gather(*(pool.extract(p) for p in pages))
+        return time.perf_counter() - started
+    finally:
+        pool.shutdown()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="OCR 스레드 vs 프로세스 풀 벤치마크")
+    parser.add_argument("--pages", type=Path, required=True, help="고정 페이지 세트 이미지 폴더")
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    pages = _list_pages(args.pages)
+    if not pages:
+        print(f"🚨 [오류] {args.pages} 에서 이미지를 찾지 못했습니다.")
+        return
+
+    print(f"--- 페이지 {len(pages)}개, 워커 {args.workers}개 ---")
+    thread_elapsed = await _run_thread_mode(pages, args.workers)
+    print(f"  [thread ] {thread_elapsed:.1f}초 ({len(pages) / thread_elapsed:.2f} pages/sec)")
+    process_elapsed = await _run_process_mode(pages, args.workers)
+    print(f"  [process] {process_elapsed:.1f}초 ({len(pages) / process_elapsed:.2f} pages/sec)")
+    print(f"  -> 속도 향상: x{thread_elapsed / process_elapsed:.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,215 @@
+# benchmarks/bench_pipeline.py
+"""
+OCR -> 문단 병합 -> 번역 전체 파이프라인 벤치마크입니다.
+합성 코퍼스(synthetic_corpus.py)를 실제 EasyOCR로 처리하고, 번역은 로컬 가짜 Azure 서버(fake_azure_server.py)로 보냅니다.
+응답 지연과 요청 한도는 옵션으로 조절합니다.
+
+측정 항목:
+- pages/sec
+- 스테이지별(ocr / merge / translate) 지연 시간 p50 / p95 / p99
+- 페이지당 API 호출 수 (429 포함)
+- 최대 RSS (부모 + 자식 프로세스)
+
+결과는 benchmarks/results/에 JSON으로 저장됩니다. --compare로 이전 결과와 비교해 성능 저하를 확인할 수 있습니다.
+
+사용법:
+    python benchmarks/bench_pipeline.py --magazines 2 --pages 10 --latency 0.05 --rps 10
+    python benchmarks/bench_pipeline.py --compare benchmarks/results/20260101-120000.json
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import subprocess
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fake_azure_server  # noqa: E402
+from synthetic_corpus import generate_corpus  # noqa: E402
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def _peak_rss_mb() -> dict:
+    """최대 RSS (MB). resource 모듈이 없는 환경(Windows)에서는 None"""
+    try:
+        import resource
+    except ImportError:
+        return {'self': None, 'children': None}
+    # Linux는 KB, macOS는 바이트 단위
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return {
+        'self': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        'children': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale,
+    }
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=Path(__file__).resolve().parent, text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+async def run_benchmark(corpus_dir: Path, work_dir: Path, base_url: str, fake_state) -> dict:
+    # api_clients는 임포트 시점에 .env 값을 읽으므로 가짜 서버 주소를 먼저 지정
+    os.environ.update(AZURE_TRANSLATOR_KEY='bench', AZURE_TRANSLATOR_REGION='bench',
+                      AZURE_TRANSLATOR_ENDPOINT=base_url)
+    import httpx
+    import main as app
+    import ocr_processor
+    from instrumentation import percentile
+    from page_source import iter_zip_pages
+    from rate_limiter import AzureRateLimiter
+    from translation_memory import TranslationMemory
+    from ocr_cache import OcrCache
+    from ocr_pool import OcrProcessPool
+
+    # 문단 병합 시간은 OCR 스테이지 안에 포함되므로 따로 잼
+    merge_latencies = []
+    original_merge = ocr_processor.merge_raw_lines
+
+    def _timed_merge(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return original_merge(*args, **kwargs)
+        finally:
+            merge_latencies.append(time.perf_counter() - started)
+
+    ocr_processor.merge_raw_lines = _timed_merge
+
+    pages = []
+    for zip_path in sorted(corpus_dir.glob("*.zip")):
+        pages.extend(iter_zip_pages(zip_path))
+
+    # 매 실행마다 빈 캐시로 시작 (캐시 적중이 측정을 왜곡하지 않도록)
+    limiter = AzureRateLimiter.from_env()
+    memory = TranslationMemory(work_dir / "translation_memory.sqlite3")
+    ocr_cache = OcrCache(work_dir / "ocr_cache.sqlite3")
+    ocr_pool = OcrProcessPool(workers=app.OCR_WORKERS) if app.OCR_EXECUTION_MODE == 'process' else None
+
+    try:
+        started = time.perf_counter()
+        async with httpx.AsyncClient(timeout=60.0) as session:
+            results, report = await app.run_ocr_translate_pipeline(session, pages, limiter, memory,
+                                                                   ocr_pool, ocr_cache)
+        elapsed = time.perf_counter() - started
+    finally:
+        ocr_processor.merge_raw_lines = original_merge
+        memory.close()
+        ocr_cache.close()
+        if ocr_pool is not None:
+            ocr_pool.shutdown()
+
+    server_stats = fake_state.stats()
+    stage_latency = {s.name: s.latency_percentiles() for s in report.stages}
+    stage_latency['merge'] = {f'p{q}': percentile(merge_latencies, q) for q in (50, 95, 99)}
+    n_pages = len(pages)
+    return {
+        'pages': n_pages,
+        'blocks': sum(len(blocks) for _, blocks in results),
+        'elapsed_sec': elapsed,
+        'pages_per_sec': n_pages / elapsed if elapsed > 0 else 0.0,
+        'stage_latency_sec': stage_latency,
+        'stage_utilization': {s.name: s.utilization(report.elapsed) for s in report.stages},
+        'api_calls_per_page': (server_stats['requests'] + server_stats['throttled']) / max(1, n_pages),
+        'api': server_stats,
+        'peak_rss_mb': _peak_rss_mb(),
+        'config': {
+            'ocr_workers': app.OCR_WORKERS,
+            'ocr_execution_mode': app.OCR_EXECUTION_MODE,
+            'ocr_batch_pages': app.OCR_BATCH_PAGES,
+            'translate_workers': app.TRANSLATE_WORKERS,
+            'pipeline_queue_size': app.PIPELINE_QUEUE_SIZE,
+        },
+    }
+
+
+def _print_summary(result: dict):
+    print(f"\n--- 벤치마크 결과 ({result['pages']}페이지, {result['elapsed_sec']:.1f}초) ---")
+    print(f"  처리량: {result['pages_per_sec']:.2f} pages/sec")
+    for name, p in result['stage_latency_sec'].items():
+        print(f"  [{name:<10}] p50 {p['p50'] * 1000:.0f}ms / p95 {p['p95'] * 1000:.0f}ms / p99 {p['p99'] * 1000:.0f}ms")
+    print(f"  페이지당 API 호출: {result['api_calls_per_page']:.2f} (429: {result['api']['throttled']}회)")
+    rss = result['peak_rss_mb']
+    if rss['self'] is not None:
+        print(f"  최대 RSS: {rss['self']:.0f}MB (자식 프로세스 {rss['children']:.0f}MB)")
+
+
+def _print_comparison(previous: dict, current: dict):
+    """이전 결과 대비 변화율. 처리량은 낮아질수록, 지연 시간은 높아질수록 나쁨"""
+    def _delta(old, new):
+        return f"{(new - old) / old:+.1%}" if old else "n/a"
+
+    print(f"\n--- 비교: {previous.get('revision', '?')} -> {current.get('revision', '?')} ---")
+    print(f"  pages/sec: {previous['pages_per_sec']:.2f} -> {current['pages_per_sec']:.2f} "
+          f"({_delta(previous['pages_per_sec'], current['pages_per_sec'])})")
+    for name, p in current['stage_latency_sec'].items():
+        old = previous['stage_latency_sec'].get(name)
+        if old:
+            print(f"  [{name:<10}] p95 {old['p95'] * 1000:.0f}ms -> {p['p95'] * 1000:.0f}ms ({_delta(old['p95'], p['p95'])})")
+    print(f"  API 호출/페이지: {previous['api_calls_per_page']:.2f} -> {current['api_calls_per_page']:.2f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="OCR -> 병합 -> 번역 파이프라인 벤치마크")
+    parser.add_argument("--corpus", type=Path, default=None,
+                        help="매거진 ZIP 폴더 (지정하지 않으면 합성 코퍼스를 임시 폴더에 생성)")
+    parser.add_argument("--magazines", type=int, default=2)
+    parser.add_argument("--pages", type=int, default=10, help="매거진당 페이지 수")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.05, help="가짜 Azure 응답 지연 (초)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="가짜 Azure 응답 추가 지연 최대값 (초)")
+    parser.add_argument("--rps", type=float, default=0, help="가짜 Azure 초당 요청 한도 (0 = 무제한)")
+    parser.add_argument("--cpm", type=int, default=0, help="가짜 Azure 분당 문자 한도 (0 = 무제한)")
+    parser.add_argument("--out", type=Path, default=None, help="결과 JSON 경로 (기본: benchmarks/results/<시각>.json)")
+    parser.add_argument("--compare", type=Path, default=None, help="비교할 이전 결과 JSON")
+    args = parser.parse_args()
+
+    server, fake_state, base_url = fake_azure_server.start_in_background(
+        requests_per_second=args.rps, chars_per_minute=args.cpm,
+        latency=args.latency, latency_jitter=args.jitter)
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as tmp:
+            tmp = Path(tmp)
+            corpus_dir = args.corpus
+            if corpus_dir is None:
+                corpus_dir = tmp / "corpus"
+                generate_corpus(corpus_dir, args.magazines, args.pages, args.seed)
+            work_dir = tmp / "cache"
+            work_dir.mkdir()
+            result = await run_benchmark(corpus_dir, work_dir, base_url, fake_state)
+    finally:
+        server.shutdown()
+
+    result.update({
+        'revision': _git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'corpus': str(args.corpus) if args.corpus else {'magazines': args.magazines, 'pages': args.pages, 'seed': args.seed},
+        'fake_azure': {'latency': args.latency, 'jitter': args.jitter, 'rps': args.rps, 'cpm': args.cpm},
+    })
+    _print_summary(result)
+
+    out_path = args.out or RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"✅ [저장 완료] {out_path}")
+
+    if args.compare is not None:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            _print_comparison(json.load(f), result)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,153 @@
+# benchmarks/bench_prefilter.py
+"""
+글자 유무 사전 판별(prefilter.py) 효과 벤치마크입니다.
+같은 페이지 세트를 판별 없이(OCR_PREFILTER=off) / 후보 영역만 OCR(region) 두 방식으로 OCR하고
+페이지 종류(글자 페이지 / 사진 페이지)별 페이지당 지연 시간과, 판별 없는 결과 대비 텍스트 일치율을 비교합니다.
+
+사용법:
+    python benchmarks/bench_prefilter.py --generate 12 --photo-ratio 0.5
+    python benchmarks/bench_prefilter.py --pages path/to/pages --out benchmarks/results/prefilter.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import subprocess
+import tempfile
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from synthetic_corpus import load_font, render_page, render_photo_page  # noqa: E402
+from bench_preprocess import _list_pages, _similarity  # noqa: E402
+
+MODES = {
+    'baseline': {'OCR_PREFILTER': 'off'},
+    'prefilter': {'OCR_PREFILTER': 'region'},
+}
+
+
+def _generate_pages(out_dir: Path, count: int, photo_ratio: float, seed: int = 0):
+    """글자 페이지(PNG)와 사진 페이지(JPG, 절반은 캡션 포함)를 섞어서 생성"""
+    font, sentences = load_font(28)
+    rng = random.Random(seed)
+    for i in range(count):
+        if rng.random() < photo_ratio:
+            data = render_photo_page(rng, font, sentences, caption=rng.random() < 0.5)
+            (out_dir / f"page_{i + 1:03d}.jpg").write_bytes(data)
+        else:
+            (out_dir / f"page_{i + 1:03d}.png").write_bytes(render_page(rng, font, sentences))
+
+
+def _run_worker(pages_dir: Path, out_path: Path):
+    """(자식 프로세스) 환경 변수로 정해진 판별 설정으로 페이지들을 OCR하고 결과를 JSON으로 씁니다."""
+    import ocr_processor
+
+    pages = _list_pages(pages_dir)
+    # 첫 호출의 지연 로딩(모델 가중치, CUDA 초기화 등)은 측정에서 제외 (워밍업)
+    ocr_processor.init_reader()
+    ocr_processor.read_raw_lines(ocr_processor.decode_image(pages[0]))
+
+    latencies, texts, prefilters = {}, {}, {}
+    for page in pages:
+        img_cv = ocr_processor.decode_image(page)
+        started = time.perf_counter()
+        raw = ocr_processor.read_raw_lines(img_cv)
+        latencies[page.name] = time.perf_counter() - started
+        texts[page.name] = [t for t, p in zip(raw.texts, raw.probs.tolist()) if p >= ocr_processor.MIN_CONFIDENCE]
+        prefilters[page.name] = raw.prefilter
+
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump({'latencies': latencies, 'texts': texts, 'prefilters': prefilters}, f, ensure_ascii=False)
+
+
+def _run_mode(mode: str, pages_dir: Path, tmp: Path) -> dict:
+    out_path = tmp / f"{mode}.json"
+    env = dict(os.environ, **MODES[mode])
+    subprocess.run([sys.executable, __file__, "--worker", "--pages", str(pages_dir), "--out", str(out_path)],
+                   env=env, check=True)
+    with open(out_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _mean(values: list) -> float:
+    return sum(values) / len(values) if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR 글자 유무 사전 판별(prefilter) 벤치마크")
+    parser.add_argument("--pages", type=Path, default=None, help="고정 페이지 세트 이미지 폴더")
+    parser.add_argument("--generate", type=int, default=0, help="--pages 대신 합성 페이지를 이 수만큼 생성")
+    parser.add_argument("--photo-ratio", type=float, default=0.5, help="합성 페이지 중 사진 페이지 비율")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--out", type=Path, default=None, help="결과 JSON 경로")
+    args = parser.parse_args()
+
+    if args.worker:
+        _run_worker(args.pages, args.out)
+        return
+
+    with tempfile.TemporaryDirectory(prefix="bench_prefilter_") as tmp:
+        tmp = Path(tmp)
+        pages_dir = args.pages
+        if pages_dir is None:
+            if args.generate <= 0:
+                parser.error("--pages 또는 --generate 중 하나를 지정하세요.")
+            pages_dir = tmp / "pages"
+            pages_dir.mkdir()
+            _generate_pages(pages_dir, args.generate, args.photo_ratio)
+        if not _list_pages(pages_dir):
+            print(f"🚨 [오류] {pages_dir} 에서 이미지를 찾지 못했습니다.")
+            return
+
+        results = {mode: _run_mode(mode, pages_dir, tmp) for mode in MODES}
+
+    # 페이지 종류는 판별 결과로 나눔: 글자 없음 / 일부 영역만 / 페이지 전체
+    baseline, filtered = results['baseline'], results['prefilter']
+    groups = {'text_free': [], 'cropped': [], 'full_page': []}
+    for name, result in filtered['prefilters'].items():
+        if not result['has_text']:
+            groups['text_free'].append(name)
+        elif result['text_area_ratio'] < 1.0:
+            groups['cropped'].append(name)
+        else:
+            groups['full_page'].append(name)
+
+    summary = {'pages': len(baseline['latencies']), 'groups': {}}
+    print(f"\n--- 페이지 {summary['pages']}장 ---")
+    for group, names in groups.items():
+        if not names:
+            continue
+        before = _mean([baseline['latencies'][name] for name in names])
+        after = _mean([filtered['latencies'][name] for name in names])
+        similarity = _mean([_similarity(baseline['texts'][name], filtered['texts'][name]) for name in names])
+        summary['groups'][group] = {
+            'pages': len(names),
+            'baseline_mean_sec': before,
+            'prefilter_mean_sec': after,
+            'saved_per_page_sec': before - after,
+            'text_similarity_vs_baseline': similarity,
+            'mean_prefilter_ms': _mean([filtered['prefilters'][name]['elapsed_ms'] for name in names]),
+        }
+        s = summary['groups'][group]
+        print(f"  [{group:<9}] {len(names)}장 | 판별 없음 {before:.2f}초 -> 판별 {after:.2f}초 "
+              f"(페이지당 {s['saved_per_page_sec']:+.2f}초 절약, 판별 {s['mean_prefilter_ms']:.0f}ms) | "
+              f"일치율 {similarity:.1%}")
+
+    total_before = sum(baseline['latencies'].values())
+    total_after = sum(filtered['latencies'].values())
+    summary['speedup'] = total_before / max(1e-9, total_after)
+    print(f"  -> 전체 OCR 시간 {total_before:.1f}초 -> {total_after:.1f}초 (x{summary['speedup']:.2f})")
+    if args.out is not None:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"✅ [저장 완료] {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# benchmarks/bench_preprocess.py
+"""
+OCR 전처리(축소 + 타일 분할, preprocess.py) 효과 벤치마크입니다.
+같은 페이지 세트를 전처리 없이(원본 해상도) / 타일 분할만 / 전처리(축소 + 타일) 적용 세 방식으로 OCR하고
+페이지당 지연 시간, 최대 메모리(RSS), 그리고 원본 해상도 결과 대비 텍스트 일치율을 비교합니다.
+
+최대 RSS는 프로세스가 끝날 때까지 줄지 않으므로 각 방식을 별도 프로세스에서 실행합니다.
+
+사용법:
+    python benchmarks/bench_preprocess.py --pages path/to/600dpi_pages
+    python benchmarks/bench_preprocess.py --generate 4     # 600dpi 크기 합성 페이지 4장 생성 후 측정
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import difflib
+import subprocess
+import tempfile
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from synthetic_corpus import load_font, render_page  # noqa: E402
+
+MODES = {
+    # 전처리 끄기: 축소 / 타일 분할 모두 0
+    'baseline': {'OCR_TARGET_TEXT_HEIGHT': '0', 'OCR_TILE_SIZE': '0'},
+    # 타일 분할만: 이음선에 걸친 줄이 빠지거나 두 번 나오지 않는지 (원본 대비 일치율로 확인)
+    'tiled': {'OCR_TARGET_TEXT_HEIGHT': '0', 'OCR_TILE_SIZE': '2048'},
+    'preprocess': {'OCR_TARGET_TEXT_HEIGHT': '32', 'OCR_TILE_SIZE': '2048'},
+}
+
+
+def _list_pages(pages_dir: Path):
+    pages = []
+    for ext in ("*.jpg", "*.jpeg", "*.png"):
+        pages.extend(pages_dir.rglob(ext))
+    return sorted(pages)
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def _generate_pages(out_dir: Path, count: int, seed: int = 0):
+    """A4 600dpi 크기(4960x7016)에 10pt 정도 글자로 그린 합성 페이지"""
+    font, sentences = load_font(110)
+    rng = random.Random(seed)
+    for i in range(count):
+        (out_dir / f"page_{i + 1:03d}.png").write_bytes(
+            render_page(rng, font, sentences, width=4960, height=7016, columns=3))
+
+
+def _run_worker(pages_dir: Path, out_path: Path):
+    """(자식 프로세스) 환경 변수로 정해진 전처리 설정으로 페이지들을 OCR하고 결과를 JSON으로 씁니다."""
+    import ocr_processor
+    import preprocess
+
+    pages = _list_pages(pages_dir)
+    rss_after_load = _peak_rss_mb()
+    # 첫 호출의 지연 로딩(모델 가중치, CUDA 초기화 등)은 측정에서 제외 (워밍업)
+    ocr_processor.read_raw_lines(ocr_processor.decode_image(pages[0]))
+
+    latencies, texts, scales = [], {}, []
+    for page in pages:
+        img_cv = ocr_processor.decode_image(page)
+        scales.append(preprocess.plan_page(img_cv).scale)
+        started = time.perf_counter()
+        raw = ocr_processor.read_raw_lines(img_cv)
+        latencies.append(time.perf_counter() - started)
+        texts[page.name] = [t for t, p in zip(raw.texts, raw.probs.tolist()) if p >= ocr_processor.MIN_CONFIDENCE]
+
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'latencies': latencies,
+            'texts': texts,
+            'scales': scales,
+            'rss_after_load_mb': rss_after_load,
+            'peak_rss_mb': _peak_rss_mb(),
+            'config': preprocess.preprocess_config(),
+        }, f, ensure_ascii=False)
+
+
+def _run_mode(mode: str, pages_dir: Path, tmp: Path) -> dict:
+    out_path = tmp / f"{mode}.json"
+    env = dict(os.environ, **MODES[mode])
+    subprocess.run([sys.executable, __file__, "--worker", "--pages", str(pages_dir), "--out", str(out_path)],
+                   env=env, check=True)
+    with open(out_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _similarity(reference: list, candidate: list) -> float:
+    """줄 순서와 무관하게 비교하도록 정렬해서 이어 붙인 텍스트의 문자 단위 일치율"""
+    return difflib.SequenceMatcher(None, "".join(sorted(reference)), "".join(sorted(candidate))).ratio()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR 전처리(축소/타일) 벤치마크")
+    parser.add_argument("--pages", type=Path, default=None, help="고정 페이지 세트 이미지 폴더")
+    parser.add_argument("--generate", type=int, default=0, help="--pages 대신 합성 600dpi 페이지를 이 수만큼 생성")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--out", type=Path, default=None, help="결과 JSON 경로")
+    args = parser.parse_args()
+
+    if args.worker:
+        _run_worker(args.pages, args.out)
+        return
+
+    with tempfile.TemporaryDirectory(prefix="bench_preprocess_") as tmp:
+        tmp = Path(tmp)
+        pages_dir = args.pages
+        if pages_dir is None:
+            if args.generate <= 0:
+                parser.error("--pages 또는 --generate 중 하나를 지정하세요.")
+            pages_dir = tmp / "pages"
+            pages_dir.mkdir()
+            _generate_pages(pages_dir, args.generate)
+        if not _list_pages(pages_dir):
+            print(f"🚨 [오류] {pages_dir} 에서 이미지를 찾지 못했습니다.")
+            return
+
+        results = {mode: _run_mode(mode, pages_dir, tmp) for mode in MODES}
+
+    baseline = results['baseline']
+    summary = {}
+    print(f"\n--- 페이지 {len(baseline['latencies'])}장 ---")
+    for mode, result in results.items():
+        latencies = sorted(result['latencies'])
+        accuracy = [_similarity(baseline['texts'][name], texts) for name, texts in result['texts'].items()]
+        summary[mode] = {
+            'mean_latency_sec': sum(latencies) / len(latencies),
+            'p95_latency_sec': latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))],
+            'peak_rss_mb': result['peak_rss_mb'],
+            'ocr_rss_mb': (result['peak_rss_mb'] - result['rss_after_load_mb'])
+            if result['peak_rss_mb'] is not None else None,
+            'text_similarity_vs_baseline': sum(accuracy) / len(accuracy),
+            'mean_scale': sum(result['scales']) / len(result['scales']),
+            'config': result['config'],
+        }
+        s = summary[mode]
+        rss = f"{s['peak_rss_mb']:.0f}MB (OCR 중 +{s['ocr_rss_mb']:.0f}MB)" if s['peak_rss_mb'] is not None else "n/a"
+        print(f"  [{mode:<10}] 평균 {s['mean_latency_sec']:.2f}초 / p95 {s['p95_latency_sec']:.2f}초 | "
+              f"최대 RSS {rss} | 원본 대비 일치율 {s['text_similarity_vs_baseline']:.1%} | 평균 배율 {s['mean_scale']:.2f}")
+
+    speedup = summary['baseline']['mean_latency_sec'] / max(1e-9, summary['preprocess']['mean_latency_sec'])
+    print(f"  -> 속도 향상: x{speedup:.2f}")
+    if args.out is not None:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"✅ [저장 완료] {args.out}")
+
+
+if __name__ == "__main__":
+    main()
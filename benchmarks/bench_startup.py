@@ -0,0 +1,126 @@
+# benchmarks/bench_startup.py
+"""
+main.py 시작 시간 벤치마크입니다.
+OCR이 필요 없는 실행(처리할 ZIP이 없음 / 모든 페이지가 체크포인트에 있음)이 모델 로드 없이
+얼마나 빨리 끝나는지, 그리고 torch / easyocr / cv2가 불필요하게 임포트되지 않는지 확인합니다.
+
+시나리오 (각각 새 파이썬 프로세스에서 실행, 인터프리터 시작 시간 포함):
+- import: `import main`만
+- noop: 입력 ZIP이 없는 상태로 main.main() 실행
+- cache_hit: 합성 코퍼스의 모든 페이지를 체크포인트에 미리 기록해 두고 main.main() 실행
+
+각 실행은 임시 폴더를 작업 폴더(01_input_zips 등)로 사용하므로 실제 입력/결과 폴더는 건드리지 않습니다.
+
+사용법:
+    python benchmarks/bench_startup.py --repeat 5
+    python benchmarks/bench_startup.py --budget 1.0 --out benchmarks/results/startup.json
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import contextlib
+import subprocess
+import tempfile
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+SCENARIOS = ('import', 'noop', 'cache_hit')
+HEAVY_MODULES = ('torch', 'easyocr', 'cv2')
+
+
+def _run_worker(scenario: str, base_dir: Path, out_path: Path):
+    """(자식 프로세스) 시나리오 하나를 실행하고, 임포트된 무거운 모듈 목록을 JSON으로 씁니다."""
+    import main as app
+    if scenario != 'import':
+        # 작업 폴더를 임시 폴더로 바꿔 실행
+        app.INPUT_DIR = base_dir / "01_input_zips"
+        app.TEMP_DIR = base_dir / "02_temp_images"
+        app.OUTPUT_DIR = base_dir / "03_output_results"
+        app.CACHE_DIR = base_dir / "04_cache"
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            asyncio.run(app.main())
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump({'heavy_modules': [name for name in HEAVY_MODULES if name in sys.modules]}, f)
+
+
+def _prepare(scenario: str, base_dir: Path, pages: int):
+    """시나리오별 작업 폴더를 준비합니다. cache_hit은 모든 페이지를 체크포인트에 기록해 둠"""
+    (base_dir / "01_input_zips").mkdir(parents=True)
+    if scenario != 'cache_hit':
+        return
+    from synthetic_corpus import generate_corpus
+    from checkpoint import CheckpointJournal, file_sha256
+    from page_source import iter_zip_pages
+    from blocks import PageBlocks
+    from translation_backends import translation_config_hash
+
+    (base_dir / "04_cache").mkdir()
+    journal = CheckpointJournal(base_dir / "04_cache" / "checkpoint.jsonl", translation_config_hash())
+    try:
+        for zip_path in generate_corpus(base_dir / "01_input_zips", magazines=2, pages=pages):
+            zip_hash = file_sha256(zip_path)
+            for page in iter_zip_pages(zip_path, zip_path.stem):
+                journal.record(page, zip_hash, PageBlocks([[0, 0, 10, 10]], ["テスト"], ["test"], ["ok"]))
+    finally:
+        journal.close()
+
+
+def _run_scenario(scenario: str, tmp: Path, repeat: int, pages: int) -> dict:
+    base_dir = tmp / scenario
+    _prepare(scenario, base_dir, pages)
+    out_path = tmp / f"{scenario}.json"
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, __file__, "--worker", scenario, "--base", str(base_dir),
+                        "--out", str(out_path)], cwd=ROOT_DIR, check=True)
+        timings.append(time.perf_counter() - started)
+    with open(out_path, 'r', encoding='utf-8') as f:
+        worker_result = json.load(f)
+    timings.sort()
+    return {
+        'median_sec': timings[len(timings) // 2],
+        'max_sec': timings[-1],
+        'runs': timings,
+        'heavy_modules': worker_result['heavy_modules'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="main.py 시작 시간 벤치마크")
+    parser.add_argument("--repeat", type=int, default=5, help="시나리오별 반복 횟수")
+    parser.add_argument("--pages", type=int, default=20, help="cache_hit 시나리오의 매거진당 페이지 수")
+    parser.add_argument("--budget", type=float, default=1.0, help="목표 시간(초). 중앙값이 이보다 크면 경고")
+    parser.add_argument("--worker", choices=SCENARIOS, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--base", type=Path, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--out", type=Path, default=None, help="결과 JSON 경로")
+    args = parser.parse_args()
+
+    if args.worker:
+        _run_worker(args.worker, args.base, args.out)
+        return
+
+    with tempfile.TemporaryDirectory(prefix="bench_startup_") as tmp:
+        results = {scenario: _run_scenario(scenario, Path(tmp), args.repeat, args.pages) for scenario in SCENARIOS}
+
+    print(f"\n--- 시작 시간 (반복 {args.repeat}회, 목표 {args.budget:.1f}초) ---")
+    for scenario, r in results.items():
+        status = "✅" if r['median_sec'] < args.budget and not r['heavy_modules'] else "⚠️"
+        heavy = ", ".join(r['heavy_modules']) or "없음"
+        print(f"  {status} [{scenario:<9}] 중앙값 {r['median_sec']:.2f}초 / 최대 {r['max_sec']:.2f}초 | "
+              f"무거운 모듈 임포트: {heavy}")
+    if args.out is not None:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"✅ [저장 완료] {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# benchmarks/synthetic_corpus.py
+"""
+벤치마크용 합성 매거진 코퍼스 생성기입니다.
+일본어 문장을 여러 단(column)으로 배치한 페이지 이미지를 그려 매거진별 ZIP으로 저장합니다.
+--photo-ratio를 주면 그 비율의 페이지를 글자가 (거의) 없는 사진 페이지로 만듭니다. (일부는 짧은 캡션 포함)
+같은 seed면 항상 같은 코퍼스가 나오므로 버전 간 결과를 비교할 수 있습니다.
+
+일본어 폰트(Noto Sans CJK, MS Gothic 등)를 찾지 못하면 영문 문장으로 대신 그립니다. (경고 출력)
+폰트는 BENCH_FONT 환경 변수로 직접 지정할 수 있습니다.
+
+사용법:
+    python benchmarks/synthetic_corpus.py --out benchmarks/corpus --magazines 2 --pages 10
+    python benchmarks/synthetic_corpus.py --pages 10 --photo-ratio 0.5   # 사진 위주 매거진
+"""
+
+import io
+import os
+import random
+import zipfile
+import argparse
+from pathlib import Path
+from typing import List, Optional
+
+from PIL import Image, ImageDraw, ImageFont
+
+
+# 일본어 폰트 후보 (Windows / macOS / Linux)
+FONT_CANDIDATES = [
+    "C:/Windows/Fonts/msgothic.ttc",
+    "C:/Windows/Fonts/YuGothM.ttc",
+    "C:/Windows/Fonts/meiryo.ttc",
+    "/System/Library/Fonts/ヒラギノ角ゴシック W3.ttc",
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/truetype/fonts-japanese-gothic.ttf",
+]
+
+JA_SENTENCES = [
+    "今月の特集は春の新作コレクションです。",
+    "編集部おすすめのカフェを紹介します。",
+    "人気モデルが語る毎日のスキンケア習慣。",
+    "週末に行きたい近場の温泉旅館ベスト10。",
+    "読者アンケートの結果を発表します。",
+    "この春はパステルカラーが主役になりそう。",
+    "限定アイテムは数量に限りがあります。",
+    "詳しくは公式サイトをご覧ください。",
+    "次号は四月二十日発売予定です。",
+    "インタビュー：新人俳優の素顔に迫る。",
+]
+
+EN_SENTENCES = [
+    "This month features the new spring collection.",
+    "The editors introduce their favourite cafes.",
+    "A popular model talks about daily skin care.",
+    "Ten hot spring inns for a weekend trip.",
+    "Results of the reader survey are announced.",
+    "Pastel colours will lead this spring.",
+    "Limited items are available while stocks last.",
+    "See the official website for details.",
+    "The next issue goes on sale on April 20.",
+    "Interview: a closer look at a new actor.",
+]
+
+
+def find_japanese_font() -> Optional[str]:
+    """BENCH_FONT 또는 후보 경로에서 일본어 폰트를 찾습니다. 없으면 None"""
+    override = os.getenv("BENCH_FONT")
+    if override and Path(override).exists():
+        return override
+    for candidate in FONT_CANDIDATES:
+        if Path(candidate).exists():
+            return candidate
+    return None
+
+
+def load_font(font_size: int):
+    """(폰트, 문장 리스트)를 돌려줍니다. 일본어 폰트가 없으면 기본 폰트 + 영문 문장"""
+    font_path = find_japanese_font()
+    if font_path is not None:
+        return ImageFont.truetype(font_path, font_size), JA_SENTENCES
+    print("⚠️ [코퍼스] 일본어 폰트를 찾지 못해 영문 문장으로 생성합니다. (BENCH_FONT로 지정 가능)")
+    try:
+        font = ImageFont.load_default(size=font_size)
+    except TypeError: # Pillow < 10.1
+        font = ImageFont.load_default()
+    return font, EN_SENTENCES
+
+
+def render_page(rng: random.Random, font, sentences: List[str],
+                width: int = 1240, height: int = 1754, columns: int = 2) -> bytes:
+    """여러 단에 문단을 배치한 페이지 하나를 PNG 바이트로 그립니다."""
+    image = Image.new('L', (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    margin = width // 12
+    gutter = width // 20
+    column_width = (width - 2 * margin - (columns - 1) * gutter) // columns
+    line_height = int(font.size * 1.6) if hasattr(font, 'size') else 24
+
+    # 제목 (큰 글씨, 전체 폭)
+    draw.text((margin, margin), rng.choice(sentences), fill=0, font=font)
+    top = margin + line_height * 3
+
+    for col in range(columns):
+        x = margin + col * (column_width + gutter)
+        y = top
+        while y < height - margin - line_height * 4:
+            # 문단: 2~4줄 + 문단 사이 빈 줄
+            for _ in range(rng.randint(2, 4)):
+                text = rng.choice(sentences)
+                while draw.textlength(text, font=font) > column_width and len(text) > 1:
+                    text = text[:-1]
+                draw.text((x, y), text, fill=0, font=font)
+                y += line_height
+            y += line_height * 2
+
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def render_photo_page(rng: random.Random, font, sentences: List[str],
+                      width: int = 1240, height: int = 1754, caption: bool = False) -> bytes:
+    """전면 사진(부드러운 색 변화 + 질감) 페이지를 JPEG 바이트로 그립니다. caption=True면 아래에 캡션 한 줄"""
+    # 작은 무작위 색 격자를 크게 늘려 사진 같은 색 변화를 만들고 약한 잡음을 더함
+    grid = Image.new('RGB', (8, 11))
+    grid.putdata([tuple(rng.randrange(256) for _ in range(3)) for _ in range(8 * 11)])
+    image = grid.resize((width, height), Image.BICUBIC)
+    noise = Image.effect_noise((width, height), 24).convert('RGB')
+    image = Image.blend(image, noise, 0.15)
+    if caption:
+        draw = ImageDraw.Draw(image)
+        margin = width // 12
+        line_height = int(font.size * 1.6) if hasattr(font, 'size') else 24
+        top = height - margin - line_height * 2
+        draw.rectangle((margin, top, width - margin, top + line_height * 2), fill=(255, 255, 255))
+        draw.text((margin + line_height // 2, top + line_height // 2), rng.choice(sentences), fill=(0, 0, 0), font=font)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def generate_corpus(out_dir: Path, magazines: int = 2, pages: int = 10, seed: int = 0,
+                    font_size: int = 28, photo_ratio: float = 0.0) -> List[Path]:
+    """
+    매거진마다 ZIP 하나(page_001.png ...)를 만들고 ZIP 경로 리스트를 반환합니다.
+    photo_ratio 비율의 페이지는 사진 페이지(page_NNN.jpg, 절반은 캡션 포함)로 만듭니다.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    font, sentences = load_font(font_size)
+
+    zip_paths = []
+    for m in range(magazines):
+        zip_path = out_dir / f"bench_magazine_{m + 1:02d}.zip"
+        with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_STORED) as zf:
+            for p in range(pages):
+                if rng.random() < photo_ratio:
+                    zf.writestr(f"page_{p + 1:03d}.jpg",
+                                render_photo_page(rng, font, sentences, caption=rng.random() < 0.5))
+                else:
+                    zf.writestr(f"page_{p + 1:03d}.png", render_page(rng, font, sentences))
+        zip_paths.append(zip_path)
+    print(f"✅ [코퍼스] 매거진 {magazines}개 x {pages}페이지 -> {out_dir}")
+    return zip_paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벤치마크용 합성 매거진 코퍼스 생성")
+    parser.add_argument("--out", type=Path, default=Path(__file__).resolve().parent / "corpus")
+    parser.add_argument("--magazines", type=int, default=2)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--photo-ratio", type=float, default=0.0, help="사진 페이지 비율 (0~1)")
+    args = parser.parse_args()
+    generate_corpus(args.out, args.magazines, args.pages, args.seed, photo_ratio=args.photo_ratio)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+# blocks.py
+"""
+페이지 하나의 텍스트 블록(문단)을 열(column) 단위로 담는 컨테이너입니다.
+
+블록마다 dict와 [x, y, w, h] 리스트를 만드는 대신, 페이지 단위로
+- boxes: (N, 4) int32 배열
+- texts / translations / statuses: 문자열 리스트 (블록 순서)
+- errors: 실패한 블록만 {번호: 오류 메시지}
+로 보관합니다. OCR -> 번역 -> 체크포인트 / 결과 파일까지 이 형태 그대로 전달하고,
+JSON / MessagePack으로 쓸 때도 블록별 dict를 만들지 않고 바로 직렬화합니다.
+
+결과 파일의 블록 형식(box / original_text / clean_text / translated_text / translation_status /
+translation_error)은 그대로입니다. clean_text는 원문과 같으므로 따로 저장하지 않습니다.
+캐시 / 체크포인트 / 작업 큐에는 to_columns()의 열 형식으로 저장하고,
+load()는 이전 버전이 저장한 블록 dict 리스트도 읽습니다.
+"""
+
+from json.encoder import encode_basestring # ensure_ascii=False와 같은 문자열 인코딩
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+
+def _encode(value: Optional[str]) -> str:
+    return "null" if value is None else encode_basestring(value)
+
+
+class PageBlocks:
+    """
+    사용 예:
+        blocks = PageBlocks(boxes, texts)               # OCR 결과 (번역 전)
+        blocks = blocks.select([0, 2])                   # 번역할 블록만
+        blocks.set_translations(translations)            # api_clients.Translation 리스트
+        blocks.to_json(indent=2)                         # 결과 파일 형식의 JSON 배열
+    """
+
+    __slots__ = ('boxes', 'texts', 'translations', 'statuses', 'errors')
+
+    def __init__(self, boxes: Optional[np.ndarray] = None, texts: Optional[List[str]] = None,
+                 translations: Optional[List[str]] = None, statuses: Optional[List[str]] = None,
+                 errors: Optional[Dict[int, str]] = None):
+        self.texts = list(texts) if texts is not None else []
+        self.boxes = np.asarray(boxes if boxes is not None else (), dtype=np.int32).reshape(len(self.texts), 4)
+        self.translations = translations # 번역 전이면 None
+        self.statuses = statuses
+        self.errors = errors or {}
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def __repr__(self) -> str:
+        state = "번역 전" if self.translations is None else "번역됨"
+        return f"PageBlocks({len(self)}개, {state})"
+
+    @property
+    def translated(self) -> bool:
+        return self.translations is not None
+
+    def select(self, indices: Sequence[int]) -> "PageBlocks":
+        """indices 번째 블록만 담은 새 컨테이너 (번역 결과는 버림)"""
+        indices = list(indices)
+        return PageBlocks(self.boxes[indices], [self.texts[i] for i in indices])
+
+    def set_translations(self, translations: Iterable):
+        """번역 결과(.text / .status / .ok / .error를 가진 객체, 블록 순서)를 기록합니다."""
+        self.translations, self.statuses, self.errors = [], [], {}
+        for i, translation in enumerate(translations):
+            self.translations.append(translation.text)
+            self.statuses.append(translation.status)
+            if not translation.ok:
+                self.errors[i] = translation.error
+
+    # --- 레코드(블록 dict) 변환: 이전 형식 / 외부 API 호환용 ---
+    @classmethod
+    def from_paragraphs(cls, paragraphs: List[Dict]) -> "PageBlocks":
+        """[{'box': [x, y, w, h], 'text': '...'}, ...] (OCR 문단 리스트)에서 만듭니다."""
+        return cls([p['box'] for p in paragraphs], [p['text'] for p in paragraphs])
+
+    @classmethod
+    def from_records(cls, records: List[Dict]) -> "PageBlocks":
+        """결과 파일 형식의 블록 dict 리스트에서 만듭니다. (translation_status가 없던 예전 기록은 'ok')"""
+        if records and 'translated_text' not in records[0]:
+            return cls.from_paragraphs(records)
+        errors = {i: r['translation_error'] for i, r in enumerate(records) if 'translation_error' in r}
+        return cls([r['box'] for r in records], [r['original_text'] for r in records],
+                   [r['translated_text'] for r in records],
+                   [r.get('translation_status', 'ok') for r in records], errors)
+
+    def to_paragraphs(self) -> List[Dict]:
+        return [{'box': box, 'text': text} for box, text in zip(self.boxes.tolist(), self.texts)]
+
+    def to_records(self) -> List[Dict]:
+        """결과 파일 형식의 블록 dict 리스트 (번역 전이면 to_paragraphs와 같음)"""
+        if not self.translated:
+            return self.to_paragraphs()
+        records = []
+        for i, (box, text) in enumerate(zip(self.boxes.tolist(), self.texts)):
+            record = {
+                'box': box,
+                'original_text': text,
+                'clean_text': text,
+                'translated_text': self.translations[i],
+                'translation_status': self.statuses[i],
+            }
+            if i in self.errors:
+                record['translation_error'] = self.errors[i]
+            records.append(record)
+        return records
+
+    # --- 저장 형식 (캐시 / 체크포인트 / 작업 큐) ---
+    def to_columns(self) -> Dict:
+        """열 형식 dict (JSON으로 저장). boxes는 [x, y, w, h]를 이어 붙인 1차원 리스트"""
+        columns = {'boxes': self.boxes.ravel().tolist(), 'texts': self.texts}
+        if self.translated:
+            columns['translations'] = self.translations
+            columns['statuses'] = self.statuses
+            if self.errors:
+                columns['errors'] = {str(i): error for i, error in self.errors.items()}
+        return columns
+
+    @classmethod
+    def from_columns(cls, columns: Dict) -> "PageBlocks":
+        return cls(columns['boxes'], columns['texts'], columns.get('translations'), columns.get('statuses'),
+                   {int(i): error for i, error in columns.get('errors', {}).items()})
+
+    @classmethod
+    def load(cls, value: Union[Dict, List[Dict], "PageBlocks", None]) -> "PageBlocks":
+        """열 형식 dict, 블록 dict 리스트(이전 형식), PageBlocks, None(빈 페이지) 중 무엇이든 PageBlocks로"""
+        if isinstance(value, PageBlocks):
+            return value
+        if isinstance(value, dict):
+            return cls.from_columns(value)
+        return cls.from_records(value or [])
+
+    # --- 결과 파일 직렬화 (블록 dict 없이) ---
+    def _fields(self, i: int, box: str) -> List[str]:
+        """블록 i의 "키": 값 JSON 조각들 (to_records와 같은 순서)"""
+        text = encode_basestring(self.texts[i])
+        if not self.translated:
+            return ['"box": ' + box, '"text": ' + text]
+        fields = [
+            '"box": ' + box,
+            '"original_text": ' + text,
+            '"clean_text": ' + text,
+            '"translated_text": ' + _encode(self.translations[i]),
+            '"translation_status": ' + _encode(self.statuses[i]),
+        ]
+        if i in self.errors:
+            fields.append('"translation_error": ' + _encode(self.errors[i]))
+        return fields
+
+    def to_json(self, indent: Optional[int] = None, level: int = 0) -> str:
+        """
+        결과 파일 형식의 블록 배열을 JSON 문자열로 씁니다.
+        json.dumps(self.to_records(), ensure_ascii=False, indent=indent)와 같은 결과이며,
+        indent=None이면 공백 없는 형태(separators=(',', ':'))입니다. level은 들여쓰기가 시작되는 깊이입니다.
+        """
+        if not len(self):
+            return "[]"
+        boxes = self.boxes.tolist()
+        if indent is None:
+            items = (
+                "{" + ",".join(field.replace('": ', '":', 1)
+                               for field in self._fields(i, "[%d,%d,%d,%d]" % tuple(box))) + "}"
+                for i, box in enumerate(boxes)
+            )
+            return "[" + ",".join(items) + "]"
+
+        pad = " " * indent
+        base = pad * level
+        item_pad, field_pad = base + pad, base + pad * 2
+        value_pad = field_pad + pad
+        items = []
+        for i, box in enumerate(boxes):
+            box_json = "[\n" + ",\n".join(value_pad + str(v) for v in box) + "\n" + field_pad + "]"
+            items.append(item_pad + "{\n" + ",\n".join(field_pad + field for field in self._fields(i, box_json))
+                         + "\n" + item_pad + "}")
+        return "[\n" + ",\n".join(items) + "\n" + base + "]"
+
+    def pack(self, packer) -> bytes:
+        """결과 파일 형식의 블록 배열을 MessagePack으로 씁니다. (msgpack.Packer, 블록 dict 없이)"""
+        boxes = self.boxes.tolist()
+        chunks = [packer.pack_array_header(len(self))]
+        for i, box in enumerate(boxes):
+            text = self.texts[i]
+            if not self.translated:
+                chunks.append(packer.pack_map_header(2))
+                chunks.extend((packer.pack('box'), packer.pack(box), packer.pack('text'), packer.pack(text)))
+                continue
+            has_error = i in self.errors
+            chunks.append(packer.pack_map_header(6 if has_error else 5))
+            chunks.extend((
+                packer.pack('box'), packer.pack(box),
+                packer.pack('original_text'), packer.pack(text),
+                packer.pack('clean_text'), packer.pack(text),
+                packer.pack('translated_text'), packer.pack(self.translations[i]),
+                packer.pack('translation_status'), packer.pack(self.statuses[i]),
+            ))
+            if has_error:
+                chunks.extend((packer.pack('translation_error'), packer.pack(self.errors[i])))
+        return b"".join(chunks)
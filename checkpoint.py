@@ -0,0 +1,210 @@
+# checkpoint.py
+"""
+페이지 단위 체크포인트 저널입니다. (append-only JSONL)
+페이지 하나의 OCR + 번역이 끝날 때마다 한 줄씩 기록하므로, 실행이 중간에 죽어도
+다시 실행하면 끝난 페이지는 건너뛰고 남은 페이지만 처리합니다.
+
+페이지는 (ZIP 내용 해시, ZIP 안의 멤버 이름)으로 식별합니다.
+ZIP이 바뀌었더라도(재압축, 일부 페이지 교체 등) 페이지 자체의 CRC/크기가 같으면 그 결과를 재사용하므로,
+실제로 바뀐 페이지만 다시 OCR/번역합니다.
+항목마다 번역 설정 해시(translation_backends.translation_config_hash: 백엔드 / 언어 / 용어집)를 함께 기록하고
+같은 설정으로 끝난 항목만 재사용합니다. 설정이 바뀌면 체크포인트를 건너뛰고 OCR 캐시부터 다시 확인합니다.
+블록은 blocks.PageBlocks의 열 형식으로 기록합니다. (이전 형식의 줄도 읽음)
+
+메모리에는 페이지 키 -> 파일 안의 줄 위치(바이트 오프셋)만 들고 있고, 블록은 조회할 때 그 줄만 읽어 옵니다.
+다른 번역 설정으로 기록된 항목과 CHECKPOINT_MAX_AGE_DAYS보다 오래된 항목은 조회되지 않으며,
+이런 줄이 살아 있는 줄보다 많아지면 열 때 파일을 다시 써서 지웁니다.
+기록은 바로 OS에 넘기고(flush), 디스크 동기화(fsync)는 별도 스레드가 CHECKPOINT_FSYNC_INTERVAL마다 모아서 합니다.
+(프로세스가 죽어도 기록은 남고, 전원이 나가면 마지막 몇 초의 기록만 잃음)
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from blocks import PageBlocks
+from page_source import PageRef
+
+load_dotenv()
+
+# 이보다 오래된 항목은 재사용하지 않고 파일을 다시 쓸 때 지움 (0이면 나이 제한 없음)
+CHECKPOINT_MAX_AGE_DAYS = float(os.getenv("CHECKPOINT_MAX_AGE_DAYS", 30))
+# 디스크 동기화(fsync) 간격(초): 이 시간 동안 기록된 줄을 한 번에 동기화
+CHECKPOINT_FSYNC_INTERVAL = float(os.getenv("CHECKPOINT_FSYNC_INTERVAL", 1.0))
+
+
+def file_sha256(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """파일 내용의 SHA-256 해시 (큰 ZIP도 메모리에 다 올리지 않고 조각 단위로 읽음)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CheckpointJournal:
+    """
+    완료된 페이지 결과를 기록/조회하는 저널입니다.
+    사용 예:
+        journal = CheckpointJournal(CACHE_DIR / "checkpoint.jsonl", translation_config_hash())
+        blocks = journal.lookup(page, zip_hash)   # 없으면 None
+        journal.record(page, zip_hash, blocks)
+        journal.close()
+    """
+
+    def __init__(self, path: Path, config: Optional[str] = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.config = config # 번역 설정 해시 (이 값으로 기록된 항목만 조회됨)
+        self._by_key: Dict[str, int] = {}           # "zip_hash:member" -> 줄 오프셋
+        self._by_fingerprint: Dict[tuple, int] = {} # (매거진, member, 페이지 지문) -> 줄 오프셋
+        self._last_read: Tuple[int, Optional[dict]] = (-1, None) # lookup 직후 page_info가 같은 줄을 다시 읽지 않도록
+        self.restored = 0
+
+        n_lines = self._load()
+        # 같은 페이지가 여러 번 기록되었거나 지울 항목이 많아 파일이 커졌으면 살아 있는 항목만 남기고 다시 씀
+        if n_lines > 2 * max(1, len(self._by_key)):
+            self._compact()
+        self._file = open(self.path, 'ab')
+        self._reader = open(self.path, 'rb')
+        # 마지막 줄이 잘린 채 끝났으면 새 기록이 그 줄에 붙지 않도록 줄을 바꿔 둠
+        if self._file.tell() > 0:
+            self._reader.seek(-1, os.SEEK_END)
+            if self._reader.read(1) != b"\n":
+                self._file.write(b"\n")
+                self._file.flush()
+
+        self._dirty = threading.Event()
+        self._closing = threading.Event()
+        self._syncer = threading.Thread(target=self._sync_loop, name="checkpoint-fsync", daemon=True)
+        self._syncer.start()
+
+    @staticmethod
+    def _key(zip_hash: str, member: str) -> str:
+        return f"{zip_hash}:{member}"
+
+    @staticmethod
+    def _dumps(entry: dict) -> bytes:
+        return (json.dumps(dict(entry, blocks=entry['blocks'].to_columns()), ensure_ascii=False) + "\n").encode('utf-8')
+
+    def _is_live(self, entry: dict, now: float) -> bool:
+        """현재 번역 설정으로 기록되었고 너무 오래되지 않은 항목인지 (설정 해시가 없던 이전 버전의 항목은 어떤 설정과도 맞지 않음)"""
+        if entry.get('config') != self.config:
+            return False
+        recorded_at = entry.get('recorded_at')
+        return CHECKPOINT_MAX_AGE_DAYS <= 0 or recorded_at is None or now - recorded_at <= CHECKPOINT_MAX_AGE_DAYS * 86400
+
+    def _index(self, entry: dict, offset: int):
+        self._by_key[self._key(entry['zip_hash'], entry['member'])] = offset
+        self._by_fingerprint[(entry['magazine_name'], entry['member'], entry['fingerprint'])] = offset
+
+    def _load(self) -> int:
+        if not self.path.exists():
+            return 0
+        n_lines = 0
+        offset = 0
+        now = time.time()
+        with open(self.path, 'rb') as f:
+            for line in f:
+                n_lines += 1
+                try:
+                    # 블록은 메모리에 두지 않고 키와 줄 위치만 색인
+                    entry = json.loads(line)
+                    if self._is_live(entry, now):
+                        self._index(entry, offset)
+                except (json.JSONDecodeError, UnicodeDecodeError, KeyError, TypeError):
+                    # 실행 중 죽어서 마지막 줄이 잘린 경우 등은 무시
+                    pass
+                offset += len(line)
+        return n_lines
+
+    def _compact(self):
+        """색인된(살아 있는) 줄만 새 파일로 옮기고 오프셋을 다시 매깁니다."""
+        tmp_path = self.path.with_suffix('.tmp')
+        moved = {}
+        with open(self.path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            for offset in sorted(set(self._by_key.values()) | set(self._by_fingerprint.values())):
+                src.seek(offset)
+                moved[offset] = dst.tell()
+                dst.write(src.readline())
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(tmp_path, self.path)
+        self._by_key = {key: moved[offset] for key, offset in self._by_key.items()}
+        self._by_fingerprint = {key: moved[offset] for key, offset in self._by_fingerprint.items()}
+
+    def _read(self, offset: int) -> Optional[dict]:
+        if self._last_read[0] != offset:
+            self._reader.seek(offset)
+            try:
+                entry = json.loads(self._reader.readline())
+                entry['blocks'] = PageBlocks.load(entry['blocks'])
+            except (json.JSONDecodeError, UnicodeDecodeError, KeyError, TypeError, ValueError):
+                entry = None
+            self._last_read = (offset, entry)
+        return self._last_read[1]
+
+    def _find(self, page: PageRef, zip_hash: str) -> Optional[dict]:
+        offset = self._by_key.get(self._key(zip_hash, page.member))
+        if offset is None:
+            offset = self._by_fingerprint.get((page.magazine_name, page.member, page.fingerprint))
+        return self._read(offset) if offset is not None else None
+
+    def lookup(self, page: PageRef, zip_hash: str) -> Optional[PageBlocks]:
+        """이 페이지의 완료된 결과(번역된 블록 리스트)가 있으면 반환하고, 없으면 None."""
+        entry = self._find(page, zip_hash)
+        if entry is None:
+            return None
+        self.restored += 1
+        return entry['blocks']
+
+    def page_info(self, page: PageRef, zip_hash: str) -> Optional[dict]:
+        """record()에 함께 넘긴 페이지 정보 (결과 파일의 페이지 항목에 덧붙이는 값). 없으면 None"""
+        entry = self._find(page, zip_hash)
+        return entry.get('page_info') if entry is not None else None
+
+    def record(self, page: PageRef, zip_hash: str, blocks: PageBlocks, page_info: Optional[dict] = None):
+        """
+        완료된 페이지 결과를 저널 끝에 한 줄로 추가합니다.
+        이벤트 루프에서 불리므로 OS에 넘기기(flush)까지만 하고 fsync는 동기화 스레드에 맡깁니다.
+        """
+        entry = {
+            'zip_hash': zip_hash,
+            'magazine_name': page.magazine_name,
+            'member': page.member,
+            'fingerprint': page.fingerprint,
+            'config': self.config,
+            'recorded_at': round(time.time(), 3),
+            'blocks': blocks,
+        }
+        if page_info:
+            entry['page_info'] = page_info
+        offset = self._file.tell()
+        self._file.write(self._dumps(entry))
+        self._file.flush()
+        self._index(entry, offset)
+        self._dirty.set()
+
+    def _sync_loop(self):
+        while not self._closing.is_set():
+            self._dirty.wait()
+            self._closing.wait(CHECKPOINT_FSYNC_INTERVAL) # 그동안 기록된 줄을 한 번에 동기화 (닫는 중이면 바로)
+            if self._closing.is_set():
+                return # 마지막 동기화는 close()에서
+            self._dirty.clear()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._closing.set()
+        self._dirty.set()
+        self._syncer.join()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._reader.close()
@@ -0,0 +1,486 @@
+# dedup.py
+"""
+지각 해시(perceptual hash)로 거의 같은 페이지 / 블록을 찾아 이전 OCR 결과를 재사용합니다.
+
+연속된 호의 같은 잡지에는 반복 광고, 목차 틀, 정기구독 안내처럼 거의 같은 페이지가 많습니다.
+OCR 캐시(ocr_cache.py)는 이미지 바이트가 완전히 같아야 적중하므로, 다시 스캔하거나 다시 압축한 페이지는
+처음부터 다시 OCR하고, OCR이 조금 다르게 읽은 문구는 번역 메모리에도 없어서 다시 번역합니다.
+
+1. 페이지: OCR 캐시에 없는 페이지는 OCR 직전에 (선읽기가 디코딩해 둔 이미지로) 256비트 pHash를 구해,
+   이전에 OCR한 페이지(이전 실행 포함) 중
+   해시 거리가 DEDUP_MAX_DISTANCE 이하이고 가로세로 비율이 같은 페이지를 찾습니다.
+   그 페이지의 문단 상자 위치마다 crop 해시를 다시 비교하고 (DEDUP_BLOCK_MAX_DISTANCE 이하),
+   마지막으로 문단 영역의 픽셀을 저장해 둔 이미지와 직접 비교해 (verify_image) 모두 같을 때만 문단(텍스트)을 그대로 씁니다.
+   텍스트가 같으므로 번역도 번역 메모리에서 API 호출 없이 나옵니다.
+2. 블록 (OCR_DEDUP=block): 새로 OCR한 페이지의 문단 crop마다 해시를 구해, 전에 본 블록과 크기 / 해시가 거의 같고
+   새로 OCR한 텍스트도 거의 같으면 (숫자는 모두 같고 유사도 DEDUP_TEXT_SIMILARITY 이상) 그 블록의 텍스트를 씁니다.
+   OCR이 매번 조금씩 다르게 읽는 반복 문구도 번역 메모리에서 바로 번역됩니다.
+
+해시 거리는 256비트 중 다른 비트 수입니다.
+- 페이지: 다시 압축 / 약간의 크기 차이는 보통 0~6, 다른 페이지는 40 이상 (같은 틀의 다른 페이지는 블록 비교로 거름)
+- 블록: 다시 압축은 보통 0~6, 다른 문단은 100 이상
+  여러 줄짜리 문단에서 숫자 한 글자만 바뀐 경우(가격 5800 -> 6800 등)는 거리 0~6으로 다시 압축과 구별되지 않습니다.
+  그래서 해시는 후보를 찾는 데만 쓰고, 페이지 재사용은 픽셀 비교로, 블록 텍스트 재사용은 새 OCR 텍스트와의 비교로 확인합니다.
+  크기를 바꿔 다시 스캔한 페이지는 해시 / 픽셀이 흔들리므로 재사용하지 않고 OCR합니다.
+잘못 재사용하면 다른 내용이 조용히 결과에 들어가므로 기본값은 off입니다. (쓰려면 OCR_DEDUP=page 또는 block)
+인덱스는 SQLite 파일(04_cache/dedup_index.sqlite3)에 OCR 설정별로 쌓이고, 실행 중에 OCR한 페이지도 바로 추가되므로
+같은 실행 안에서 뒤에 나오는 중복 페이지도 재사용합니다. (동시에 OCR 중인 페이지끼리는 재사용하지 못함)
+"""
+
+import os
+import re
+import json
+import time
+import difflib
+import unicodedata
+import sqlite3
+import hashlib
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from dotenv import load_dotenv
+
+from blocks import PageBlocks
+from page_source import PageRef
+
+load_dotenv()
+
+# off: 사용 안 함 / page: 거의 같은 페이지만 재사용 / block: 페이지 + 반복 블록 텍스트 재사용
+OCR_DEDUP = os.getenv("OCR_DEDUP", "off").lower()
+DEDUP_MODES = ('off', 'page', 'block')
+# 같은 페이지 / 블록으로 볼 최대 해시 거리 (256비트 중)
+DEDUP_MAX_DISTANCE = int(os.getenv("DEDUP_MAX_DISTANCE", 16))
+DEDUP_BLOCK_MAX_DISTANCE = int(os.getenv("DEDUP_BLOCK_MAX_DISTANCE", 3))
+# block 모드: 이전 블록 텍스트로 바꾸려면 새로 OCR한 텍스트와 이 이상 비슷해야 함 (숫자는 항상 모두 같아야 함)
+DEDUP_TEXT_SIMILARITY = float(os.getenv("DEDUP_TEXT_SIMILARITY", 0.9))
+HASH_BYTES = 32
+SIZE_TOLERANCE = 0.1     # 가로세로 비율(페이지) / 크기(블록) 차이 허용 비율
+MIN_BLOCK_SIDE = 12      # 이보다 작은 블록은 해시하지 않음 (작은 crop은 다시 압축만 해도 해시가 크게 흔들림)
+MIN_CONTRAST = 32        # 밝기 차이가 이보다 작은 crop은 빈 블록으로 봄 (DCT 계수가 잡음뿐이라 해시가 무의미)
+MAX_CANDIDATES = 3       # 페이지 해시가 가까운 후보를 블록 비교까지 해 보는 최대 수
+_MERGE_EVERY = 1024      # 새로 추가한 해시를 이만큼 모으면 검색용 배열에 합침
+# 픽셀 비교: 긴 변을 VERIFY_SIDE 이하로 줄인 흑백 이미지의 문단 영역에서 밝기 차이가 VERIFY_DIFF를 넘는 픽셀이
+# VERIFY_MIN_AREA개 이상 붙어 있으면 다른 페이지 (다시 압축은 0, 숫자 한 글자 차이는 작은 글씨에서도 7 이상)
+VERIFY_SIDE = 1800
+VERIFY_DIFF = 96
+VERIFY_MIN_AREA = 4
+VERIFY_LEVELS = 16       # 저장할 때 밝기 단계 (PNG 크기를 줄임, 오차 8 이하)
+
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def dedup_config(languages: List[str], preprocess_config: dict, merge_config: dict) -> str:
+    """인덱스를 나누는 OCR 설정 키 (설정이 다르면 같은 페이지라도 텍스트가 다를 수 있으므로 서로 재사용하지 않음)"""
+    config = json.dumps({'languages': languages, 'preprocess': preprocess_config, 'merge': merge_config},
+                        sort_keys=True)
+    return hashlib.sha256(config.encode('utf-8')).hexdigest()[:16]
+
+
+# --- 1. 해시 ---
+def perceptual_hash(gray: np.ndarray) -> np.ndarray:
+    """256비트 pHash: 64x64로 줄인 이미지의 DCT 저주파 16x16 계수가 중앙값보다 큰지 (32바이트 uint8 배열)"""
+    import cv2
+    small = cv2.resize(gray, (64, 64), interpolation=cv2.INTER_AREA).astype(np.float32)
+    coeffs = cv2.dct(small)[:16, :16].ravel()
+    return np.packbits(coeffs > np.median(coeffs[1:]))
+
+
+def _distances(hashes: np.ndarray, target: np.ndarray) -> np.ndarray:
+    """hashes (N, 32)와 target (32,) 사이의 해밍 거리 (N,)"""
+    return _POPCOUNT[np.bitwise_xor(hashes, target)].sum(axis=1, dtype=np.int32)
+
+
+def _to_gray(image: Union[np.ndarray, bytes]) -> np.ndarray:
+    import cv2
+    if isinstance(image, np.ndarray):
+        return image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    gray = cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        raise ValueError("이미지를 디코딩하지 못했습니다.")
+    return gray
+
+
+def block_hash(crop: np.ndarray) -> Tuple[int, np.ndarray]:
+    """
+    블록 crop의 해시: 글자(잉크) 영역에 맞춰 다시 자르고 (상자 위치가 조금 달라도 같은 해시가 나오도록)
+    가로세로 비율을 살린 격자(행 x 열 <= 256)에서 pHash를 구합니다. (정사각형으로 줄이면 한 줄짜리 문단끼리 구별이 안 됨)
+    Returns: (격자 행 수, 32바이트 해시) - 행 수가 다른 해시끼리는 비교하지 않음 (빈 블록은 (1, 0))
+    """
+    import cv2
+    if int(crop.max()) - int(crop.min()) < MIN_CONTRAST:
+        return 1, np.zeros(HASH_BYTES, dtype=np.uint8)
+    _, ink = cv2.threshold(crop, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    ys, xs = np.nonzero(ink)
+    if len(xs):
+        crop = crop[ys.min():ys.max() + 1, xs.min():xs.max() + 1]
+    height, width = crop.shape[:2]
+    rows = int(np.clip(round(np.sqrt(HASH_BYTES * 8 * height / width)), 2, 64))
+    cols = HASH_BYTES * 8 // rows
+    small = cv2.resize(crop, (cols * 4, rows * 4), interpolation=cv2.INTER_AREA).astype(np.float32)
+    coeffs = cv2.dct(small)[:rows, :cols].ravel()
+    bits = np.zeros(HASH_BYTES * 8, dtype=bool)
+    bits[:len(coeffs)] = coeffs > np.median(coeffs[1:])
+    return rows, np.packbits(bits)
+
+
+def block_hashes(gray: np.ndarray, boxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    문단 상자 [x, y, w, h]마다 block_hash. Returns: (해시 (N, 32), 격자 행 수 (N,))
+    너무 작거나 이미지 밖인 블록은 행 수 0 (비교하지 않음)
+    """
+    hashes = np.zeros((len(boxes), HASH_BYTES), dtype=np.uint8)
+    rows = np.zeros(len(boxes), dtype=np.uint8)
+    height, width = gray.shape[:2]
+    for i, (x, y, w, h) in enumerate(np.asarray(boxes).tolist()):
+        x0, y0, x1, y1 = max(0, x), max(0, y), min(width, x + w), min(height, y + h)
+        if x1 - x0 >= MIN_BLOCK_SIDE and y1 - y0 >= MIN_BLOCK_SIDE:
+            rows[i], hashes[i] = block_hash(gray[y0:y1, x0:x1])
+    return hashes, rows
+
+
+def verify_image(gray: np.ndarray, boxes: np.ndarray, size: Tuple[int, int] = None) -> np.ndarray:
+    """
+    픽셀 비교용 이미지: 긴 변 VERIFY_SIDE 이하로 줄인 흑백 이미지에서 문단 상자 밖은 흰색으로 지움
+    size(가로, 세로)를 주면 그 크기로 맞춤 (저장된 페이지와 비교할 때)
+    """
+    import cv2
+    height, width = gray.shape[:2]
+    if size is None:
+        scale = min(1.0, VERIFY_SIDE / max(height, width))
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    small = cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+    mask = np.zeros(small.shape, dtype=bool)
+    scale = np.array([size[0] / width, size[1] / height] * 2)
+    for x, y, w, h in np.rint(np.asarray(boxes, dtype=np.float64).reshape(-1, 4) * scale).astype(np.int64).tolist():
+        mask[max(0, y):max(0, y + h), max(0, x):max(0, x + w)] = True
+    small[~mask] = 255
+    return small
+
+
+def _encode_verify(image: np.ndarray) -> bytes:
+    import cv2
+    step = 256 // VERIFY_LEVELS
+    ok, encoded = cv2.imencode('.png', (image // step * step + step // 2).astype(np.uint8),
+                               [cv2.IMWRITE_PNG_COMPRESSION, 9])
+    return encoded.tobytes()
+
+
+def _pixels_differ(stored: np.ndarray, image: np.ndarray) -> bool:
+    """두 verify_image에 다시 압축으로는 생기지 않는 크기의 밝기 차이(바뀐 글자 등)가 있는지"""
+    import cv2
+    diff = (np.abs(stored.astype(np.int16) - image.astype(np.int16)) > VERIFY_DIFF).astype(np.uint8)
+    n, _, stats, _ = cv2.connectedComponentsWithStats(diff, connectivity=8)
+    return n > 1 and int(stats[1:, cv2.CC_STAT_AREA].max()) >= VERIFY_MIN_AREA
+
+
+def _normalize_text(text: str) -> str:
+    return re.sub(r'\s+', '', unicodedata.normalize('NFKC', text))
+
+
+def same_text(text: str, other: str, min_similarity: float = DEDUP_TEXT_SIMILARITY) -> bool:
+    """
+    block 모드에서 새로 OCR한 텍스트를 이전 블록 텍스트로 바꿔도 되는지:
+    숫자(가격 / 날짜 / 전화번호)가 순서까지 모두 같고, 나머지도 min_similarity 이상 같아야 함
+    """
+    a, b = _normalize_text(text), _normalize_text(other)
+    if a == b:
+        return True
+    if re.findall(r'\d', a) != re.findall(r'\d', b):
+        return False
+    return difflib.SequenceMatcher(None, a, b, autojunk=False).ratio() >= min_similarity
+
+
+@dataclass
+class PageHash:
+    """페이지 해시와 가로세로 크기"""
+    value: np.ndarray
+    width: int
+    height: int
+
+    @property
+    def aspect(self) -> float:
+        return self.width / max(1, self.height)
+
+
+def hash_page(image: Union[np.ndarray, bytes]) -> PageHash:
+    """
+    페이지 해시. 바이트는 원래 크기로 디코딩합니다.
+    (OpenCV의 축소 디코딩(IMREAD_REDUCED_*)은 PNG에서 계단 현상이 생겨 같은 페이지의 JPEG와 해시가 크게 달라짐)
+    """
+    gray = _to_gray(image)
+    return PageHash(perceptual_hash(gray), gray.shape[1], gray.shape[0])
+
+
+@dataclass
+class DedupMatch:
+    """재사용할 페이지 (blocks: 새 페이지 크기에 맞춘 문단, 번역 전)"""
+    blocks: PageBlocks
+    source: str   # 원래 페이지 ('매거진/파일 이름')
+    distance: int # 페이지 해시 거리
+
+    def page_info(self) -> dict:
+        """결과 파일의 페이지 항목에 남길 정보"""
+        return {'ocr_dedup': {'source': self.source, 'distance': self.distance}}
+
+
+class _HashTable:
+    """
+    해시 (N, 32) + 크기 (N, 2) + 구분 값(블록 해시의 격자 행 수) + 행 번호를 모아 두고 해밍 거리로 찾습니다.
+    새 항목은 모았다가 가끔 배열에 합칩니다.
+    """
+
+    def __init__(self):
+        self.hashes = np.zeros((0, HASH_BYTES), dtype=np.uint8)
+        self.sizes = np.zeros((0, 2), dtype=np.float64)
+        self.kinds = np.zeros(0, dtype=np.int32)
+        self.ids = np.zeros(0, dtype=np.int64)
+        self._new: List[tuple] = []
+
+    def __len__(self) -> int:
+        return len(self.ids) + len(self._new)
+
+    def add(self, value: np.ndarray, size: Tuple[float, float], row_id: int, kind: int = 0):
+        self._new.append((value, size, kind, row_id))
+        if len(self._new) >= _MERGE_EVERY:
+            self._merge()
+
+    def _merge(self):
+        if not self._new:
+            return
+        values, sizes, kinds, ids = zip(*self._new)
+        self.hashes = np.concatenate([self.hashes, np.stack(values)])
+        self.sizes = np.concatenate([self.sizes, np.array(sizes, dtype=np.float64)])
+        self.kinds = np.concatenate([self.kinds, np.array(kinds, dtype=np.int32)])
+        self.ids = np.concatenate([self.ids, np.array(ids, dtype=np.int64)])
+        self._new = []
+
+    def search(self, value: np.ndarray, size: Tuple[float, ...], max_distance: int,
+               kind: int = 0) -> List[Tuple[int, int]]:
+        """구분 값이 같고 크기가 SIZE_TOLERANCE 안이며 거리가 max_distance 이하인 항목 [(거리, 행 번호), ...] (가까운 순)"""
+        self._merge()
+        if not len(self.ids):
+            return []
+        size = np.asarray(size, dtype=np.float64)
+        fits = np.all(np.abs(self.sizes - size) <= SIZE_TOLERANCE * size, axis=1) & (self.kinds == kind)
+        candidates = np.flatnonzero(fits)
+        distances = _distances(self.hashes[candidates], value)
+        close = np.flatnonzero(distances <= max_distance)
+        order = close[np.argsort(distances[close], kind='stable')]
+        return [(int(distances[i]), int(self.ids[candidates[i]])) for i in order]
+
+
+class DedupIndex:
+    """
+    사용 예:
+        index = DedupIndex(CACHE_DIR / "dedup_index.sqlite3", dedup_config(...))
+        match = index.match_page(page, image)           # 재사용할 결과가 있으면 DedupMatch
+        index.add_page(page, image, blocks)             # 새로 OCR한 페이지 등록 (block 모드면 블록 텍스트도 재사용)
+    OCR 워커 스레드 여러 개에서 동시에 호출해도 됩니다.
+    """
+
+    def __init__(self, db_path: Path, config: str, mode: str = OCR_DEDUP,
+                 max_distance: int = DEDUP_MAX_DISTANCE, block_max_distance: int = DEDUP_BLOCK_MAX_DISTANCE,
+                 text_similarity: float = DEDUP_TEXT_SIMILARITY):
+        if mode not in DEDUP_MODES:
+            raise ValueError(f"지원하지 않는 OCR_DEDUP 값: {mode} (가능: {', '.join(DEDUP_MODES)})")
+        self.mode = mode
+        self.config = config
+        self.max_distance = max_distance
+        self.block_max_distance = block_max_distance
+        self.text_similarity = text_similarity
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                id INTEGER PRIMARY KEY,
+                config TEXT NOT NULL,
+                page_hash BLOB NOT NULL,
+                width INTEGER NOT NULL,
+                height INTEGER NOT NULL,
+                source TEXT NOT NULL,
+                data TEXT NOT NULL,
+                block_hashes BLOB NOT NULL,
+                block_rows BLOB NOT NULL,
+                verify BLOB,
+                created REAL NOT NULL
+            )
+        """)
+        # 픽셀 비교용 이미지(verify)가 없던 인덱스: 열만 추가 (그런 페이지는 확인할 수 없으므로 재사용하지 않음)
+        if 'verify' not in [row[1] for row in self._conn.execute("PRAGMA table_info(pages)")]:
+            self._conn.execute("ALTER TABLE pages ADD COLUMN verify BLOB")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS blocks (
+                id INTEGER PRIMARY KEY,
+                config TEXT NOT NULL,
+                block_hash BLOB NOT NULL,
+                grid_rows INTEGER NOT NULL,
+                width INTEGER NOT NULL,
+                height INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                created REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+        self._pages = _HashTable()  # 크기 열: (가로세로 비율, 1)
+        self._blocks = _HashTable() # 크기 열: (너비, 높이)
+        for row_id, value, width, height in self._conn.execute(
+                "SELECT id, page_hash, width, height FROM pages WHERE config = ?", (config,)):
+            self._pages.add(np.frombuffer(value, dtype=np.uint8), (width / max(1, height), 1.0), row_id)
+        for row_id, value, grid_rows, width, height in self._conn.execute(
+                "SELECT id, block_hash, grid_rows, width, height FROM blocks WHERE config = ?", (config,)):
+            self._blocks.add(np.frombuffer(value, dtype=np.uint8), (width, height), row_id, grid_rows)
+        self.page_hashes: Dict[PageRef, PageHash] = {}
+
+        # 통계 (실행 후 리포트용)
+        self.pages_reused = 0    # OCR을 건너뛴 페이지
+        self.pages_rejected = 0  # 페이지 해시는 가까웠지만 블록이 달라서 OCR한 페이지
+        self.blocks_reused = 0   # 이전 블록 텍스트를 쓴 블록 (block 모드)
+        self.blocks_rejected = 0 # 해시는 가까웠지만 새 OCR 텍스트가 달라 그대로 둔 블록 (block 모드)
+        self.chars_reused = 0    # 재사용한 텍스트 글자 수 (번역 메모리에서 나오는 번역 대상)
+        self.hash_seconds = 0.0
+        self._ocr_seconds = 0.0
+        self._ocr_pages = 0
+
+    # --- 1. 페이지 해시 ---
+    def _page_hash(self, page: PageRef, gray: np.ndarray) -> PageHash:
+        """OCR 단계에서 이미 디코딩한 이미지로 페이지 해시를 구합니다. (match_page에서 구한 값은 add_page까지 들고 있음)"""
+        page_hash = self.page_hashes.get(page)
+        if page_hash is None:
+            started = time.perf_counter()
+            page_hash = self.page_hashes[page] = hash_page(gray)
+            with self._lock:
+                self.hash_seconds += time.perf_counter() - started
+        return page_hash
+
+    # --- 2. OCR 대신: 거의 같은 페이지 재사용 ---
+    def match_page(self, page: PageRef, image: Union[np.ndarray, bytes]) -> Optional[DedupMatch]:
+        """이전에 OCR한 페이지 중 이 페이지와 (블록 해시와 문단 픽셀까지) 거의 같은 페이지가 있으면 그 문단을 돌려줍니다."""
+        import cv2
+        gray = _to_gray(image)
+        page_hash = self._page_hash(page, gray)
+        with self._lock:
+            candidates = self._pages.search(page_hash.value, (page_hash.aspect, 1.0), self.max_distance)
+        if not candidates:
+            return None
+        height, width = gray.shape[:2]
+        for distance, row_id in candidates[:MAX_CANDIDATES]:
+            with self._lock:
+                stored_width, stored_height, source, data, stored_hashes, stored_rows, verify = self._conn.execute(
+                    "SELECT width, height, source, data, block_hashes, block_rows, verify FROM pages WHERE id = ?",
+                    (row_id,)).fetchone()
+            if verify is None:
+                continue
+            stored = PageBlocks.from_columns(json.loads(data))
+            stored_hashes = np.frombuffer(stored_hashes, dtype=np.uint8).reshape(-1, HASH_BYTES)
+            stored_rows = np.frombuffer(stored_rows, dtype=np.uint8)
+            # 다시 스캔한 페이지는 크기가 조금 다를 수 있으므로 상자를 새 페이지 크기에 맞춤
+            scale = np.array([width / stored_width, height / stored_height] * 2)
+            boxes = np.rint(stored.boxes * scale).astype(np.int32)
+            hashes, rows = block_hashes(gray, boxes)
+            # 모든 블록의 격자가 같고 해시가 가까워야 재사용
+            # 해시하지 않은(작은) 블록이 있는 페이지는 확인할 수 없으므로 재사용하지 않음 (쪽 번호만 다른 반복 페이지 등)
+            if not ((stored_rows > 0).all() and np.array_equal(rows, stored_rows) and np.all(
+                    _distances(hashes, stored_hashes) <= self.block_max_distance)):
+                continue
+            # 해시는 숫자 한 글자 차이를 구별하지 못할 수 있으므로 문단 영역의 픽셀을 직접 비교
+            stored_image = cv2.imdecode(np.frombuffer(verify, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+            image_now = verify_image(gray, boxes, (stored_image.shape[1], stored_image.shape[0]))
+            if not _pixels_differ(stored_image, image_now):
+                self.page_hashes.pop(page, None)
+                with self._lock:
+                    self.pages_reused += 1
+                    self.chars_reused += sum(len(text) for text in stored.texts)
+                return DedupMatch(PageBlocks(boxes, stored.texts), source, distance)
+        with self._lock:
+            self.pages_rejected += 1
+        return None
+
+    # --- 3. OCR 후: 등록 (+ 블록 텍스트 재사용) ---
+    def add_page(self, page: PageRef, image: Union[np.ndarray, bytes], blocks: PageBlocks) -> int:
+        """
+        새로 OCR한 페이지를 인덱스에 넣습니다. block 모드면 전에 본 블록과 거의 같은 블록의 텍스트를
+        그 블록의 텍스트로 바꿉니다. 새로 OCR한 텍스트와 거의 같을 때만 바꿉니다. (same_text, blocks를 직접 수정)
+        Returns: 텍스트를 재사용한 블록 수
+        """
+        gray = _to_gray(image)
+        page_hash = self._page_hash(page, gray)
+        self.page_hashes.pop(page, None)
+        hashes, rows = block_hashes(gray, blocks.boxes)
+        verify = _encode_verify(verify_image(gray, blocks.boxes))
+        reused = 0
+        with self._lock:
+            if self.mode == 'block':
+                now = time.time()
+                for i, (x, y, w, h) in enumerate(blocks.boxes.tolist()):
+                    if not rows[i] or not blocks.texts[i].strip():
+                        continue
+                    found = self._blocks.search(hashes[i], (w, h), self.block_max_distance, int(rows[i]))
+                    text = None
+                    for _, block_id in found[:MAX_CANDIDATES]:
+                        stored_text = self._conn.execute("SELECT text FROM blocks WHERE id = ?",
+                                                         (block_id,)).fetchone()[0]
+                        if same_text(blocks.texts[i], stored_text, self.text_similarity):
+                            text = stored_text
+                            break
+                    if text is not None:
+                        blocks.texts[i] = text
+                        reused += 1
+                        self.chars_reused += len(text)
+                        continue
+                    if found:
+                        # 모양은 비슷하지만 내용이 다른 블록 (가격만 바뀐 광고 등): 새 텍스트를 그대로 쓰고 따로 등록
+                        self.blocks_rejected += 1
+                    cursor = self._conn.execute(
+                        "INSERT INTO blocks (config, block_hash, grid_rows, width, height, text, created) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (self.config, hashes[i].tobytes(), int(rows[i]), w, h, blocks.texts[i], now))
+                    self._blocks.add(hashes[i], (w, h), cursor.lastrowid, int(rows[i]))
+                self.blocks_reused += reused
+            # 블록 텍스트를 정리한 뒤의 문단을 저장 (다음에 이 페이지와 같은 페이지가 오면 그대로 씀)
+            cursor = self._conn.execute(
+                "INSERT INTO pages (config, page_hash, width, height, source, data, block_hashes, block_rows, verify, "
+                "created) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.config, page_hash.value.tobytes(), gray.shape[1], gray.shape[0],
+                 f"{page.magazine_name}/{page.name}",
+                 json.dumps(blocks.to_columns(), ensure_ascii=False, separators=(',', ':')),
+                 hashes.tobytes(), rows.tobytes(), verify, time.time()))
+            self._pages.add(page_hash.value, (page_hash.aspect, 1.0), cursor.lastrowid)
+            self._conn.commit()
+        return reused
+
+    def forget(self, pages: List[PageRef]):
+        """처리가 끝난 페이지의 해시를 버립니다. (OCR에 실패해 add_page까지 가지 않은 페이지 등)"""
+        for page in pages:
+            self.page_hashes.pop(page, None)
+
+    def record_ocr(self, seconds: float, pages: int):
+        """실제로 OCR한 시간 (재사용으로 아낀 시간 추정용)"""
+        with self._lock:
+            self._ocr_seconds += seconds
+            self._ocr_pages += pages
+
+    def stats(self) -> dict:
+        with self._lock:
+            per_page = self._ocr_seconds / self._ocr_pages if self._ocr_pages else 0.0
+            return {
+                'pages_reused': self.pages_reused,
+                'pages_rejected': self.pages_rejected,
+                'blocks_reused': self.blocks_reused,
+                'blocks_rejected': self.blocks_rejected,
+                'chars_reused': self.chars_reused,
+                'hash_seconds': round(self.hash_seconds, 2),
+                'ocr_seconds_saved': round(per_page * self.pages_reused, 2), # 이번 실행의 페이지당 평균 OCR 시간 기준 추정
+                'indexed_pages': len(self._pages),
+                'indexed_blocks': len(self._blocks),
+            }
+
+    def close(self):
+        self._conn.close()
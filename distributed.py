@@ -0,0 +1,633 @@
+# distributed.py
+"""
+여러 프로세스 / 여러 머신이 나눠서 처리하는 분산 모드입니다.
+
+- coordinator: 01_input_zips의 페이지들을 작업 큐(SQLite 임대 테이블)에 넣고,
+  매거진의 모든 페이지가 끝나면 main.save_results로 결과 JSON을 만듭니다.
+  작업 큐는 HTTP 임대 API(WORK_COORDINATOR_PORT, 기본 8810)로도 내줍니다. (페이지 이미지도 이 API로 전달)
+- worker: 큐에서 페이지 몇 개를 임대(lease)해 OCR + 번역하고 결과를 큐에 다시 씁니다.
+  워커는 상태가 없으므로 몇 개든, 어느 머신에서든 띄울 수 있습니다. (OCR 캐시 / 번역 메모리는 각 워커의 04_cache에 따로 쌓임)
+  임대 기간 안에 결과를 쓰지 못한(죽은) 워커의 페이지는 기간이 지나면 다시 다른 워커에게 나갑니다.
+  - --coordinator http://호스트:8810 : HTTP로 임대 (다른 머신의 워커, 입력 ZIP / 큐 파일에 접근할 필요 없음)
+  - --queue 경로 (기본) : 큐 파일을 직접 엶 (코디네이터와 같은 머신의 워커)
+
+큐 파일은 SQLite 파일 잠금으로 임대가 겹치지 않게 하므로 코디네이터 머신의 로컬 디스크에 두세요.
+(NFS / SMB 같은 네트워크 파일 시스템은 파일 잠금을 제대로 지키지 않으므로, 다른 머신은 큐 파일 대신 HTTP API를 씀)
+HTTP API에는 인증이 없고 입력 페이지를 그대로 내주므로 신뢰할 수 있는 내부망에서만 여세요. (--host 0.0.0.0)
+Azure 요청 한도는 워커마다 따로 적용되므로, 워커 수에 맞춰 AZURE_CHARS_PER_MINUTE 등을 나눠 설정하세요.
+
+사용법:
+    python distributed.py coordinator --host 0.0.0.0
+    python distributed.py worker --coordinator http://coordinator-host:8810   # 원하는 머신에서 원하는 만큼
+    python distributed.py worker          # 코디네이터와 같은 머신이면 큐 파일을 직접 열어도 됨
+"""
+
+import os
+import json
+import time
+import shutil
+import socket
+import asyncio
+import sqlite3
+import argparse
+import tempfile
+import threading
+import dataclasses
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path, PurePosixPath
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+import main as app
+import page_source
+from page_source import PageRef
+from blocks import PageBlocks
+from rate_limiter import AzureRateLimiter
+from translation_memory import TranslationMemory
+from ocr_cache import OcrCache
+from ocr_pool import OcrProcessPool
+import instrumentation
+
+# 작업 큐(SQLite) 경로
+WORK_QUEUE_PATH = Path(os.getenv("WORK_QUEUE_PATH", app.CACHE_DIR / "work_queue.sqlite3"))
+# 임대 기간(초): 워커가 이 시간 안에 결과를 쓰거나 임대를 갱신하지 않으면 다른 워커에게 다시 나감
+LEASE_SECONDS = float(os.getenv("WORK_LEASE_SECONDS", 300))
+# 페이지당 최대 시도 횟수 (계속 실패하는 페이지는 'failed'로 두고 마지막 부분 결과(없으면 빈 결과)로 저장)
+MAX_ATTEMPTS = int(os.getenv("WORK_MAX_ATTEMPTS", 3))
+# 워커가 한 번에 임대하는 페이지 수
+WORKER_BATCH = int(os.getenv("WORK_BATCH_PAGES", 8))
+POLL_INTERVAL = 2.0 # 할 일이 없을 때 큐를 다시 확인하는 간격(초)
+# 코디네이터의 HTTP 임대 API 주소 (다른 머신의 워커가 접속하려면 0.0.0.0)
+COORDINATOR_HOST = os.getenv("WORK_COORDINATOR_HOST", "127.0.0.1")
+COORDINATOR_PORT = int(os.getenv("WORK_COORDINATOR_PORT", 8810))
+# 워커가 접속할 코디네이터 URL (비어 있으면 --queue의 큐 파일을 직접 엶)
+COORDINATOR_URL = os.getenv("WORK_COORDINATOR_URL", "")
+
+
+class WorkQueue:
+    """
+    SQLite 기반 페이지 임대 테이블입니다. 같은 머신의 여러 프로세스가 같은 파일을 동시에 열어도 됩니다.
+    페이지 상태: pending -> leased -> done (또는 실패 시 pending으로 복귀, MAX_ATTEMPTS 초과 시 failed)
+    워커는 lease / renew 등을 asyncio.to_thread로, 코디네이터의 HTTP API는 요청 스레드에서 부르므로
+    연결 하나를 잠금으로 보호해 스레드 사이에서 공유합니다.
+    """
+    lease_seconds = LEASE_SECONDS
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.location = str(self.db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # isolation_level=None: 트랜잭션을 직접 BEGIN IMMEDIATE로 열어 임대가 겹치지 않도록 함
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30.0, isolation_level=None,
+                                     check_same_thread=False)
+        # 롤백 저널: WAL은 공유 메모리(-shm 파일)로 잠금을 나누므로 잘못된 디스크에서는 조용히 깨질 수 있음
+        # (이전 버전이 WAL로 만든 큐 파일도 여기서 되돌림)
+        self._conn.execute("PRAGMA journal_mode=DELETE")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                page_id INTEGER PRIMARY KEY,
+                magazine_name TEXT NOT NULL,
+                zip_path TEXT NOT NULL,
+                member TEXT NOT NULL,
+                crc INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                fingerprint TEXT NOT NULL,
+                page_index INTEGER NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                lease_owner TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                info TEXT,
+                updated REAL NOT NULL,
+                UNIQUE (zip_path, member)
+            )
+        """)
+        # 이전 버전이 만든 큐 파일에는 페이지 추가 정보(info) 열이 없음
+        if 'info' not in {row[1] for row in self._conn.execute("PRAGMA table_info(pages)")}:
+            self._conn.execute("ALTER TABLE pages ADD COLUMN info TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_state ON pages (state, lease_expires)")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS magazines (
+                magazine_name TEXT PRIMARY KEY,
+                total_pages INTEGER NOT NULL,
+                saved INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+
+    def _transaction(self):
+        return _ImmediateTransaction(self._conn, self._lock)
+
+    # --- coordinator 측 ---
+    def enqueue(self, magazine_name: str, pages: List[PageRef]) -> int:
+        """
+        매거진 페이지들을 큐에 넣습니다. 이미 있는 페이지는 그대로 두고,
+        페이지 내용(지문)이 바뀐 경우에만 다시 pending으로 되돌립니다. Returns: 새로 처리할 페이지 수
+        """
+        now = time.time()
+        with self._transaction():
+            for index, page in enumerate(pages):
+                self._conn.execute("""
+                    INSERT INTO pages (magazine_name, zip_path, member, crc, size, fingerprint, page_index, updated)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (zip_path, member) DO UPDATE SET
+                        crc = excluded.crc, size = excluded.size, fingerprint = excluded.fingerprint,
+                        page_index = excluded.page_index, state = 'pending', lease_owner = NULL,
+                        lease_expires = NULL, attempts = 0, result = NULL, info = NULL, updated = excluded.updated
+                    WHERE pages.fingerprint != excluded.fingerprint
+                """, (magazine_name, str(page.zip_path), page.member, page.crc, page.size,
+                      page.fingerprint, index, now))
+            remaining = self._count_pending(magazine_name)
+            # 다시 처리할 페이지가 생기면 저장된 결과도 다시 만들어야 함
+            self._conn.execute("""
+                INSERT INTO magazines (magazine_name, total_pages) VALUES (?, ?)
+                ON CONFLICT (magazine_name) DO UPDATE SET total_pages = excluded.total_pages,
+                    saved = CASE WHEN ? > 0 THEN 0 ELSE magazines.saved END
+            """, (magazine_name, len(pages), remaining))
+            return remaining
+
+    def _count_pending(self, magazine_name: str) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM pages WHERE magazine_name = ? AND state IN ('pending', 'leased')",
+                (magazine_name,)).fetchone()[0]
+
+    def requeue_expired(self) -> int:
+        """임대 기간이 지난 페이지를 pending으로 되돌립니다. (죽은 워커) Returns: 되돌린 페이지 수"""
+        with self._transaction():
+            cursor = self._conn.execute("""
+                UPDATE pages SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                    lease_owner = NULL, lease_expires = NULL, updated = ?
+                WHERE state = 'leased' AND lease_expires < ?
+            """, (MAX_ATTEMPTS, time.time(), time.time()))
+            return cursor.rowcount
+
+    def finished_magazines(self) -> List[str]:
+        """모든 페이지가 끝났(done / failed)지만 아직 저장하지 않은 매거진 이름들"""
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT m.magazine_name FROM magazines m
+                WHERE m.saved = 0 AND NOT EXISTS (
+                    SELECT 1 FROM pages p WHERE p.magazine_name = m.magazine_name AND p.state IN ('pending', 'leased')
+                )
+            """).fetchall()
+        return [row[0] for row in rows]
+
+    def magazine_results(self, magazine_name: str) -> List[Tuple[PageRef, PageBlocks, Optional[dict]]]:
+        """
+        매거진의 (page, blocks, 페이지 추가 정보) 리스트 (페이지 순서).
+        실패한 페이지는 마지막 시도의 부분 결과 (번역 오류가 남은 블록 포함), 결과가 전혀 없으면 빈 블록
+        """
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT zip_path, member, crc, size, result, info FROM pages
+                WHERE magazine_name = ? ORDER BY page_index
+            """, (magazine_name,)).fetchall()
+        return [(PageRef(magazine_name, Path(zip_path), member, crc, size),
+                 PageBlocks.load(json.loads(result) if result else None),
+                 json.loads(info) if info else None)
+                for zip_path, member, crc, size, result, info in rows]
+
+    def page_ref(self, page_id: int) -> Optional[PageRef]:
+        """page_id의 PageRef (HTTP API가 페이지 이미지를 내줄 때 사용)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT magazine_name, zip_path, member, crc, size FROM pages WHERE page_id = ?",
+                (page_id,)).fetchone()
+        if row is None:
+            return None
+        magazine_name, zip_path, member, crc, size = row
+        return PageRef(magazine_name, Path(zip_path), member, crc, size)
+
+    def mark_saved(self, magazine_name: str):
+        with self._lock:
+            self._conn.execute("UPDATE magazines SET saved = 1 WHERE magazine_name = ?", (magazine_name,))
+
+    def progress(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*) FROM pages GROUP BY state").fetchall()
+        return {state: count for state, count in rows}
+
+    # --- worker 측 ---
+    def lease(self, worker_id: str, limit: int, lease_seconds: float = LEASE_SECONDS) -> List[Tuple[int, PageRef]]:
+        """pending 페이지(또는 임대 기간이 지난 페이지)를 최대 limit개 임대합니다."""
+        now = time.time()
+        with self._transaction():
+            rows = self._conn.execute("""
+                SELECT page_id, magazine_name, zip_path, member, crc, size FROM pages
+                WHERE (state = 'pending' OR (state = 'leased' AND lease_expires < ?)) AND attempts < ?
+                ORDER BY page_id LIMIT ?
+            """, (now, MAX_ATTEMPTS, limit)).fetchall()
+            self._conn.executemany("""
+                UPDATE pages SET state = 'leased', lease_owner = ?, lease_expires = ?,
+                    attempts = attempts + 1, updated = ?
+                WHERE page_id = ?
+            """, [(worker_id, now + lease_seconds, now, row[0]) for row in rows])
+        return [(page_id, PageRef(magazine_name, Path(zip_path), member, crc, size))
+                for page_id, magazine_name, zip_path, member, crc, size in rows]
+
+    def renew(self, worker_id: str, page_ids: List[int], lease_seconds: float = LEASE_SECONDS):
+        """처리 중인 페이지의 임대 기간을 연장합니다. (하트비트)"""
+        expires = time.time() + lease_seconds
+        with self._transaction():
+            self._conn.executemany(
+                "UPDATE pages SET lease_expires = ? WHERE page_id = ? AND state = 'leased' AND lease_owner = ?",
+                [(expires, page_id, worker_id) for page_id in page_ids])
+
+    def complete(self, worker_id: str, page_id: int, blocks: PageBlocks, info: Optional[dict] = None) -> bool:
+        """결과(와 페이지 추가 정보)를 씁니다. 임대를 이미 잃었으면(다른 워커가 가져감) False"""
+        with self._transaction():
+            cursor = self._conn.execute("""
+                UPDATE pages SET state = 'done', result = ?, info = ?, lease_owner = NULL, lease_expires = NULL,
+                    updated = ?
+                WHERE page_id = ? AND state = 'leased' AND lease_owner = ?
+            """, (_dump_json(blocks.to_columns()), _dump_json(info), time.time(), page_id, worker_id))
+            return cursor.rowcount == 1
+
+    def fail(self, worker_id: str, page_id: int, blocks: Optional[PageBlocks] = None, info: Optional[dict] = None):
+        """
+        처리에 실패한 페이지를 돌려놓습니다. (MAX_ATTEMPTS를 넘으면 failed)
+        blocks가 있으면(번역 오류가 남은 페이지) 부분 결과로 남겨, 끝내 실패하면 빈 결과 대신 이 결과로 저장합니다.
+        """
+        with self._transaction():
+            self._conn.execute("""
+                UPDATE pages SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                    result = COALESCE(?, result), info = COALESCE(?, info),
+                    lease_owner = NULL, lease_expires = NULL, updated = ?
+                WHERE page_id = ? AND state = 'leased' AND lease_owner = ?
+            """, (MAX_ATTEMPTS, _dump_json(blocks.to_columns()) if blocks is not None else None, _dump_json(info),
+                  time.time(), page_id, worker_id))
+
+    def has_work(self) -> bool:
+        """아직 끝나지 않은 페이지(pending / leased)가 있는지"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM pages WHERE state IN ('pending', 'leased') LIMIT 1").fetchone() is not None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class _ImmediateTransaction:
+    """
+    BEGIN IMMEDIATE ... COMMIT (예외 시 ROLLBACK). 쓰기 잠금을 먼저 잡아 두 워커가 같은 페이지를 임대하지 않음
+    (lock: 같은 연결을 쓰는 다른 스레드의 문장이 트랜잭션 중간에 끼어들지 않도록)
+    """
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.RLock):
+        self._conn = conn
+        self._lock = lock
+
+    def __enter__(self):
+        self._lock.acquire()
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            self._lock.release()
+            raise
+        return self._conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self._conn.execute("COMMIT" if exc_type is None else "ROLLBACK")
+        finally:
+            self._lock.release()
+        return False
+
+
+def _dump_json(value) -> Optional[str]:
+    return json.dumps(value, ensure_ascii=False) if value is not None else None
+
+
+def _page_to_json(page_id: int, page: PageRef) -> dict:
+    return {'page_id': page_id, 'magazine_name': page.magazine_name, 'zip_path': str(page.zip_path),
+            'member': page.member, 'crc': page.crc, 'size': page.size}
+
+
+class RemoteWorkQueue:
+    """
+    코디네이터의 HTTP 임대 API를 쓰는 작업 큐입니다. (WorkQueue의 워커 쪽 메서드와 같은 인터페이스)
+    임대한 페이지의 이미지는 코디네이터에서 받아 임시 폴더에 두고 PageRef.extracted_path로 가리키므로
+    워커 머신에는 입력 ZIP도 큐 파일도 없어도 됩니다.
+    워커가 asyncio.to_thread로 부르므로 동기 HTTP 클라이언트를 씁니다.
+    """
+
+    def __init__(self, url: str):
+        self.location = url.rstrip('/')
+        self.lease_seconds = LEASE_SECONDS # 첫 임대 응답에서 코디네이터 설정으로 바뀜
+        self._client = httpx.Client(base_url=self.location, timeout=60.0)
+        app.CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # 같은 머신의 다른 워커와 섞이지 않도록 워커마다 따로 만듦 (close 때 삭제)
+        self._spool_dir = Path(tempfile.mkdtemp(prefix="remote_pages_", dir=app.CACHE_DIR))
+        self._files: Dict[int, Path] = {}
+
+    def _post(self, path: str, payload: dict) -> dict:
+        response = self._client.post(path, json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    def _drop_file(self, page_id: int):
+        path = self._files.pop(page_id, None)
+        if path is not None:
+            path.unlink(missing_ok=True)
+
+    def lease(self, worker_id: str, limit: int) -> List[Tuple[int, PageRef]]:
+        """페이지를 임대하고 이미지를 받아 둡니다. (코디네이터에 접속할 수 없으면 빈 리스트)"""
+        try:
+            response = self._post("/lease", {'worker_id': worker_id, 'limit': limit})
+        except httpx.TransportError as e:
+            print(f"  ⚠️ [워커] 코디네이터({self.location})에 접속할 수 없습니다: {e}")
+            return []
+        self.lease_seconds = float(response.get('lease_seconds', self.lease_seconds))
+        leased = []
+        for row in response['pages']:
+            page_id = row.pop('page_id')
+            page = PageRef(row['magazine_name'], Path(row['zip_path']), row['member'], row['crc'], row['size'])
+            try:
+                image = self._client.get(f"/pages/{page_id}")
+                image.raise_for_status()
+            except httpx.HTTPError as e:
+                print(f"  🚨 [워커] 페이지 이미지를 받지 못했습니다: {page.name} ({e})")
+                self.fail(worker_id, page_id)
+                continue
+            path = self._spool_dir / f"{page_id}{PurePosixPath(page.member).suffix}"
+            path.write_bytes(image.content)
+            self._files[page_id] = path
+            leased.append((page_id, dataclasses.replace(page, extracted_path=path)))
+        return leased
+
+    def renew(self, worker_id: str, page_ids: List[int]):
+        self._post("/renew", {'worker_id': worker_id, 'page_ids': page_ids})
+
+    def complete(self, worker_id: str, page_id: int, blocks: PageBlocks, info: Optional[dict] = None) -> bool:
+        self._drop_file(page_id)
+        return self._post("/complete", {'worker_id': worker_id, 'page_id': page_id,
+                                        'blocks': blocks.to_columns(), 'info': info})['ok']
+
+    def fail(self, worker_id: str, page_id: int, blocks: Optional[PageBlocks] = None, info: Optional[dict] = None):
+        self._drop_file(page_id)
+        self._post("/fail", {'worker_id': worker_id, 'page_id': page_id,
+                             'blocks': blocks.to_columns() if blocks is not None else None, 'info': info})
+
+    def has_work(self) -> bool:
+        """코디네이터에 남은 일이 있는지 (코디네이터가 이미 끝나 접속할 수 없으면 False)"""
+        try:
+            response = self._client.get("/has_work")
+            response.raise_for_status()
+        except httpx.TransportError:
+            return False
+        return response.json()['has_work']
+
+    def close(self):
+        self._client.close()
+        shutil.rmtree(self._spool_dir, ignore_errors=True)
+
+
+# --- coordinator ---
+def _make_handler(queue: WorkQueue):
+    """코디네이터의 HTTP 임대 API (RemoteWorkQueue가 호출)"""
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass # 콘솔 로그 생략
+
+        def _send(self, status: int, data: bytes, content_type: str):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            try:
+                self.wfile.write(data)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def _send_json(self, status: int, payload):
+            self._send(status, json.dumps(payload, ensure_ascii=False).encode('utf-8'), 'application/json; charset=utf-8')
+
+        def _route(self):
+            return [part for part in urlparse(self.path).path.split('/') if part]
+
+        def do_GET(self):
+            parts = self._route()
+            if parts == ['has_work']:
+                self._send_json(200, {'has_work': queue.has_work()})
+            elif len(parts) == 2 and parts[0] == 'pages' and parts[1].isdigit():
+                page = queue.page_ref(int(parts[1]))
+                if page is None:
+                    self._send_json(404, {'error': f"페이지 {parts[1]}이(가) 없습니다."})
+                    return
+                try:
+                    data = page.read_bytes()
+                except (OSError, KeyError) as e:
+                    self._send_json(500, {'error': f"페이지를 읽지 못했습니다: {e}"})
+                    return
+                self._send(200, data, 'application/octet-stream')
+            else:
+                self._send_json(404, {'error': 'not found'})
+
+        def do_POST(self):
+            parts = self._route()
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                worker_id = str(body['worker_id'])
+                if parts == ['lease']:
+                    leased = queue.lease(worker_id, int(body.get('limit', WORKER_BATCH)))
+                    payload = {'pages': [_page_to_json(page_id, page) for page_id, page in leased],
+                               'lease_seconds': LEASE_SECONDS}
+                elif parts == ['renew']:
+                    queue.renew(worker_id, [int(page_id) for page_id in body['page_ids']])
+                    payload = {}
+                elif parts == ['complete']:
+                    payload = {'ok': queue.complete(worker_id, int(body['page_id']),
+                                                    PageBlocks.load(body['blocks']), body.get('info'))}
+                elif parts == ['fail']:
+                    blocks = body.get('blocks')
+                    queue.fail(worker_id, int(body['page_id']),
+                               PageBlocks.load(blocks) if blocks is not None else None, body.get('info'))
+                    payload = {}
+                else:
+                    self._send_json(404, {'error': 'not found'})
+                    return
+            except (KeyError, ValueError, TypeError, AttributeError) as e:
+                self._send_json(400, {'error': f"잘못된 요청: {e}"})
+                return
+            self._send_json(200, payload)
+
+    return Handler
+
+
+def run_coordinator(queue: WorkQueue, watch: bool = False,
+                    host: str = COORDINATOR_HOST, port: int = COORDINATOR_PORT):
+    """
+    페이지를 큐에 넣고, 매거진이 끝날 때마다 결과를 저장합니다.
+    그동안 다른 머신의 워커를 위해 HTTP 임대 API를 host:port에 엽니다. (port=0이면 열지 않음)
+    watch=False면 모든 매거진이 저장되면 종료합니다.
+    """
+    app.INPUT_DIR.mkdir(exist_ok=True)
+    app.OUTPUT_DIR.mkdir(exist_ok=True)
+
+    def _enqueue_inputs():
+        for zip_path in sorted(app.INPUT_DIR.glob("*.zip")):
+            try:
+                pages = list(page_source.iter_zip_pages(zip_path.resolve(), zip_path.stem))
+            except Exception as e:
+                print(f"  🚨 [오류] '{zip_path.name}' 처리 중 오류 발생: {e}")
+                continue
+            remaining = queue.enqueue(zip_path.stem, pages)
+            print(f"  -> '{zip_path.name}': {len(pages)}개 페이지 (처리할 페이지 {remaining}개)")
+
+    print(f"--- [코디네이터] 작업 큐: {queue.db_path} ---")
+    _enqueue_inputs()
+
+    server = None
+    if port:
+        server = ThreadingHTTPServer((host, port), _make_handler(queue))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"✅ [코디네이터] 임대 API: http://{host}:{server.server_address[1]} "
+              f"(워커: python distributed.py worker --coordinator http://<이 머신>:{server.server_address[1]})")
+    try:
+        _coordinate(queue, watch, _enqueue_inputs)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+    print("--- [코디네이터] 모든 매거진 저장 완료 ---")
+
+
+def _coordinate(queue: WorkQueue, watch: bool, enqueue_inputs: Callable[[], None]):
+    last_progress = None
+    while True:
+        expired = queue.requeue_expired()
+        if expired:
+            print(f"  ⏳ [코디네이터] 임대 기간이 지난 페이지 {expired}개를 다시 대기열에 넣었습니다.")
+
+        for magazine_name in queue.finished_magazines():
+            page_results = queue.magazine_results(magazine_name)
+            app.save_results({magazine_name: [page for page, _, _ in page_results]},
+                             [(page, blocks) for page, blocks, _ in page_results],
+                             {page: info for page, _, info in page_results if info is not None})
+            queue.mark_saved(magazine_name)
+
+        progress = queue.progress()
+        if progress != last_progress:
+            print(f"  [진행] {progress}")
+            last_progress = progress
+
+        if not queue.has_work() and not queue.finished_magazines():
+            if not watch:
+                break
+            enqueue_inputs() # watch 모드: 새로 들어온 ZIP 확인
+        time.sleep(POLL_INTERVAL)
+
+
+# --- worker ---
+async def run_worker(queue, worker_id: str, batch: int = WORKER_BATCH, exit_when_idle: bool = True):
+    """
+    큐(WorkQueue 또는 RemoteWorkQueue)에서 페이지를 임대해 OCR -> 번역 파이프라인으로 처리하고 결과를 씁니다.
+    큐 호출은 모두 이벤트 루프 밖(asyncio.to_thread)에서 합니다. (다른 프로세스의 쓰기 잠금 / HTTP 왕복을 기다리므로)
+    """
+    print(f"--- [워커 {worker_id}] 작업 큐: {queue.location} ---")
+    limiter = AzureRateLimiter.from_env()
+    memory = TranslationMemory(app.CACHE_DIR / "translation_memory.sqlite3")
+    ocr_cache = OcrCache(app.CACHE_DIR / "ocr_cache.sqlite3")
+    ocr_pool = OcrProcessPool(workers=app.OCR_WORKERS) if app.OCR_EXECUTION_MODE == "process" else None
+    processed = 0
+    try:
+        async with httpx.AsyncClient(timeout=30.0) as session:
+            while True:
+                leased = await asyncio.to_thread(queue.lease, worker_id, batch)
+                if not leased:
+                    if exit_when_idle and not await asyncio.to_thread(queue.has_work):
+                        break
+                    await asyncio.sleep(POLL_INTERVAL)
+                    continue
+
+                page_ids = {page: page_id for page_id, page in leased}
+                page_info = {}
+                finished = set() # 결과를 쓴 페이지
+                returned = set() # 부분 결과와 함께 돌려놓은 페이지
+                writes = []
+
+                async def _write_back(page: PageRef, blocks: PageBlocks, info: Optional[dict]):
+                    if app._is_page_complete(blocks):
+                        if await asyncio.to_thread(queue.complete, worker_id, page_ids[page], blocks, info):
+                            finished.add(page)
+                    else:
+                        # 번역 오류가 남은 페이지: 부분 결과를 남기고 돌려놓아 다시 시도 (끝내 실패하면 이 결과로 저장)
+                        await asyncio.to_thread(queue.fail, worker_id, page_ids[page], blocks, info)
+                        returned.add(page)
+
+                def _on_page_done(page: PageRef, blocks: PageBlocks):
+                    writes.append(asyncio.ensure_future(_write_back(page, blocks, page_info.pop(page, None))))
+
+                async def _heartbeat():
+                    while True:
+                        await asyncio.sleep(queue.lease_seconds / 3)
+                        await asyncio.to_thread(queue.renew, worker_id,
+                                                [page_ids[p] for p in page_ids if p not in finished | returned])
+
+                heartbeat = asyncio.create_task(_heartbeat())
+                try:
+                    await app.run_ocr_translate_pipeline(session, list(page_ids), limiter, memory, ocr_pool,
+                                                         ocr_cache, on_page_done=_on_page_done,
+                                                         collect_results=False, page_info=page_info)
+                finally:
+                    heartbeat.cancel()
+                    for result in await asyncio.gather(*writes, return_exceptions=True):
+                        if isinstance(result, Exception):
+                            print(f"  🚨 [워커 {worker_id}] 결과를 쓰지 못했습니다: {result}")
+                    # OCR 실패 / 결과를 쓰지 못한 페이지는 돌려놓아 다시 시도
+                    def _return_unfinished():
+                        for page, page_id in page_ids.items():
+                            if page not in finished | returned:
+                                queue.fail(worker_id, page_id)
+                    await asyncio.to_thread(_return_unfinished)
+                processed += len(finished)
+    finally:
+        if ocr_pool is not None:
+            ocr_pool.shutdown()
+        memory.close()
+        ocr_cache.close()
+    print(f"--- [워커 {worker_id}] 종료: {processed}개 페이지 처리 ---")
+    instrumentation.recorder.print_report()
+    if instrumentation.TRACE_FILE:
+        # 워커가 여러 개면 같은 파일을 덮어쓰지 않도록 워커 ID를 붙임
+        trace_path = Path(instrumentation.TRACE_FILE)
+        instrumentation.recorder.write_chrome_trace(trace_path.with_name(f"{trace_path.stem}.{worker_id}{trace_path.suffix}"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="분산 모드 (coordinator / worker)")
+    parser.add_argument("role", choices=["coordinator", "worker"])
+    parser.add_argument("--queue", type=Path, default=WORK_QUEUE_PATH, help="작업 큐 SQLite 파일 경로")
+    parser.add_argument("--coordinator", default=COORDINATOR_URL,
+                        help="worker: 코디네이터 임대 API URL (예: http://coordinator-host:8810, 없으면 --queue 파일을 직접 엶)")
+    parser.add_argument("--host", default=COORDINATOR_HOST,
+                        help="coordinator: 임대 API를 열 주소 (다른 머신의 워커를 받으려면 0.0.0.0)")
+    parser.add_argument("--port", type=int, default=COORDINATOR_PORT, help="coordinator: 임대 API 포트 (0 = 열지 않음)")
+    parser.add_argument("--worker-id", default=None, help="워커 이름 (기본: 호스트명-PID)")
+    parser.add_argument("--batch", type=int, default=WORKER_BATCH, help="워커가 한 번에 임대하는 페이지 수")
+    parser.add_argument("--watch", action="store_true",
+                        help="coordinator: 끝나도 종료하지 않고 새 ZIP을 계속 확인 / worker: 큐가 비어도 대기")
+    args = parser.parse_args()
+
+    if args.role == "worker" and args.coordinator:
+        queue = RemoteWorkQueue(args.coordinator)
+    else:
+        queue = WorkQueue(args.queue)
+    try:
+        if args.role == "coordinator":
+            run_coordinator(queue, watch=args.watch, host=args.host, port=args.port)
+        else:
+            worker_id = args.worker_id or f"{socket.gethostname()}-{os.getpid()}"
+            asyncio.run(run_worker(queue, worker_id, args.batch, exit_when_idle=not args.watch))
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# fake_azure_server.py
+"""
+로컬 가짜 Azure Translator 서버입니다. (테스트 / 벤치마크용)
+실제 API처럼 초당 요청 수와 분당 문자 수 한도를 적용하고, 넘으면 429 + Retry-After를 돌려줍니다.
+번역 결과는 '[ko] 원문' 형태의 에코입니다.
+
+장애 주입 (재시도 / 헤징 / 서킷 브레이커 확인용):
+- error_rate: 이 확률로 503을 돌려줌
+- slow_rate / slow_latency: 이 확률로 응답을 slow_latency초 늦춤 (꼬리 지연)
+실행 중에도 state의 값을 바꾸면 바로 적용됩니다. (예: state.error_rate = 1.0 으로 장애 시작)
+
+사용법:
+    python fake_azure_server.py --port 8765 --rps 5 --cpm 20000
+    python fake_azure_server.py --error-rate 0.2 --slow-rate 0.05 --slow-latency 10
+    (.env) AZURE_TRANSLATOR_ENDPOINT=http://127.0.0.1:8765
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class FakeAzureState:
+    """한도 설정과 슬라이딩 윈도우 카운터, 호출 통계를 보관합니다."""
+
+    def __init__(self, requests_per_second: float = 0, chars_per_minute: int = 0,
+                 latency: float = 0.0, latency_jitter: float = 0.0,
+                 error_rate: float = 0.0, slow_rate: float = 0.0, slow_latency: float = 0.0):
+        self.requests_per_second = requests_per_second # 0이면 제한 없음
+        self.chars_per_minute = chars_per_minute       # 0이면 제한 없음
+        self.latency = latency                         # 성공 응답 전 기본 지연(초)
+        self.latency_jitter = latency_jitter           # 추가 지연의 최대값(초, 균등 분포)
+        self.error_rate = error_rate                   # 503 응답 확률
+        self.slow_rate = slow_rate                     # 꼬리 지연 확률
+        self.slow_latency = slow_latency               # 꼬리 지연 시간(초)
+        self.lock = threading.Lock()
+        self.request_times = deque()
+        self.char_log = deque() # (시각, 문자 수)
+
+        self.total_requests = 0
+        self.total_throttled = 0
+        self.total_elements = 0
+        self.total_chars = 0
+        self.total_errors = 0
+        self.total_slow = 0
+
+    def admit(self, n_chars: int):
+        """요청을 받아들일 수 있으면 None, 한도 초과면 Retry-After(초)를 반환합니다."""
+        now = time.monotonic()
+        with self.lock:
+            while self.request_times and now - self.request_times[0] >= 1.0:
+                self.request_times.popleft()
+            while self.char_log and now - self.char_log[0][0] >= 60.0:
+                self.char_log.popleft()
+
+            if self.requests_per_second and len(self.request_times) >= self.requests_per_second:
+                self.total_throttled += 1
+                return max(0.1, 1.0 - (now - self.request_times[0]))
+            used_chars = sum(n for _, n in self.char_log)
+            if self.chars_per_minute and used_chars + n_chars > self.chars_per_minute:
+                self.total_throttled += 1
+                return max(0.1, 60.0 - (now - self.char_log[0][0])) if self.char_log else 1.0
+
+            self.request_times.append(now)
+            self.char_log.append((now, n_chars))
+            self.total_requests += 1
+            self.total_chars += n_chars
+            return None
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                'requests': self.total_requests,
+                'throttled': self.total_throttled,
+                'elements': self.total_elements,
+                'chars': self.total_chars,
+                'errors': self.total_errors,
+                'slow': self.total_slow,
+            }
+
+
+def _make_handler(state: FakeAzureState):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass # 콘솔 로그 생략
+
+        def _send_json(self, status: int, payload, headers=None):
+            data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            try:
+                self.wfile.write(data)
+            except (BrokenPipeError, ConnectionResetError):
+                pass # 클라이언트가 먼저 끊음 (타임아웃 / 헤징으로 취소된 요청)
+
+        def do_GET(self):
+            if self.path.startswith('/languages'):
+                self._send_json(200, {'translation': {'ja': {}, 'ko': {}}})
+            elif self.path.startswith('/stats'):
+                self._send_json(200, state.stats())
+            else:
+                self._send_json(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if not self.path.startswith('/translate'):
+                self._send_json(404, {'error': 'not found'})
+                return
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length) or b'[]')
+            n_chars = sum(len(item.get('text', '')) for item in body)
+
+            if len(body) > 1000 or n_chars > 50000:
+                self._send_json(400, {'error': {'code': 400050, 'message': 'request too large'}})
+                return
+
+            if state.error_rate and random.random() < state.error_rate:
+                with state.lock:
+                    state.total_errors += 1
+                self._send_json(503, {'error': {'code': 503000, 'message': 'service unavailable (injected)'}})
+                return
+
+            retry_after = state.admit(n_chars)
+            if retry_after is not None:
+                self._send_json(429, {'error': {'code': 429000, 'message': 'too many requests'}},
+                                headers={'Retry-After': f"{retry_after:.2f}"})
+                return
+
+            with state.lock:
+                state.total_elements += len(body)
+            delay = state.latency + random.uniform(0, state.latency_jitter)
+            if state.slow_rate and random.random() < state.slow_rate:
+                with state.lock:
+                    state.total_slow += 1
+                delay += state.slow_latency
+            if delay:
+                time.sleep(delay)
+            self._send_json(200, [
+                {'translations': [{'text': f"[ko] {item.get('text', '')}", 'to': 'ko'}]}
+                for item in body
+            ])
+
+    return Handler
+
+
+def start_in_background(port: int = 0, **limits):
+    """서버를 백그라운드 스레드로 띄우고 (server, state, base_url)을 반환합니다. 종료는 server.shutdown()."""
+    state = FakeAzureState(**limits)
+    server = ThreadingHTTPServer(('127.0.0.1', port), _make_handler(state))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    return server, state, base_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 가짜 Azure Translator 서버")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rps', type=float, default=0, help="초당 최대 요청 수 (0 = 무제한)")
+    parser.add_argument('--cpm', type=int, default=0, help="분당 최대 문자 수 (0 = 무제한)")
+    parser.add_argument('--latency', type=float, default=0.0, help="응답 기본 지연 (초)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="응답 추가 지연 최대값 (초)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="503 응답 확률 (장애 주입)")
+    parser.add_argument('--slow-rate', type=float, default=0.0, help="꼬리 지연 확률 (장애 주입)")
+    parser.add_argument('--slow-latency', type=float, default=5.0, help="꼬리 지연 시간 (초)")
+    args = parser.parse_args()
+
+    state = FakeAzureState(requests_per_second=args.rps, chars_per_minute=args.cpm,
+                           latency=args.latency, latency_jitter=args.jitter,
+                           error_rate=args.error_rate, slow_rate=args.slow_rate, slow_latency=args.slow_latency)
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), _make_handler(state))
+    print(f"✅ [Fake Azure] http://127.0.0.1:{args.port} 에서 대기 중 "
+          f"(rps={args.rps}, cpm={args.cpm}, latency={args.latency}+{args.jitter}, "
+          f"error_rate={args.error_rate}, slow_rate={args.slow_rate})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"--- 통계: {state.stats()} ---")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+# ingestion.py
+"""
+입력 ZIP 열거와 페이지 이미지 선읽기(prefetch)입니다.
+
+1. list_zip_pages: 여러 ZIP의 목록 읽기(extract 모드면 압축 해제까지)를 스레드 풀에서 동시에 합니다.
+2. Prefetcher: OCR보다 앞서 페이지 바이트를 읽고 디코딩(cv2.imdecode는 GIL을 놓으므로 스레드로 충분)해
+   크기(MB) 제한이 있는 버퍼에 넣어 둡니다. OCR 워커는 take(page)로 꺼내 쓰기만 하므로
+   I/O / 디코딩을 기다리지 않고, 버퍼가 가득 차면 선읽기가 멈추므로 큰 매거진에서도 메모리가 일정합니다.
+   add()로 실행 중에 페이지를 더 붙일 수 있어, 상주 서비스는 선읽기 하나를 작업이 바뀌어도 계속 씁니다.
+   probe를 넘기면 읽은 바이트로 먼저 확인(예: OCR 캐시 조회)해 OCR이 필요 없는 페이지는 디코딩하지 않습니다.
+   budget(scheduler.MemoryScheduler)을 넘기면 버퍼에 넣은 페이지의 바이트를 OCR 메모리 예산에도 겁니다.
+
+페이지는 파이프라인에 들어가는 순서대로 읽습니다. (OCR 워커가 꺼내는 순서와 거의 같음)
+"""
+
+import os
+import asyncio
+import zipfile
+import threading
+import dataclasses
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+import instrumentation
+import page_source
+from page_source import PageRef
+
+load_dotenv()
+
+# ZIP 열거 / 페이지 읽기+디코딩에 쓰는 스레드 수
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", 4))
+# 선읽기 버퍼 최대 크기 (MB, 인코딩 바이트 + 디코딩된 이미지)
+PREFETCH_MB = int(os.getenv("PREFETCH_MB", 512))
+
+
+# --- 1. ZIP 열거 ---
+def _list_one_zip(zip_path: Path, extract_dir: Optional[Path]) -> List[PageRef]:
+    pages = list(page_source.iter_zip_pages(zip_path, zip_path.stem)) # 페이지 순서 정렬됨
+    if extract_dir is None:
+        return pages
+    target_dir = extract_dir / zip_path.stem
+    target_dir.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        zip_ref.extractall(target_dir)
+    return [dataclasses.replace(page, extracted_path=target_dir / page.member) for page in pages]
+
+
+def list_zip_pages(zip_files: List[Path], extract_dir: Optional[Path] = None,
+                   workers: int = INGEST_WORKERS) -> List[Tuple[Path, object]]:
+    """
+    ZIP들의 페이지 목록을 동시에 읽습니다. extract_dir이 있으면 그 아래 매거진별 폴더에 압축도 풉니다.
+    Returns: 입력 순서대로 [(zip_path, PageRef 리스트 또는 발생한 예외), ...]
+    """
+    def _safe(zip_path):
+        try:
+            return _list_one_zip(zip_path, extract_dir)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        return list(zip(zip_files, executor.map(_safe, zip_files)))
+
+
+# --- 2. 페이지 선읽기 ---
+@dataclass
+class LoadedPage:
+    page: PageRef
+    image_bytes: bytes
+    image: Optional[np.ndarray] = None # 디코딩된 BGR 이미지 (decode=False거나 probe가 디코딩 불필요로 판단하면 None)
+    error: Optional[Exception] = None
+    probed: Any = None # probe가 돌려준 값 (예: OCR 캐시 키, 다시 계산하지 않도록)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.image_bytes) + (self.image.nbytes if self.image is not None else 0)
+
+
+class _ZipReaders:
+    """스레드마다 ZIP 핸들을 열어 두고 재사용합니다. (페이지마다 중앙 디렉터리를 다시 읽지 않도록)"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all: List[zipfile.ZipFile] = []
+
+    def _zip(self, page: PageRef) -> zipfile.ZipFile:
+        handles = getattr(self._local, 'handles', None)
+        if handles is None:
+            handles = self._local.handles = {}
+        zip_ref = handles.get(page.zip_path)
+        if zip_ref is None:
+            zip_ref = handles[page.zip_path] = zipfile.ZipFile(page.zip_path, 'r')
+            with self._lock:
+                self._all.append(zip_ref)
+        return zip_ref
+
+    def read(self, page: PageRef) -> bytes:
+        if page.extracted_path is not None:
+            return page.extracted_path.read_bytes()
+        return self._zip(page).read(page.member)
+
+    def open(self, page: PageRef):
+        """페이지를 파일 객체로 엽니다. (앞부분만 읽을 때: 이미지 헤더 등)"""
+        if page.extracted_path is not None:
+            return open(page.extracted_path, 'rb')
+        return self._zip(page).open(page.member)
+
+    def close(self):
+        with self._lock:
+            for zip_ref in self._all:
+                zip_ref.close()
+            self._all.clear()
+
+
+class Prefetcher:
+    """
+    페이지들을 순서대로 미리 읽어(디코딩까지) 크기 제한 버퍼에 넣어 둡니다.
+    사용 예:
+        async with Prefetcher(pages) as prefetcher:
+            loaded = await prefetcher.take(page)   # LoadedPage (읽기/디코딩 오류는 여기서 예외로 전달)
+            await prefetcher.add(more_pages)       # 실행 중에 읽을 페이지를 뒤에 붙임 (service.py)
+    버퍼가 max_bytes를 넘으면 take()로 꺼낼 때까지 선읽기를 멈춥니다. (항상 최소 1장은 허용)
+    이미 읽는 중인 페이지(최대 workers장)만큼은 max_bytes를 넘을 수 있습니다.
+    목록에 없는 페이지를 take()하면 바로 읽어서 돌려줍니다.
+    probe(page, image_bytes) -> (probed, needs_decode)는 읽기 스레드에서 디코딩 전에 호출됩니다.
+    needs_decode=False면 디코딩을 건너뛰고, probed는 LoadedPage.probed로 전달됩니다.
+    budget이 있으면 읽은 페이지의 바이트를 budget.hold()로 예산에 겁니다. take()로 꺼낸 페이지의 몫은 호출자에게
+    넘어가므로 호출자가 budget.admit(held=...)이나 budget.release()로 돌려줘야 합니다. (main.ocr_pages)
+    """
+
+    def __init__(self, pages: List[PageRef], max_bytes: int = PREFETCH_MB * 1024 * 1024,
+                 workers: int = INGEST_WORKERS, decode: bool = True,
+                 probe: Optional[Callable[[PageRef, bytes], Tuple[Any, bool]]] = None, budget=None):
+        self.max_bytes = max_bytes
+        self.workers = max(1, workers)
+        self.decode = decode
+        self.probe = probe
+        self.budget = budget
+        self._pending = deque(pages) # 아직 읽기 시작하지 않은 페이지 (순서대로)
+        self._expected = set(self._pending)
+        self._ready: Dict[PageRef, LoadedPage] = {}
+        self._buffered_bytes = 0
+        self._cond = asyncio.Condition()
+        self._readers = _ZipReaders()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="prefetch")
+        self._producer: Optional[asyncio.Task] = None
+        self._loads = set() # 읽는 중인 페이지의 태스크
+        self.peak_bytes = 0 # 통계 (실행 후 리포트용)
+        self.skipped_decodes = 0 # probe 결과로 디코딩을 건너뛴 페이지 수
+
+    def _load_sync(self, page: PageRef) -> LoadedPage:
+        try:
+            with instrumentation.span("ingest.read"):
+                image_bytes = self._readers.read(page)
+            probed, needs_decode = self.probe(page, image_bytes) if self.probe is not None else (None, True)
+            image = None
+            if self.decode and needs_decode:
+                import ocr_processor
+                image = ocr_processor.decode_image(image_bytes)
+            return LoadedPage(page, image_bytes, image, probed=probed)
+        except Exception as e:
+            return LoadedPage(page, b"", None, e)
+
+    async def _load(self, page: PageRef, slots: asyncio.Semaphore):
+        try:
+            loaded = await asyncio.get_running_loop().run_in_executor(self._executor, self._load_sync, page)
+        finally:
+            slots.release()
+        async with self._cond:
+            if self.decode and loaded.image is None and loaded.error is None:
+                self.skipped_decodes += 1 # probe가 디코딩 불필요로 판단 (이벤트 루프에서만 셈)
+            self._ready[page] = loaded
+            self._buffered_bytes += loaded.nbytes
+            if self.budget is not None:
+                self.budget.hold(loaded.nbytes)
+            self.peak_bytes = max(self.peak_bytes, self._buffered_bytes)
+            self._cond.notify_all()
+
+    async def _produce(self):
+        """close()될 때까지 페이지가 들어오는 대로 읽습니다. (add()로 붙인 페이지 포함)"""
+        slots = asyncio.Semaphore(self.workers) # 동시에 읽는 페이지 수
+        while True:
+            async with self._cond:
+                await self._cond.wait_for(
+                    lambda: self._pending and (self._buffered_bytes < self.max_bytes or not self._ready))
+                page = self._pending.popleft()
+            await slots.acquire()
+            load = asyncio.ensure_future(self._load(page, slots))
+            self._loads.add(load)
+            load.add_done_callback(self._loads.discard)
+
+    async def add(self, pages: List[PageRef]):
+        """읽을 페이지를 뒤에 붙입니다. (실행 중에도 가능)"""
+        async with self._cond:
+            self._pending.extend(pages)
+            self._expected.update(pages)
+            self._cond.notify_all()
+
+    async def start(self):
+        if self._producer is None:
+            self._producer = asyncio.ensure_future(self._produce())
+
+    async def take(self, page: PageRef) -> LoadedPage:
+        """page의 LoadedPage를 꺼냅니다. (아직 읽는 중이면 기다림) 읽기/디코딩 오류는 예외로 전달합니다."""
+        if page not in self._expected:
+            loaded = await asyncio.get_running_loop().run_in_executor(self._executor, self._load_sync, page)
+            if self.budget is not None:
+                self.budget.hold(loaded.nbytes) # 버퍼에서 꺼낸 페이지와 똑같이 호출자에게 넘김
+        else:
+            self._expected.discard(page)
+            started = asyncio.get_running_loop().time()
+            async with self._cond:
+                await self._cond.wait_for(lambda: page in self._ready)
+                loaded = self._ready.pop(page)
+                self._buffered_bytes -= loaded.nbytes
+                self._cond.notify_all()
+            instrumentation.observe("ingest.wait", asyncio.get_running_loop().time() - started)
+        if loaded.error is not None:
+            raise loaded.error
+        return loaded
+
+    async def close(self):
+        tasks = ([self._producer] if self._producer is not None else []) + list(self._loads)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._executor.shutdown(wait=True)
+        self._readers.close()
+        if self.budget is not None:
+            await self.budget.release(sum(loaded.nbytes for loaded in self._ready.values()))
+        self._ready.clear()
+        self._pending.clear()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
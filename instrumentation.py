@@ -0,0 +1,144 @@
+# instrumentation.py
+"""
+가벼운 타이밍 계측 (span / 카운터) 과 실행 후 성능 리포트입니다.
+
+    with instrumentation.span("ocr.detect", pages=4):
+        ...
+    instrumentation.count("translate.chars_sent", 1234)
+    instrumentation.observe("translate.wait.concurrency", waited_seconds)   # 직접 잰 시간
+
+실행이 끝나면 recorder.print_report()가 span별 횟수 / 합계 / p50 / p95 / p99와 카운터(초당 처리량 포함)를 출력합니다.
+TRACE_FILE을 지정하면 모든 span을 Chrome trace 형식(JSON)으로 저장합니다. (chrome://tracing 또는 Perfetto에서 열기)
+스레드에서 실행되는 OCR 등도 기록할 수 있도록 스레드 안전하게 구현되어 있습니다.
+워커 프로세스(ocr_pool) 안의 span은 부모 프로세스로 모이지 않습니다. (부모 쪽에서 풀 호출 전체를 잼)
+"""
+
+import os
+import json
+import time
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Chrome trace 저장 경로 (비어 있으면 trace 이벤트를 모으지 않음)
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+
+
+def percentile(values: List[float], q: float) -> float:
+    """q번째 백분위수 (선형 보간). 값이 없으면 0.0"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class Recorder:
+    """span 소요 시간과 카운터를 모읍니다. 프로세스마다 하나(recorder)를 공유합니다."""
+
+    def __init__(self, trace: bool = False):
+        self.trace = trace
+        self._lock = threading.Lock()
+        self._durations: Dict[str, List[float]] = defaultdict(list)
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._events: List[dict] = []
+        self._origin = time.perf_counter()
+
+    def reset(self, trace: Optional[bool] = None):
+        with self._lock:
+            if trace is not None:
+                self.trace = trace
+            self._durations.clear()
+            self._counters.clear()
+            self._events.clear()
+            self._origin = time.perf_counter()
+
+    @contextmanager
+    def span(self, name: str, **args):
+        """with 블록의 소요 시간을 name으로 기록합니다. (async 함수 안에서 await를 감싸도 됨: 벽시계 시간)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, started, time.perf_counter() - started, args)
+
+    def observe(self, name: str, seconds: float, **args):
+        """이미 잰 소요 시간을 기록합니다. (끝난 시점 = 지금)"""
+        self._record(name, time.perf_counter() - seconds, seconds, args)
+
+    def _record(self, name: str, started: float, elapsed: float, args: dict):
+        with self._lock:
+            self._durations[name].append(elapsed)
+            if self.trace:
+                self._events.append({
+                    'name': name,
+                    'cat': name.split('.', 1)[0],
+                    'ph': 'X',
+                    'ts': (started - self._origin) * 1e6,
+                    'dur': elapsed * 1e6,
+                    'pid': os.getpid(),
+                    'tid': threading.get_ident(),
+                    'args': args,
+                })
+
+    def count(self, name: str, amount: float = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+    # --- 리포트 ---
+    def report(self, elapsed: Optional[float] = None) -> dict:
+        elapsed = elapsed if elapsed is not None else time.perf_counter() - self._origin
+        with self._lock:
+            durations = {name: list(values) for name, values in self._durations.items()}
+            counters = dict(self._counters)
+        return {
+            'elapsed': elapsed,
+            'spans': {
+                name: {
+                    'count': len(values),
+                    'total': sum(values),
+                    'p50': percentile(values, 50),
+                    'p95': percentile(values, 95),
+                    'p99': percentile(values, 99),
+                }
+                for name, values in sorted(durations.items())
+            },
+            'counters': {
+                name: {'total': value, 'per_sec': value / elapsed if elapsed > 0 else 0.0}
+                for name, value in sorted(counters.items())
+            },
+        }
+
+    def print_report(self, elapsed: Optional[float] = None):
+        report = self.report(elapsed)
+        print(f"\n--- 성능 리포트 (총 {report['elapsed']:.1f}초) ---")
+        if report['spans']:
+            print(f"  {'구간':<28} {'횟수':>6} {'합계(초)':>9} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9}")
+            for name, s in report['spans'].items():
+                print(f"  {name:<28} {s['count']:>6} {s['total']:>9.2f} "
+                      f"{s['p50'] * 1000:>9.1f} {s['p95'] * 1000:>9.1f} {s['p99'] * 1000:>9.1f}")
+        for name, c in report['counters'].items():
+            print(f"  [카운터] {name}: {c['total']:g} ({c['per_sec']:.2f}/초)")
+
+    def write_chrome_trace(self, path) -> int:
+        """모은 span을 Chrome trace JSON으로 저장하고 이벤트 수를 반환합니다."""
+        with self._lock:
+            events = list(self._events)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+        return len(events)
+
+
+recorder = Recorder(trace=bool(TRACE_FILE))
+
+# 모듈 함수로 바로 쓰기 위한 별칭
+span = recorder.span
+observe = recorder.observe
+count = recorder.count
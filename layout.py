@@ -0,0 +1,299 @@
+# layout.py
+"""
+줄 단위 OCR 결과를 문단으로 묶는 레이아웃 엔진입니다.
+
+기존 방식(y로 정렬 후 바로 앞 줄과만 비교)은 여러 단(column)으로 된 잡지 페이지에서
+서로 다른 단의 줄이 번갈아 섞여 거대한 문단이 만들어졌습니다. 여기서는:
+1. 상자를 NumPy 배열(x0, y0, x1, y1)로 다루고, 격자 공간 색인(GridIndex)으로 주변 줄만 후보로 찾습니다.
+   (모든 줄 쌍을 비교하지 않으므로 줄 수천 개짜리 페이지도 거의 선형 시간)
+2. 세로쓰기(tategaki) 줄은 세로로 긴 상자로 판별해 가로쓰기와 따로 묶습니다.
+   가로쓰기: 같은 단(가로로 겹침) 안에서 아래 줄로 이어짐 / 세로쓰기: 같은 행(세로로 겹침) 안에서 왼쪽 줄로 이어짐
+3. 같은 줄이 조각으로 나뉘어 검출된 경우 먼저 한 줄로 합칩니다.
+4. 문단은 읽는 순서로 정렬합니다. (여러 단에 걸친 제목 -> 단별 위에서 아래로 / 세로쓰기는 오른쪽에서 왼쪽으로)
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+VERTICAL_ASPECT_RATIO = 1.5 # 세로 길이가 가로의 이 배수 이상이면 세로쓰기 줄로 봄
+MIN_AXIS_OVERLAP = 0.5      # 같은 단/행으로 볼 최소 겹침 비율 (좁은 쪽 길이 대비)
+MAX_SIZE_RATIO = 1.8        # 글자 크기가 이 배수 이상 차이 나면 다른 문단 (제목과 본문 분리)
+MAX_FRAGMENT_GAP_RATIO = 0.6 # 같은 줄 조각 사이 허용 간격 (글자 크기 대비, 단 사이 여백보다 작게)
+FULL_WIDTH_RATIO = 0.6      # 페이지 글자 영역 폭의 이 비율 이상인 가로쓰기 문단은 여러 단에 걸친 블록으로 봄
+
+
+class GridIndex:
+    """
+    상자들을 고정 크기 격자 칸에 등록해 두고, 주어진 영역과 겹칠 수 있는 상자 번호만 돌려줍니다.
+    칸 크기를 줄 높이의 몇 배로 잡으면 한 칸에 들어가는 상자 수가 페이지 크기와 무관하게 작게 유지됩니다.
+    """
+
+    def __init__(self, x0: np.ndarray, y0: np.ndarray, x1: np.ndarray, y1: np.ndarray, cell_size: float):
+        self.cell_size = max(1.0, float(cell_size))
+        self._cells: Dict[tuple, List[int]] = {}
+        cx0, cy0 = self._cell(x0), self._cell(y0)
+        cx1, cy1 = self._cell(x1), self._cell(y1)
+        for i in range(len(x0)):
+            for cx in range(cx0[i], cx1[i] + 1):
+                for cy in range(cy0[i], cy1[i] + 1):
+                    self._cells.setdefault((cx, cy), []).append(i)
+
+    def _cell(self, value):
+        return np.floor_divide(value, self.cell_size).astype(np.int64)
+
+    def query(self, x0: float, y0: float, x1: float, y1: float) -> List[int]:
+        found = set()
+        cx0, cy0 = int(x0 // self.cell_size), int(y0 // self.cell_size)
+        cx1, cy1 = int(x1 // self.cell_size), int(y1 // self.cell_size)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                found.update(self._cells.get((cx, cy), ()))
+        return sorted(found)
+
+
+def _join_texts(texts: Sequence[str]) -> str:
+    """일본어는 그대로 이어 붙이고, 영문/숫자끼리 맞닿는 곳에만 공백을 넣습니다."""
+    joined = ""
+    for text in texts:
+        if joined and text and joined[-1].isascii() and joined[-1].isalnum() \
+                and text[0].isascii() and text[0].isalnum():
+            joined += " "
+        joined += text
+    return joined
+
+
+def _overlap(a0, a1, b0, b1):
+    return np.minimum(a1, b1) - np.maximum(a0, b0)
+
+
+def _candidate_pairs(index: GridIndex, regions: np.ndarray):
+    """regions[i] 영역과 겹치는 상자 j를 찾아 (i, j) 배열로 돌려줍니다. (i == j 제외)"""
+    src, dst = [], []
+    for i, (rx0, ry0, rx1, ry1) in enumerate(regions.tolist()):
+        for j in index.query(rx0, ry0, rx1, ry1):
+            if j != i:
+                src.append(i)
+                dst.append(j)
+    return np.array(src, dtype=np.int64), np.array(dst, dtype=np.int64)
+
+
+def _union_find_labels(n: int, src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    parent = np.arange(n)
+
+    def _find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for a, b in zip(src.tolist(), dst.tolist()):
+        ra, rb = _find(a), _find(b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+    return np.array([_find(i) for i in range(n)], dtype=np.int64)
+
+
+def _group_bounds(labels: np.ndarray, x0, y0, x1, y1):
+    """labels별 경계 상자 (label은 0..G-1)"""
+    n_groups = int(labels.max()) + 1 if len(labels) else 0
+    gx0 = np.full(n_groups, np.iinfo(np.int64).max)
+    gy0 = np.full(n_groups, np.iinfo(np.int64).max)
+    gx1 = np.full(n_groups, np.iinfo(np.int64).min)
+    gy1 = np.full(n_groups, np.iinfo(np.int64).min)
+    np.minimum.at(gx0, labels, x0)
+    np.minimum.at(gy0, labels, y0)
+    np.maximum.at(gx1, labels, x1)
+    np.maximum.at(gy1, labels, y1)
+    return gx0, gy0, gx1, gy1
+
+
+class _Boxes:
+    """(N, 4) [x, y, w, h] 상자를 좌표 배열과 방향/글자 크기로 풀어 둔 것"""
+
+    def __init__(self, x0, y0, x1, y1, vertical=None):
+        self.x0, self.y0, self.x1, self.y1 = x0, y0, x1, y1
+        w = np.maximum(x1 - x0, 1)
+        h = np.maximum(y1 - y0, 1)
+        self.vertical = (h >= w * VERTICAL_ASPECT_RATIO) if vertical is None else vertical
+        self.size = np.where(self.vertical, w, h) # 글자 크기: 가로쓰기는 줄 높이, 세로쓰기는 줄 폭
+
+    @classmethod
+    def from_xywh(cls, boxes: np.ndarray):
+        boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+        x0, y0 = boxes[:, 0], boxes[:, 1]
+        return cls(x0, y0, x0 + np.maximum(boxes[:, 2], 1), y0 + np.maximum(boxes[:, 3], 1))
+
+    def __len__(self):
+        return len(self.x0)
+
+
+def _merge_fragments(b: _Boxes, texts: List[str]):
+    """같은 줄이 여러 조각으로 검출된 경우 읽기 방향으로 이어 붙여 한 줄로 만듭니다."""
+    n = len(b)
+    reach = b.size * MAX_FRAGMENT_GAP_RATIO
+    # 가로쓰기는 오른쪽, 세로쓰기는 아래쪽으로 이어지는 조각만 후보
+    regions = np.stack([
+        b.x0,
+        b.y0,
+        np.where(b.vertical, b.x1, b.x1 + reach),
+        np.where(b.vertical, b.y1 + reach, b.y1),
+    ], axis=1)
+    index = GridIndex(b.x0, b.y0, b.x1, b.y1, cell_size=4 * np.median(b.size))
+    src, dst = _candidate_pairs(index, regions)
+    if len(src):
+        same_dir = b.vertical[src] == b.vertical[dst]
+        size_ok = np.maximum(b.size[src], b.size[dst]) <= MAX_SIZE_RATIO * np.minimum(b.size[src], b.size[dst])
+        min_size = np.minimum(b.size[src], b.size[dst])
+        cross = np.where(b.vertical[src], _overlap(b.x0[src], b.x1[src], b.x0[dst], b.x1[dst]),
+                         _overlap(b.y0[src], b.y1[src], b.y0[dst], b.y1[dst]))
+        along_gap = np.where(b.vertical[src], b.y0[dst] - b.y1[src], b.x0[dst] - b.x1[src])
+        ahead = np.where(b.vertical[src], b.y0[dst] > b.y0[src], b.x0[dst] > b.x0[src])
+        keep = same_dir & size_ok & ahead & (cross >= MIN_AXIS_OVERLAP * min_size) \
+            & (along_gap <= reach[src]) & (along_gap >= -0.5 * min_size)
+        src, dst = src[keep], dst[keep]
+
+    roots = _union_find_labels(n, src, dst)
+    _, labels = np.unique(roots, return_inverse=True)
+    gx0, gy0, gx1, gy1 = _group_bounds(labels, b.x0, b.y0, b.x1, b.y1)
+
+    # 조각 텍스트는 읽기 방향(가로: x, 세로: y) 순서로 이어 붙임
+    along = np.where(b.vertical, b.y0, b.x0)
+    order = np.lexsort((along, labels))
+    merged_texts = [[] for _ in range(len(gx0))]
+    for i in order.tolist():
+        merged_texts[labels[i]].append(texts[i])
+    group_vertical = np.zeros(len(gx0), dtype=bool)
+    group_vertical[labels] = b.vertical
+    merged = _Boxes(gx0, gy0, gx1, gy1, vertical=group_vertical)
+    return merged, [_join_texts(parts) for parts in merged_texts]
+
+
+def _link_lines(b: _Boxes, max_gap_ratio: float) -> np.ndarray:
+    """
+    각 줄의 다음 줄(같은 문단)을 찾아 successor 배열로 돌려줍니다. (-1 = 문단의 마지막 줄)
+    가로쓰기: 같은 단에서 바로 아래 줄 / 세로쓰기: 같은 행에서 바로 왼쪽 줄
+    """
+    n = len(b)
+    successor = np.full(n, -1, dtype=np.int64)
+    reach = b.size * max_gap_ratio
+    back = 0.5 * b.size # 살짝 겹쳐 검출된 줄 허용
+    regions = np.stack([
+        np.where(b.vertical, b.x0 - reach, b.x0),
+        np.where(b.vertical, b.y0, b.y1 - back),
+        np.where(b.vertical, b.x0 + back, b.x1),
+        np.where(b.vertical, b.y1, b.y1 + reach),
+    ], axis=1)
+    index = GridIndex(b.x0, b.y0, b.x1, b.y1, cell_size=4 * np.median(b.size))
+    src, dst = _candidate_pairs(index, regions)
+    if not len(src):
+        return successor
+
+    vertical = b.vertical[src]
+    min_size = np.minimum(b.size[src], b.size[dst])
+    gap = np.where(vertical, b.x0[src] - b.x1[dst], b.y0[dst] - b.y1[src])
+    ahead = np.where(vertical, b.x1[dst] < b.x1[src], b.y0[dst] > b.y0[src])
+    cross = np.where(vertical, _overlap(b.y0[src], b.y1[src], b.y0[dst], b.y1[dst]),
+                     _overlap(b.x0[src], b.x1[src], b.x0[dst], b.x1[dst]))
+    keep = (vertical == b.vertical[dst]) & ahead \
+        & (gap <= reach[src]) & (gap >= -back[src]) \
+        & (cross >= MIN_AXIS_OVERLAP * min_size) \
+        & (np.maximum(b.size[src], b.size[dst]) <= MAX_SIZE_RATIO * min_size)
+    src, dst, gap = src[keep], dst[keep], gap[keep]
+
+    # 간격이 가까운 쌍부터 연결: 줄마다 다음 줄 하나 / 이전 줄 하나만 허용
+    has_predecessor = np.zeros(n, dtype=bool)
+    for k in np.argsort(gap, kind='stable').tolist():
+        s, d = src[k], dst[k]
+        if successor[s] == -1 and not has_predecessor[d]:
+            successor[s] = d
+            has_predecessor[d] = True
+    return successor
+
+
+def _interval_clusters(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """겹치는 구간끼리 묶은 클러스터 번호 (시작 위치 순서)"""
+    labels = np.zeros(len(starts), dtype=np.int64)
+    if not len(starts):
+        return labels
+    order = np.argsort(starts, kind='stable')
+    cluster, current_end = 0, ends[order[0]]
+    for i in order.tolist():
+        if starts[i] > current_end:
+            cluster += 1
+            current_end = ends[i]
+        else:
+            current_end = max(current_end, ends[i])
+        labels[i] = cluster
+    return labels
+
+
+def _reading_order(px0, py0, px1, py1, vertical) -> np.ndarray:
+    """
+    문단을 읽는 순서로 정렬하는 인덱스를 돌려줍니다.
+    - 여러 단에 걸친 가로쓰기 블록(제목 등)이 페이지를 구역(section)으로 나눔
+    - 구역 안에서 가로쓰기는 단(왼쪽 -> 오른쪽) 순, 단 안에서 위 -> 아래
+    - 세로쓰기는 행(위 -> 아래) 순, 행 안에서 오른쪽 -> 왼쪽
+    """
+    page_w = max(1, int(px1.max() - px0.min()))
+    spanning = ~vertical & ((px1 - px0) >= FULL_WIDTH_RATIO * page_w)
+
+    span_tops = np.sort(py0[spanning])
+    section = 2 * np.searchsorted(span_tops, py0, side='right')
+    section[spanning] = 2 * np.searchsorted(span_tops, py0[spanning], side='left') + 1
+
+    group = np.zeros(len(px0), dtype=np.int64)
+    horizontal = ~vertical & ~spanning
+    group[horizontal] = _interval_clusters(px0[horizontal], px1[horizontal])
+    group[vertical] = _interval_clusters(py0[vertical], py1[vertical])
+
+    within = np.where(vertical, -px1, py0)
+    return np.lexsort((px0, within, group, vertical, section))
+
+
+def group_lines_columns(boxes: np.ndarray, texts: List[str], max_gap_ratio: float = 0.5) -> Tuple[np.ndarray, List[str]]:
+    """
+    줄 상자(N, 4) [x, y, w, h]와 텍스트를 문단으로 묶어 읽는 순서대로 돌려줍니다.
+    Args:
+        max_gap_ratio: 글자 크기(가로쓰기는 줄 높이, 세로쓰기는 줄 폭) 대비 줄 사이 최대 허용 간격
+    Returns:
+        (문단 상자 (M, 4) int32 [x, y, w, h], 문단 텍스트 리스트)
+    """
+    if len(texts) == 0:
+        return np.zeros((0, 4), np.int32), []
+
+    lines, line_texts = _merge_fragments(_Boxes.from_xywh(boxes), list(texts))
+    successor = _link_lines(lines, max_gap_ratio)
+
+    # successor 체인을 따라 문단 번호와 문단 안 줄 순서를 매김
+    n = len(lines)
+    has_predecessor = np.zeros(n, dtype=bool)
+    has_predecessor[successor[successor >= 0]] = True
+    labels = np.full(n, -1, dtype=np.int64)
+    chains = []
+    for head in np.flatnonzero(~has_predecessor).tolist():
+        chain = []
+        i = head
+        while i != -1:
+            labels[i] = len(chains)
+            chain.append(i)
+            i = successor[i]
+        chains.append(chain)
+
+    px0, py0, px1, py1 = _group_bounds(labels, lines.x0, lines.y0, lines.x1, lines.y1)
+    para_vertical = np.array([lines.vertical[chain[0]] for chain in chains], dtype=bool)
+
+    order = _reading_order(px0, py0, px1, py1, para_vertical)
+    para_boxes = np.stack([px0, py0, px1 - px0, py1 - py0], axis=1)[order].astype(np.int32)
+    return para_boxes, [_join_texts([line_texts[i] for i in chains[p]]) for p in order.tolist()]
+
+
+def group_lines(boxes: np.ndarray, texts: List[str], max_gap_ratio: float = 0.5) -> List[Dict]:
+    """
+    group_lines_columns와 같지만 문단 dict 리스트로 돌려줍니다.
+    Returns:
+        [{'box': [x, y, w, h], 'text': '...'}, ...]
+    """
+    para_boxes, para_texts = group_lines_columns(boxes, texts, max_gap_ratio)
+    return [{'box': box, 'text': text} for box, text in zip(para_boxes.tolist(), para_texts)]
@@ -2,18 +2,37 @@
 
 import os
 import asyncio
-import zipfile
 import glob
 import shutil
-import json        # <-- [추가] JSON 저장을 위해 임포트
 import httpx       # <-- [추가] 비동기 HTTP 클라이언트
+import time
+import contextlib
+import numpy as np
 from pathlib import Path
+from typing import Callable, Tuple
 from dotenv import load_dotenv
 
 # --- 1. 모듈 임포트 ---
 try:
     import ocr_processor
+    import preprocess
     import api_clients
+    import translation_backends
+    from translation_backends import TranslatorBackend
+    from rate_limiter import AzureRateLimiter
+    from translation_memory import TranslationMemory
+    import pipeline
+    from ocr_pool import OcrProcessPool
+    import ingestion
+    from page_source import PageRef
+    from blocks import PageBlocks
+    from checkpoint import CheckpointJournal, file_sha256
+    from ocr_cache import OcrCache, image_key, paragraph_key
+    import dedup
+    from dedup import DedupIndex
+    from scheduler import MemoryScheduler
+    from output_writer import MagazineWriter, OutputWriter
+    import instrumentation
 except ImportError as e:
     print(f"🚨 [치명적 오류] 모듈 임포트 실패: {e}")
     print("   'ocr_processor.py'와 'api_clients.py' 파일이 'main.py'와 같은 폴더에 있는지 확인하세요.")
@@ -23,24 +42,45 @@ except ImportError as e:
 load_dotenv()
 # (api_clients.py에서 이미 키를 로드했지만, main에서도 경로 확인용으로 로드)
 
-# 동시성 제어 (한 번에 5개의 페이지만 동시에 처리)
-# CPU 코어 수나 API 제한에 맞춰 조절하세요.
-SEMAPHORE = asyncio.Semaphore(2)
+# 스테이지별 동시성 제어 (OCR과 번역을 따로 조절)
+# OCR 워커 수: CPU 코어 수 / GPU에 맞춰 조절하세요.
+# (메모리 예산(OCR_MEMORY_BUDGET_MB)이 있으면 thread 모드는 예산으로 워커 수를 정하고 이 값은 최솟값으로만 씀)
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", 2))
+# OCR 실행 방식: 'thread' (asyncio.to_thread, 기본) 또는 'process' (워커 프로세스마다 Reader 1개, CPU 전용 환경 권장)
+OCR_EXECUTION_MODE = os.getenv("OCR_EXECUTION_MODE", "thread")
+# OCR 배치 크기: 1보다 크면 대기 중인 페이지를 최대 이 수만큼 모아 검출/인식을 한 번에 실행 (GPU 권장)
+# 0 = 자동 (메모리 예산이 있으면 예산 안에서 작은 페이지를 묶고, 없으면 1) - scheduler.MemoryScheduler.batch_pages
+OCR_BATCH_PAGES = int(os.getenv("OCR_BATCH_PAGES", 0))
+# 입력 방식: 'stream' (ZIP에서 바로 읽어 메모리에서 디코딩, 기본) 또는 'extract' (02_temp_images에 압축 해제)
+INPUT_MODE = os.getenv("INPUT_MODE", "stream")
+# 번역 워커 수: 동시에 번역을 기다릴 수 있는 페이지 수
+# (실제 요청 속도/동시성은 rate_limiter.AzureRateLimiter가 .env 설정에 맞춰 따로 조절합니다.)
+TRANSLATE_WORKERS = int(os.getenv("TRANSLATE_WORKERS", 4))
+# OCR -> 번역 사이 큐 크기 (OCR이 너무 앞서가며 결과를 쌓아두지 않도록 제한)
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", 8))
+# 결과 파일 형식: 'json' (기본, 매거진당 JSON 하나), 'ndjson' (한 줄에 페이지 하나), 'msgpack' (msgpack 패키지 필요)
+OUTPUT_FORMAT = os.getenv("OUTPUT_FORMAT", "json")
 
 # --- 3. 경로 설정 ---
 BASE_DIR = Path(__file__).resolve().parent
 INPUT_DIR = BASE_DIR / "01_input_zips"
 TEMP_DIR = BASE_DIR / "02_temp_images"
 OUTPUT_DIR = BASE_DIR / "03_output_results"
+CACHE_DIR = BASE_DIR / "04_cache" # 번역 메모리 등 실행 간에 유지되는 캐시
 
-# --- 4. 0단계: ZIP 압축 해제 및 파일 준비 ---
+# --- 4. 0단계: ZIP 열거 (및 extract 모드에서는 압축 해제) ---
 def setup_directories_and_unzip():
-    print("--- 0단계: 폴더 설정 및 ZIP 압축 해제 시작 ---")
+    """
+    01_input_zips의 ZIP들에서 페이지 이미지를 찾아 PageRef 리스트와 매거진 맵을 만듭니다.
+    'stream' 모드(기본): 압축을 풀지 않고 ZIP 목록(중앙 디렉터리)만 읽습니다. 이미지는 OCR 시점에 메모리로 읽습니다.
+    'extract' 모드: 기존처럼 02_temp_images에 압축을 풀고, 풀린 파일을 읽습니다.
+    """
+    print(f"--- 0단계: 폴더 설정 및 ZIP 열거 시작 (입력 모드: {INPUT_MODE}) ---")
     INPUT_DIR.mkdir(exist_ok=True)
     TEMP_DIR.mkdir(exist_ok=True)
     OUTPUT_DIR.mkdir(exist_ok=True)
 
-    zip_files = list(INPUT_DIR.glob("*.zip"))
+    zip_files = sorted(INPUT_DIR.glob("*.zip"))
     
     if not zip_files:
         print(f"  [알림] {INPUT_DIR} 폴더에 처리할 .zip 파일이 없습니다.")
@@ -48,150 +88,393 @@ def setup_directories_and_unzip():
 
     print(f"  [발견] {len(zip_files)}개의 ZIP 파일 발견.")
     
-    all_image_paths = []
+    all_pages = []
     # [추가] 원본 zip(매거진)별로 결과물을 저장하기 위한 딕셔너리
-    # { 'magazine_A': [img1_path, img2_path], 'magazine_B': [img3_path] }
+    # { 'magazine_A': [page1, page2], 'magazine_B': [page3] }
     magazine_map = {}
 
-    for zip_path in zip_files:
-        magazine_name = zip_path.stem 
-        unzip_target_dir = TEMP_DIR / magazine_name
-        unzip_target_dir.mkdir(exist_ok=True)
-        print(f"  -> '{zip_path.name}' 압축 해제 중... -> {unzip_target_dir}")
-        
-        try:
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                zip_ref.extractall(unzip_target_dir)
-            
-            image_extensions = ["*.jpg", "*.jpeg", "*.png"]
-            images_in_this_zip = []
-            for ext in image_extensions:
-                images_in_this_zip.extend(unzip_target_dir.rglob(ext))
-            
-            images_in_this_zip.sort() # 페이지 순서 정렬
-            
-            print(f"     ... {len(images_in_this_zip)}개의 이미지 파일 발견.")
-            all_image_paths.extend(images_in_this_zip)
-            # [추가] 매거진 맵에 추가
-            magazine_map[magazine_name] = images_in_this_zip
+    # ZIP 목록 읽기(extract 모드면 압축 해제까지)는 여러 ZIP을 동시에 처리
+    if INPUT_MODE == "extract":
+        print(f"  -> ZIP {len(zip_files)}개 압축 해제 중... -> {TEMP_DIR}")
+    listed = ingestion.list_zip_pages(zip_files, extract_dir=TEMP_DIR if INPUT_MODE == "extract" else None)
+
+    for zip_path, pages_in_this_zip in listed:
+        if isinstance(pages_in_this_zip, Exception):
+            print(f"  🚨 [오류] '{zip_path.name}' 처리 중 오류 발생: {pages_in_this_zip}")
+            continue
+        print(f"  -> '{zip_path.name}': {len(pages_in_this_zip)}개의 이미지 파일 발견.")
+        all_pages.extend(pages_in_this_zip)
+        # [추가] 매거진 맵에 추가
+        magazine_map[zip_path.stem] = pages_in_this_zip
+
+    print(f"--- 0단계 완료: 총 {len(all_pages)}개의 이미지를 처리합니다. ---\n")
+    return all_pages, magazine_map
+
+
+# --- 5. [수정] 비동기 파이프라인 (OCR 스테이지 -> 번역 스테이지) ---
+async def _run_ocr(images: list, ocr_pool: OcrProcessPool = None) -> list:
+    """
+    EasyOCR로 줄 단위 결과(RawLines)를 얻습니다. (별도 스레드 또는 ocr_pool의 워커 프로세스에서 실행)
+    images는 인코딩된 바이트 또는 (선읽기에서) 이미 디코딩된 이미지입니다. ocr_pool에는 바이트만 넘깁니다.
+    페이지가 여러 장이면 검출/인식을 페이지 사이에서 묶어 배치로 실행합니다.
+    """
+    if ocr_pool is not None:
+        # 워커 프로세스 안의 세부 span은 모이지 않으므로 풀 호출 전체를 잼
+        with instrumentation.span("ocr.pool", images=len(images)):
+            if len(images) == 1:
+                return [await ocr_pool.read_raw_lines(images[0])]
+            return await ocr_pool.read_raw_lines_batch(images)
+    if all(isinstance(image, np.ndarray) for image in images):
+        return await asyncio.to_thread(ocr_processor.read_raw_lines_batch, images)
+    return await asyncio.to_thread(ocr_processor.extract_raw_lines_batch, images)
+
+
+def ocr_stage_size(scheduler: MemoryScheduler, ocr_pool: OcrProcessPool = None) -> Tuple[int, int]:
+    """
+    OCR 스테이지의 (워커 수, 배치 최대 페이지 수)
+    thread 모드는 메모리 예산으로 워커 수를 정해 실제 동시 실행을 입장(admission)에 맡기고,
+    process 모드는 워커 프로세스 수(OCR_WORKERS)만큼만 돌립니다. (더 많으면 풀 앞에서 예산만 잡고 기다림)
+    """
+    workers = OCR_WORKERS if ocr_pool is not None else scheduler.stage_workers(OCR_WORKERS)
+    return workers, scheduler.batch_pages(OCR_BATCH_PAGES)
+
+
+def _cache_probe(ocr_cache: OcrCache):
+    """
+    선읽기(Prefetcher) probe: 읽은 바이트로 OCR 캐시 키를 만들어, 캐시에 결과가 있는 페이지는 디코딩하지 않게 합니다.
+    (선읽기 스레드에서 실행, 키는 LoadedPage.probed로 ocr_pages에 넘겨 다시 해시하지 않음)
+    """
+    preprocess_config = preprocess.preprocess_config()
+
+    def probe(page: PageRef, image_bytes: bytes):
+        img_key = image_key(image_bytes, ocr_processor.OCR_LANGUAGES, preprocess_config)
+        return img_key, not ocr_cache.has_raw(img_key)
+    return probe
+
+
+def _record_prefilter(page_info: dict, page: PageRef, prefilter_result: dict):
+    """글자 유무 판별 결과를 결과 파일의 페이지 항목('ocr_prefilter')으로 남깁니다."""
+    if page_info is not None and prefilter_result is not None:
+        page_info[page] = {'ocr_prefilter': prefilter_result}
 
+
+async def _release_prefetched(prefetcher: ingestion.Prefetcher, nbytes):
+    """선읽기에서 꺼낸 페이지 중 OCR하지 않는 페이지의 바이트를 메모리 예산에 돌려줍니다. (scheduler.release)"""
+    if prefetcher is not None and prefetcher.budget is not None:
+        await prefetcher.budget.release(sum(nbytes))
+
+
+async def ocr_pages(pages: list, ocr_pool: OcrProcessPool = None, ocr_cache: OcrCache = None,
+                    prefetcher: ingestion.Prefetcher = None, page_info: dict = None,
+                    dedup_index: DedupIndex = None, scheduler: MemoryScheduler = None):
+    """
+    1단계: 페이지 여러 장 OCR
+    ocr_cache가 있으면 이미지 내용 해시로 이전 결과를 먼저 찾고, 캐시에 없는 페이지만 한 배치로 EasyOCR을 실행합니다.
+    dedup_index가 있으면 캐시에 없는 페이지도 이전에 OCR한 거의 같은 페이지(다시 스캔 / 압축한 반복 광고 등)의
+    결과를 재사용하고, 새로 OCR한 페이지는 인덱스에 등록합니다. (dedup.py)
+    prefetcher가 있으면 미리 읽어 (캐시에 없는 페이지는 디코딩까지) 둔 페이지를 꺼내 씁니다.
+    scheduler가 있으면 OCR할 페이지들의 메모리 추정치가 예산 안에 들어올 때까지 기다렸다가 OCR합니다. (scheduler.py)
+    page_info가 있으면 페이지별 글자 유무 판별 결과를 {page: {'ocr_prefilter': ...}}로 채웁니다.
+    (중복 제거로 재사용한 페이지는 {page: {'ocr_dedup': {'source': 원래 페이지, 'distance': 해시 거리}}})
+    Returns: [(page, 문단 PageBlocks), ...] (입력 순서, OCR에 실패한 페이지는 None)
+    """
+    results = {}
+    to_ocr = [] # (page, image, img_key, para_key) - image: 디코딩된 이미지 또는 인코딩 바이트
+    charged = {} # 선읽기가 메모리 예산에 걸어 둔 페이지 바이트 (ingestion.Prefetcher budget)
+    try:
+        for page in pages:
+            print(f"[OCR 시작] {page.name}")
+            try:
+                # extract 모드면 풀린 파일을, stream 모드면 ZIP 멤버를 읽어 메모리에서 바로 디코딩
+                img_key = para_key = None
+                if prefetcher is not None:
+                    loaded = await prefetcher.take(page)
+                    if prefetcher.budget is not None:
+                        charged[page] = loaded.nbytes
+                    image_bytes = loaded.image_bytes
+                    image = loaded.image if loaded.image is not None else image_bytes
+                    img_key = loaded.probed # 선읽기에서 캐시 키를 이미 계산함 (_cache_probe)
+                else:
+                    image_bytes = await asyncio.to_thread(page.read_bytes)
+                    image = image_bytes
+                if ocr_cache is not None:
+                    img_key = img_key or image_key(image_bytes, ocr_processor.OCR_LANGUAGES,
+                                                   preprocess.preprocess_config())
+                    para_key = paragraph_key(img_key, ocr_processor.merge_config())
+                    structured_data = ocr_cache.get_paragraphs(para_key)
+                    if structured_data is not None:
+                        print(f"  [OCR 캐시] {page.name}: 이전 결과 재사용")
+                        instrumentation.count("ocr.cache_hits")
+                        results[page] = structured_data
+                        if page_info is not None:
+                            _record_prefilter(page_info, page, ocr_cache.get_prefilter(img_key))
+                        continue
+                    raw = ocr_cache.get_raw(img_key) # 병합 설정만 바뀐 경우: OCR 없이 다시 병합
+                    if raw is not None:
+                        instrumentation.count("ocr.cache_hits")
+                        results[page] = ocr_processor.merge_raw_lines(raw)
+                        ocr_cache.put_paragraphs(para_key, img_key, results[page])
+                        _record_prefilter(page_info, page, raw.prefilter)
+                        continue
+                if dedup_index is not None:
+                    match = await asyncio.to_thread(dedup_index.match_page, page, image)
+                    if match is not None:
+                        print(f"  [중복 제거] {page.name}: '{match.source}'와 거의 같은 페이지 -> OCR 결과 재사용 "
+                              f"(해시 거리 {match.distance})")
+                        instrumentation.count("ocr.dedup_hits")
+                        results[page] = match.blocks
+                        if page_info is not None:
+                            page_info[page] = match.page_info()
+                        continue
+                to_ocr.append((page, image, img_key, para_key))
+            except Exception as e:
+                print(f"🚨 [OCR 오류] {page.name} 처리 중 심각한 오류: {e}")
+                results[page] = None
+    except BaseException:
+        await _release_prefetched(prefetcher, charged.values())
+        raise
+    # OCR하지 않는 페이지(캐시 / 중복 제거 / 오류)의 선읽기 몫은 바로 돌려주고, OCR할 페이지의 몫은 입장 비용으로 넘김
+    held = sum(charged.pop(page, 0) for page, _, _, _ in to_ocr) if scheduler is not None else 0
+    await _release_prefetched(prefetcher, charged.values())
+
+    if to_ocr:
+        try:
+            admission = (scheduler.admit([page for page, _, _, _ in to_ocr], held=held) if scheduler is not None
+                         else contextlib.nullcontext())
+            async with admission:
+                started = time.perf_counter()
+                raws = await _run_ocr([image for _, image, _, _ in to_ocr], ocr_pool)
+            if dedup_index is not None:
+                dedup_index.record_ocr(time.perf_counter() - started, len(to_ocr))
         except Exception as e:
-            print(f"  🚨 [오류] '{zip_path.name}' 처리 중 오류 발생: {e}")
+            print(f"🚨 [OCR 오류] {', '.join(page.name for page, _, _, _ in to_ocr)} 처리 중 심각한 오류: {e}")
+            raws = [None] * len(to_ocr)
+        for (page, image, img_key, para_key), raw in zip(to_ocr, raws):
+            if raw is None:
+                results[page] = None
+                if dedup_index is not None:
+                    dedup_index.forget([page])
+                continue
+            results[page] = ocr_processor.merge_raw_lines(raw)
+            _record_prefilter(page_info, page, raw.prefilter)
+            if dedup_index is not None:
+                # 인덱스에 등록 (block 모드: 전에 본 블록과 같은 블록은 그 텍스트로 맞춰 번역 메모리에서 번역되게 함)
+                # 캐시에도 맞춘 텍스트를 저장해 다시 실행해도 같은 텍스트가 나오도록 함
+                try:
+                    reused = await asyncio.to_thread(dedup_index.add_page, page, image, results[page])
+                    if reused:
+                        instrumentation.count("ocr.dedup_blocks", reused)
+                except Exception as e:
+                    print(f"  ⚠️ [중복 제거] {page.name} 인덱스 등록 실패: {e}")
+            if ocr_cache is not None:
+                ocr_cache.put_raw(img_key, raw)
+                ocr_cache.put_paragraphs(para_key, img_key, results[page])
+
+    for page in pages:
+        if results[page] is None:
+            continue
+        if results[page]:
+            print(f"[OCR 완료] {page.name}: {len(results[page])}개의 텍스트 블록 발견.")
+        else:
+            print(f"[OCR 완료] {page.name}: 추출된 텍스트 블록이 없습니다.")
+    return [(page, results[page]) for page in pages]
 
-    print(f"--- 0단계 완료: 총 {len(all_image_paths)}개의 이미지를 처리합니다. ---\n")
-    return all_image_paths, magazine_map
 
+async def ocr_page(page: PageRef, ocr_pool: OcrProcessPool = None, ocr_cache: OcrCache = None):
+    """
+    1단계: 단일 페이지 OCR (ocr_pages의 한 장짜리 버전)
+    Returns: (page, 문단 PageBlocks 또는 OCR 실패 시 None)
+    """
+    return (await ocr_pages([page], ocr_pool, ocr_cache))[0]
 
-# --- 5. [수정] 비동기 파이프라인 (완성) ---
-async def process_page(session: httpx.AsyncClient, image_path: Path):
+
+async def translate_page(session: httpx.AsyncClient, page: PageRef, structured_data: PageBlocks,
+                         limiter: AzureRateLimiter = None, memory: TranslationMemory = None,
+                         translator: TranslatorBackend = None):
     """
-    단일 이미지 페이지 파이프라인 (PaddleOCR -> Azure 번역)
+    2단계: OCR 결과(문단 블록)를 배치 번역합니다.
+    translator를 넘기지 않으면 TRANSLATION_BACKEND 설정으로 번역 백엔드를 만듭니다. (기본: Azure)
     [수정] Gemini 검증 단계가 제거되었습니다. // 나중에 더 좋은 방법을 찾아볼 예정
+    Returns: (page, 번역된 PageBlocks) (OCR에 실패한 페이지(structured_data=None)는 None)
+    """
+    if structured_data is None:
+        return (page, None)
+    """
+    나중에 검증 과정이 여기에 추가될 예정입니다
+    ocr 결과가 너무 성능이 안나와 ;.; 
     """
     
-    # [수정] Semaphore 값을 다시 5 (또는 그 이상)로 돌려도 됩니다.
-    # GPU가 병목이므로 CPU 코어 수에 맞춰 2~4 정도로 테스트해 보세요.
-    async with SEMAPHORE: # 👈 main.py 상단의 이 값을 4 정도로 수정하세요
-        print(f"[OCR 시작] {image_path.name}")
-        
-        # --- 1단계: OCR (PaddleOCR, 별도 스레드에서 실행) ---
+    # 빈 블록은 제외하고 번역 대상만 모음
+    blocks_to_translate = structured_data.select(
+        [i for i, text in enumerate(structured_data.texts) if text.strip()])
+    texts = blocks_to_translate.texts
+    if not texts:
+        return (page, blocks_to_translate)
+    
+    print(f"  -> {page.name} [블록 {len(texts)}개] 배치 번역 중...")
+    instrumentation.count("blocks", len(texts))
+    
+    # 번역 (Azure: 블록 여러 개를 요청 한도 안에서 묶어 전송)
+    # 속도 제한은 고정 대기 대신 공유 limiter가 분당 문자 수 / 초당 요청 수 / 429 응답에 맞춰 처리합니다.
+    # 번역 메모리에 있는 텍스트(마스트헤드, 반복 광고 문구 등)는 API를 호출하지 않습니다.
+    # 실패한 요청은 재시도 후에도 안 되면 번역문 대신 상태(translation_status / translation_error)로 기록됩니다.
+    translator = translator or translation_backends.create_backend(session, limiter, memory)
+    translations = await translator.translate(texts)
+
+    # 결과 저장 (번역 결과를 블록 순서대로 열에 기록, 결과 파일에는 원본 = clean_text로 씀)
+    blocks_to_translate.set_translations(translations)
+
+    print(f"✅ [처리 완료] {page.name}")
+    return (page, blocks_to_translate)
+
+
+async def process_page(session: httpx.AsyncClient, page: PageRef, limiter: AzureRateLimiter = None,
+                       memory: TranslationMemory = None, ocr_pool: OcrProcessPool = None,
+                       ocr_cache: OcrCache = None):
+    """단일 이미지 페이지를 OCR -> 번역 순서로 바로 처리합니다. (파이프라인 없이 한 페이지만 처리할 때)"""
+    _, structured_data = await ocr_page(page, ocr_pool, ocr_cache)
+    page, blocks = await translate_page(session, page, structured_data, limiter, memory)
+    return (page, blocks if blocks is not None else PageBlocks())
+
+
+async def run_ocr_translate_pipeline(session: httpx.AsyncClient, pages,
+                                     limiter: AzureRateLimiter = None, memory: TranslationMemory = None,
+                                     ocr_pool: OcrProcessPool = None, ocr_cache: OcrCache = None,
+                                     on_page_done: Callable[[PageRef, list], None] = None,
+                                     collect_results: bool = True, translator: TranslatorBackend = None,
+                                     page_info: dict = None, dedup_index: DedupIndex = None,
+                                     scheduler: MemoryScheduler = None,
+                                     on_page_failed: Callable[[PageRef], None] = None):
+    """
+    OCR 스테이지와 번역 스테이지를 크기가 제한된 큐로 연결해 동시에 돌립니다.
+    OCR 워커는 번역을 기다리지 않고 다음 페이지로 넘어가며, 번역 워커는 OCR이 끝난 페이지부터 처리합니다.
+    pages는 페이지 리스트 또는 페이지 리스트(조각)를 차례로 내주는 비동기 이터러블입니다.
+    비동기 이터러블이면 조각이 나오는 대로 같은 파이프라인에 넣고, 이터러블이 끝나면 남은 페이지까지 처리하고 닫습니다.
+    (service.py: 작업 조각이 바뀌어도 앞 조각의 번역과 다음 조각의 OCR이 겹쳐 돌도록)
+    on_page_done(page, blocks)은 페이지 하나가 끝날 때마다 호출됩니다. (체크포인트 기록, 결과 파일 쓰기 등)
+    on_page_failed(page)는 OCR에 실패했거나 처리 중 오류가 난 페이지마다 호출됩니다.
+    collect_results=False면 결과를 모아 두지 않습니다. (on_page_done에서 바로 내보낼 때 메모리 절약)
+    page_info(dict)를 넘기면 OCR 스테이지가 페이지별 추가 정보(글자 유무 판별 결과)를 채웁니다.
+    dedup_index를 넘기면 거의 같은 페이지 / 블록의 이전 OCR 결과를 재사용합니다. (dedup.py)
+    scheduler를 넘기지 않으면 .env 설정(OCR_MEMORY_BUDGET_MB 등)으로 메모리 스케줄러를 만듭니다. (scheduler.py)
+    Returns: ([(page, PageBlocks), ...] (완료 순서), pipeline.PipelineReport)
+    """
+    # 모든 페이지가 같은 번역 백엔드를 공유 (로컬 모델 / 용어집을 한 번만 로드)
+    translator = translator or translation_backends.create_backend(session, limiter, memory)
+    scheduler = scheduler or MemoryScheduler()
+
+    # OCR보다 앞서 페이지를 읽고 디코딩해 두는 선읽기 (크기 제한: PREFETCH_MB)
+    # process 모드는 워커 프로세스에서 디코딩하므로 바이트만 읽어 둠
+    # OCR 캐시에 결과가 있는 페이지는 바이트만 읽고 디코딩하지 않음 (_cache_probe)
+    # 버퍼에 든 페이지도 OCR 메모리 예산에 걸어, 선읽기 + OCR 중인 페이지가 함께 예산 안에 들도록 함
+    prefetcher = ingestion.Prefetcher([], decode=ocr_pool is None,
+                                      probe=_cache_probe(ocr_cache) if ocr_cache is not None else None,
+                                      budget=scheduler if scheduler.budget else None)
+    fed_pages = 0
+
+    async def _feed():
+        nonlocal fed_pages
+        slices = pages if hasattr(pages, '__aiter__') else _as_async([pages])
+        async for slice_pages in slices:
+            # 이미지 헤더로 페이지 크기를 읽어, 창(OCR_SCHEDULE_WINDOW) 안에서 큰 페이지부터 OCR하도록 순서를 바꿈
+            # OCR 동시성은 메모리 예산으로 조절 (작은 페이지는 여러 장 함께, 큰 페이지는 자리가 날 때까지 대기)
+            await asyncio.to_thread(scheduler.measure, slice_pages)
+            slice_pages = scheduler.order(slice_pages)
+            await prefetcher.add(slice_pages)
+            fed_pages += len(slice_pages)
+            for page in slice_pages:
+                yield page
+
+    async def _ocr_stage(batch):
         try:
-            structured_data = await asyncio.to_thread(
-                ocr_processor.extract_structured_data, 
-                image_path
-            )
-        except Exception as e:
-            print(f"🚨 [OCR 오류] {image_path.name} 처리 중 심각한 오류: {e}")
-            return (image_path, [])
+            return await ocr_pages(batch, ocr_pool, ocr_cache, prefetcher, page_info, dedup_index, scheduler)
+        except Exception:
+            if on_page_failed is not None:
+                for page in batch:
+                    on_page_failed(page)
+            raise
+
+    async def _translate_stage(item):
+        page, structured_data = item
+        try:
+            page, blocks = await translate_page(session, page, structured_data, limiter, memory, translator)
+            # OCR에 실패한 페이지(None)는 완료로 치지 않음 -> 체크포인트에 남기지 않고 다음 실행 때 다시 처리
+            if blocks is not None and on_page_done is not None:
+                on_page_done(page, blocks)
+        except Exception:
+            if on_page_failed is not None:
+                on_page_failed(page)
+            raise
+        if blocks is None and on_page_failed is not None:
+            on_page_failed(page)
+        return (page, blocks if blocks is not None else PageBlocks()) if collect_results else None
+
+    ocr_workers, ocr_batch_pages = ocr_stage_size(scheduler, ocr_pool)
+    stages = [
+        pipeline.Stage('ocr', _ocr_stage, workers=ocr_workers, batch_size=ocr_batch_pages,
+                       weight=scheduler.cost, max_batch_weight=scheduler.batch_limit(ocr_workers)),
+        pipeline.Stage('translate', _translate_stage, workers=TRANSLATE_WORKERS),
+    ]
+    async with prefetcher:
+        all_page_results, report = await pipeline.run_pipeline(_feed(), stages, queue_size=PIPELINE_QUEUE_SIZE)
+    report.print_report()
+    if fed_pages:
+        print(f"  [선읽기] 버퍼 최대 {prefetcher.peak_bytes / (1024 * 1024):.1f}MB (한도 {ingestion.PREFETCH_MB}MB)"
+              + (f", 캐시 적중으로 디코딩 생략 {prefetcher.skipped_decodes}장" if prefetcher.skipped_decodes else ""))
+    return all_page_results, report
+
+
+async def _as_async(items):
+    for item in items:
+        yield item
+
+
+def _is_page_complete(blocks: PageBlocks) -> bool:
+    """번역 오류 없이 끝난 페이지인지 확인합니다. (오류가 있는 페이지는 체크포인트에 남기지 않고 다음 실행 때 다시 처리)"""
+    return all(status == api_clients.STATUS_OK for status in blocks.statuses or [])
+
+
+def split_finished_pages(journal: CheckpointJournal, pages: list):
+    """
+    체크포인트 저널을 확인해 이미 끝난 페이지와 남은 페이지를 나눕니다.
+    Returns: (복원된 결과 [(page, blocks), ...], 남은 페이지 리스트, {zip_path: ZIP 해시})
+    """
+    zip_hashes = {zip_path: file_sha256(zip_path) for zip_path in sorted({page.zip_path for page in pages})}
+    restored_results = []
+    remaining_pages = []
+    for page in pages:
+        blocks = journal.lookup(page, zip_hashes[page.zip_path])
+        if blocks is None:
+            remaining_pages.append(page)
+        else:
+            restored_results.append((page, blocks))
+    return restored_results, remaining_pages, zip_hashes
+
 
-        if not structured_data:
-            print(f"[OCR 완료] {image_path.name}: 추출된 텍스트 블록이 없습니다.")
-            return (image_path, [])
-        
-        print(f"[OCR 완료] {image_path.name}: {len(structured_data)}개의 텍스트 블록 발견.")
-        
-        processed_blocks_output = [] # 최종 결과(번역된 블록)를 담을 리스트
-        """
-        나중에 검증 과정이 여기에 추가될 예정입니다
-        ocr 결과가 너무 성능이 안나와 ;.; 
-        """
-        
-        # --- [수정] 2단계: 번역 (Gemini 없이 바로 번역) ---
-        
-        for i, block in enumerate(structured_data):
-            original_text = block['text']
-            box = block['box']
-            
-            if not original_text.strip():
-                continue
-            
-            print(f"  -> {image_path.name} [블록 {i+1}/{len(structured_data)}] 번역 중...")
-            
-            # [제거] 1.5. Gemini 검증 (삭제됨)
-            
-            # 2. Azure 번역 (원본 텍스트를 바로 번역)
-            translated_text = await api_clients.call_azure_translation(session, original_text)
-            
-            # [제거] Gemini 31초 대기 (삭제됨)
-            
-            # [유지] Azure 속도 제한 (0.5초 또는 1초 대기)
-            # (PaddleOCR이 Tesseract보다 블록을 훨씬 잘 묶어주므로
-            # 호출 횟수가 줄어, 이 대기 시간도 0.2초 등으로 줄여도 됩니다.)
-            await asyncio.sleep(0.5) 
-
-            # 3. 결과 저장
-            processed_blocks_output.append({
-                'box': box,
-                'original_text': original_text,
-                'clean_text': original_text, # 원본 = 깨끗한 텍스트
-                'translated_text': translated_text
-            })
-
-        print(f"✅ [처리 완료] {image_path.name}")
-        return (image_path, processed_blocks_output)
-    
 # --- 6. [신규] 3단계: 결과 저장 ---
 
-def save_results(magazine_map: dict, all_page_results: list):
+def save_results(magazine_map: dict, all_page_results: list, page_info: dict = None):
     """
-    모든 처리 결과를 매거진별 JSON 파일로 03_output_results에 저장합니다.
+    모든 처리 결과를 매거진별 결과 파일(OUTPUT_FORMAT)로 03_output_results에 저장합니다.
+    (main()은 페이지가 끝날 때마다 OutputWriter로 바로 쓰므로, 결과를 한꺼번에 가진 경우에만 사용)
+    page_info: {page: 페이지 추가 정보} (결과 파일의 'ocr_prefilter' 등)
     """
     print("\n--- 3단계: 최종 결과 저장 시작 ---")
     
-    # (이미지 경로, 블록 리스트) 튜플 리스트를 딕셔너리로 변환 (빠른 조회용)
-    # { 'img1_path': [...], 'img2_path': [...] }
+    # (PageRef, 블록 리스트) 튜플 리스트를 딕셔너리로 변환 (빠른 조회용)
+    # { page1: [...], page2: [...] }
     results_dict = dict(all_page_results)
     
-    for magazine_name, image_paths in magazine_map.items():
-        # 이 매거진의 최종 JSON 구조
-        output_data = {
-            'magazine_name': magazine_name,
-            'total_pages': len(image_paths),
-            'pages': []
-        }
-        
+    for magazine_name, pages in magazine_map.items():
         print(f"  -> '{magazine_name}' 결과 취합 중...")
-        
-        # 정렬된 이미지 경로(페이지 순서)를 순회
-        for i, img_path in enumerate(image_paths):
-            page_data = {
-                'page_number': i + 1,
-                'original_filename': img_path.name,
-                'blocks': results_dict.get(img_path, []) # process_page 결과 가져오기
-            }
-            output_data['pages'].append(page_data)
-            
-        # 매거진별로 하나의 JSON 파일 생성
-        output_filename = OUTPUT_DIR / f"{magazine_name}_translated.json"
-        
         try:
-            with open(output_filename, 'w', encoding='utf-8') as f:
-                # ensure_ascii=False로 한글이 깨지지 않게 저장
-                # indent=2로 가독성 높게 저장
-                json.dump(output_data, f, ensure_ascii=False, indent=2)
-            print(f"  ✅ [저장 성공] {output_filename}")
+            writer = MagazineWriter(magazine_name, len(pages), OUTPUT_DIR, OUTPUT_FORMAT)
+            # 정렬된 페이지(페이지 순서)를 순회하며 한 페이지씩 씀
+            for i, page in enumerate(pages):
+                writer.add(i, page.name, results_dict.get(page, []), (page_info or {}).get(page)) # process_page 결과 가져오기
+            writer.close()
         except Exception as e:
-            print(f"  🚨 [저장 오류] {output_filename} 저장 중 오류 발생: {e}")
+            print(f"  🚨 [저장 오류] '{magazine_name}' 저장 중 오류 발생: {e}")
 
     print("--- 3단계 완료 ---")
 
@@ -214,44 +497,121 @@ def cleanup_temp_files():
 async def main():
     """메인 비동기 실행 함수 (오케스트레이터)"""
     
-    image_paths_to_process = []
+    pages_to_process = []
     magazine_map = {}
     all_page_results = []
+    journal = None
 
     try:
         # 0단계: 폴더 준비 및 압축 해제
-        image_paths_to_process, magazine_map = setup_directories_and_unzip()
+        pages_to_process, magazine_map = setup_directories_and_unzip()
         
-        if not image_paths_to_process:
+        if not pages_to_process:
             print("처리할 이미지가 없습니다. 스크립트를 종료합니다.")
             return
 
-        print(f"\n--- 1/2단계: OCR, 검증, 번역 작업 동시 시작 (총 {len(image_paths_to_process)}개) ---")
+        # 체크포인트 저널: 이전 실행에서 끝난 페이지는 건너뜀 (ZIP/페이지 내용이나 번역 설정이 바뀐 페이지만 다시 처리)
+        journal = CheckpointJournal(CACHE_DIR / "checkpoint.jsonl", translation_backends.translation_config_hash())
+        all_page_results, pages_to_process, zip_hashes = split_finished_pages(journal, pages_to_process)
+        if all_page_results:
+            print(f"  [체크포인트] 이전 실행에서 끝난 {len(all_page_results)}개 페이지를 건너뜁니다.")
+
+        # 결과 파일 writer: 페이지가 끝나는 대로(앞 페이지들이 끝났으면) 바로 파일에 씀
+        writer = OutputWriter(magazine_map, OUTPUT_DIR, OUTPUT_FORMAT)
+        for page, blocks in all_page_results:
+            writer.add(page, blocks, journal.page_info(page, zip_hashes[page.zip_path]))
+        all_page_results = None # 이미 파일로 내보냈으므로 메모리에 들고 있지 않음
+
+        # OCR 스테이지가 채우는 페이지별 추가 정보 (글자 유무 판별 결과), 페이지가 끝나면 꺼내서 씀
+        page_info = {}
+
+        def _on_page_done(page: PageRef, blocks: PageBlocks):
+            info = page_info.pop(page, None)
+            if _is_page_complete(blocks):
+                journal.record(page, zip_hashes[page.zip_path], blocks, info)
+            with instrumentation.span("save", page=page.name):
+                writer.add(page, blocks, info)
+            instrumentation.count("pages")
 
         # httpx.AsyncClient 세션을 생성하여 커넥션 풀을 재사용 (속도 향상)
-        async with httpx.AsyncClient(timeout=30.0) as session:
-            # 비동기 작업 목록 생성
-            tasks = []
-            for img_path in image_paths_to_process:
-                tasks.append(process_page(session, img_path))
-            
-            # asyncio.gather를 사용해 모든 작업을 "동시에" (최대 5개씩) 실행
-            # all_page_results: [(img_path, [block_data, ...]), ...]
-            all_page_results = await asyncio.gather(*tasks)
+        # 모든 번역 요청이 공유하는 속도 제한기 (.env의 AZURE_CHARS_PER_MINUTE 등으로 조절)
+        limiter = AzureRateLimiter.from_env()
+        # 디스크 기반 번역 메모리 (반복되는 텍스트는 재실행 시에도 API 호출 없이 재사용)
+        memory = TranslationMemory(CACHE_DIR / "translation_memory.sqlite3")
+        # 이미지 내용 해시 기반 OCR 캐시 (같은 페이지는 번역 설정을 바꿔 다시 돌려도 OCR 생략)
+        ocr_cache = OcrCache(CACHE_DIR / "ocr_cache.sqlite3")
+        # 지각 해시 기반 중복 제거 인덱스 (다시 스캔 / 압축한 반복 페이지와 반복 블록의 OCR 결과 재사용)
+        # 페이지 해시는 OCR 단계에서 캐시에 없는 페이지만, 이미 디코딩한 이미지로 구함 (첫 결과가 늦어지지 않도록)
+        dedup_index = None
+        if dedup.OCR_DEDUP != "off":
+            dedup_index = DedupIndex(CACHE_DIR / "dedup_index.sqlite3",
+                                     dedup.dedup_config(ocr_processor.OCR_LANGUAGES, preprocess.preprocess_config(),
+                                                        ocr_processor.merge_config()))
+        # 페이지 크기 / 사용 가능한 메모리에 맞춰 OCR 순서와 동시 실행을 정하는 스케줄러
+        scheduler = MemoryScheduler()
+        # 'process' 모드: OCR 워커 수만큼 프로세스를 띄우고 각자 Reader를 한 번씩 로드
+        ocr_pool = OcrProcessPool(workers=OCR_WORKERS) if OCR_EXECUTION_MODE == "process" else None
+        ocr_workers, ocr_batch_pages = ocr_stage_size(scheduler, ocr_pool)
+        print(f"\n--- 1/2단계: OCR -> 번역 파이프라인 시작 (총 {len(pages_to_process)}개, "
+              f"OCR 워커 {ocr_workers}개 (배치 최대 {ocr_batch_pages}페이지) / 번역 워커 {TRANSLATE_WORKERS}개) ---")
+        try:
+            async with httpx.AsyncClient(timeout=30.0) as session:
+                # OCR 스테이지와 번역 스테이지를 각자의 워커 수로 동시에 실행
+                # 결과는 _on_page_done에서 체크포인트와 결과 파일로 바로 내보냄
+                await run_ocr_translate_pipeline(session, pages_to_process, limiter, memory, ocr_pool,
+                                                 ocr_cache, on_page_done=_on_page_done, collect_results=False,
+                                                 page_info=page_info, dedup_index=dedup_index,
+                                                 scheduler=scheduler)
+        finally:
+            if ocr_pool is not None:
+                ocr_pool.shutdown()
+
+        sc_stats = scheduler.stats()
+        budget = f"{sc_stats['budget_mb']}MB" if sc_stats['budget_mb'] else "제한 없음"
+        print(f"  [OCR 스케줄러] 메모리 예산 {budget}: OCR {sc_stats['admitted']}회 ({sc_stats['admitted_pages']}페이지) 중 "
+              f"{sc_stats['waited']}회 대기 (총 {sc_stats['wait_seconds']:.1f}초, 최대 {sc_stats['max_wait_seconds']:.1f}초), "
+              f"최대 사용 추정 {sc_stats['peak_mb']}MB (선읽기 최대 {sc_stats['peak_prefetch_mb']}MB) / "
+              f"동시 {sc_stats['peak_pages']}페이지, "
+              f"예산 초과로 단독 실행 {sc_stats['oversize_pages']}페이지, 크기 모름 {sc_stats['unknown_sizes']}페이지")
+        print(f"  [번역 통계] 요청 {limiter.request_count}회, 429 제한 {limiter.throttled_count}회, 최종 동시성 {limiter.concurrency}")
+        tm_stats = memory.stats()
+        print(f"  [번역 메모리] 적중 {tm_stats['hits'] + tm_stats['hot_hits']}회, 미적중 {tm_stats['misses']}회 "
+              f"(적중률 {tm_stats['hit_rate']:.1%}), 삭제 {tm_stats['evictions']}건")
+        memory.close()
+        ocr_stats = ocr_cache.stats()
+        print(f"  [OCR 캐시] 문단 재사용 {ocr_stats['paragraph_hits']}회, 줄 결과 재사용 {ocr_stats['raw_hits']}회, "
+              f"캐시 미적중 {ocr_stats['misses']}회")
+        ocr_cache.close()
+        if dedup_index is not None:
+            dd_stats = dedup_index.stats()
+            # 절약 시간은 이번 실행에서 실제로 OCR한 페이지의 평균 시간으로 추정 (OCR한 페이지가 없으면 생략)
+            saved = f"약 {dd_stats['ocr_seconds_saved']:.1f}초 절약, " if dd_stats['ocr_seconds_saved'] else ""
+            print(f"  [중복 제거] 페이지 {dd_stats['pages_reused']}개 OCR 생략 ({saved}"
+                  f"블록이 달라 제외 {dd_stats['pages_rejected']}개), 블록 텍스트 재사용 {dd_stats['blocks_reused']}개 "
+                  f"(텍스트가 달라 제외 {dd_stats['blocks_rejected']}개), "
+                  f"재사용한 번역 대상 {dd_stats['chars_reused']}자 (해시 {dd_stats['hash_seconds']:.1f}초)")
+            dedup_index.close()
 
         print("\n--- 모든 페이지 처리 완료 ---")
         
-        # 3단계: 결과 파일로 저장
-        if magazine_map and all_page_results:
-            save_results(magazine_map, all_page_results)
-        else:
-            print("[알림] 처리된 결과가 없어 저장을 건너뜁니다.")
+        # 3단계: 결과 파일 마무리 (OCR에 실패한 페이지는 빈 블록으로 채움)
+        print("\n--- 3단계: 최종 결과 저장 마무리 ---")
+        with instrumentation.span("save"):
+            writer.close()
+
+        # 구간별 소요 시간 / 카운터 리포트 (TRACE_FILE이 있으면 Chrome trace도 저장)
+        instrumentation.recorder.print_report()
+        if instrumentation.TRACE_FILE:
+            n_events = instrumentation.recorder.write_chrome_trace(instrumentation.TRACE_FILE)
+            print(f"✅ [trace 저장] {instrumentation.TRACE_FILE} (이벤트 {n_events}개)")
 
 
     except Exception as e:
         print(f"🚨 [치명적 오류] 메인 작업 실행 중 오류 발생: {e}")
     
     finally:
+        if journal is not None:
+            journal.close()
         # 4단계: 임시 파일 정리
         cleanup_temp_files()
 
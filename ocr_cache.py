@@ -0,0 +1,159 @@
+# ocr_cache.py
+"""
+이미지 내용 해시 기반 OCR 결과 캐시입니다. (SQLite)
+같은 페이지를 다시 OCR하지 않도록, 이미지 바이트 + OCR 설정으로 만든 키에 결과를 저장합니다.
+
+두 단계로 저장합니다:
+- raw_lines: 신뢰도 필터링 전의 줄 단위 결과와 글자 유무 판별 결과 (이미지 + 언어 / 전처리 설정 기준)
+- paragraphs: 병합된 문단 (위 키 + 신뢰도 기준 + 병합 설정 기준, blocks.PageBlocks의 열 형식)
+신뢰도 기준이나 문단 병합(_group_lines_into_paragraphs)을 조정해도 raw_lines는 그대로 재사용되므로
+OCR을 다시 돌리지 않고 병합만 다시 합니다.
+"""
+
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from blocks import PageBlocks
+from ocr_processor import RawLines
+
+
+def image_key(image_bytes: bytes, languages: List[str], preprocess_config: Optional[Dict] = None) -> str:
+    """이미지 바이트 + OCR 언어 설정 (+ 축소/타일 전처리 설정)으로 만든 캐시 키 (SHA-256)"""
+    digest = hashlib.sha256(image_bytes)
+    digest.update(("\t" + ",".join(languages)).encode('utf-8'))
+    if preprocess_config:
+        digest.update(("\t" + json.dumps(preprocess_config, sort_keys=True)).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def paragraph_key(img_key: str, merge_config: Dict) -> str:
+    """raw_lines 키 + 필터링/병합 설정으로 만든 문단 캐시 키"""
+    config = json.dumps(merge_config, sort_keys=True)
+    return hashlib.sha256(f"{img_key}\t{config}".encode('utf-8')).hexdigest()
+
+
+class OcrCache:
+    """
+    사용 예:
+        cache = OcrCache(CACHE_DIR / "ocr_cache.sqlite3")
+        raw = cache.get_raw(key)             # 없으면 None
+        cache.put_raw(key, raw)
+    선읽기 스레드에서도 has_raw()로 조회하므로 연결 하나를 잠금으로 보호해 공유합니다.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS raw_lines (
+                key TEXT PRIMARY KEY,
+                n_lines INTEGER NOT NULL,
+                boxes BLOB NOT NULL,
+                probs BLOB NOT NULL,
+                texts TEXT NOT NULL,
+                created REAL NOT NULL,
+                prefilter TEXT
+            )
+        """)
+        # prefilter 열이 없던 이전 버전의 캐시 파일
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(raw_lines)")}
+        if 'prefilter' not in columns:
+            self._conn.execute("ALTER TABLE raw_lines ADD COLUMN prefilter TEXT")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS paragraphs (
+                key TEXT PRIMARY KEY,
+                raw_key TEXT NOT NULL,
+                data TEXT NOT NULL,
+                created REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+        # 통계 (실행 후 리포트용)
+        self.paragraph_hits = 0 # 문단까지 그대로 재사용
+        self.raw_hits = 0       # 줄 단위 결과만 재사용 (병합은 다시 함)
+        self.misses = 0         # OCR을 새로 돌려야 했던 횟수
+
+    # --- 줄 단위 결과 (압축 배열) ---
+    def has_raw(self, key: str) -> bool:
+        """줄 단위 결과가 있는지만 확인합니다. (선읽기에서 디코딩이 필요한지 판단용, 통계에 세지 않음)"""
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM raw_lines WHERE key = ?", (key,)).fetchone()
+        return row is not None
+
+    def get_raw(self, key: str) -> Optional[RawLines]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT n_lines, boxes, probs, texts, prefilter FROM raw_lines WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        n_lines, boxes, probs, texts, prefilter = row
+        self.raw_hits += 1
+        return RawLines(
+            np.frombuffer(boxes, dtype='<i4').reshape(n_lines, 4).astype(np.int32),
+            np.frombuffer(probs, dtype='<f4').astype(np.float32),
+            json.loads(texts),
+            json.loads(prefilter) if prefilter else None,
+        )
+
+    def get_prefilter(self, key: str) -> Optional[Dict]:
+        """줄 단위 결과와 함께 저장된 글자 유무 판별 결과 (문단 캐시 적중 시 결과 파일 기록용, 통계에 세지 않음)"""
+        with self._lock:
+            row = self._conn.execute("SELECT prefilter FROM raw_lines WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row is not None and row[0] else None
+
+    def put_raw(self, key: str, raw: RawLines):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO raw_lines (key, n_lines, boxes, probs, texts, created, prefilter) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, len(raw.texts),
+                 np.ascontiguousarray(raw.boxes, dtype='<i4').tobytes(),
+                 np.ascontiguousarray(raw.probs, dtype='<f4').tobytes(),
+                 json.dumps(raw.texts, ensure_ascii=False),
+                 time.time(),
+                 json.dumps(raw.prefilter) if raw.prefilter is not None else None)
+            )
+            self._conn.commit()
+
+    # --- 병합된 문단 ---
+    def get_paragraphs(self, key: str) -> Optional[PageBlocks]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM paragraphs WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self.paragraph_hits += 1
+        return PageBlocks.load(json.loads(row[0])) # 이전 버전의 문단 dict 리스트도 읽음
+
+    def put_paragraphs(self, key: str, raw_key: str, paragraphs: PageBlocks):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO paragraphs (key, raw_key, data, created) VALUES (?, ?, ?, ?)",
+                (key, raw_key, json.dumps(paragraphs.to_columns(), ensure_ascii=False, separators=(',', ':')),
+                 time.time())
+            )
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        return {
+            'paragraph_hits': self.paragraph_hits,
+            'raw_hits': self.raw_hits,
+            'misses': self.misses,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
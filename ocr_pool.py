@@ -0,0 +1,131 @@
+# ocr_pool.py
+"""
+프로세스 풀 기반 OCR 실행기입니다.
+스레드(asyncio.to_thread) 방식은 GIL과 torch 내부 스레드 풀을 서로 다투느라 CPU 전용 환경에서
+동시성을 늘려도 거의 빨라지지 않습니다. 여기서는 워커 프로세스마다 EasyOCR Reader를 한 번씩만 로드하고,
+torch 스레드 수를 (코어 수 / 워커 수)로 맞춰 코어 수만큼 처리량이 늘어나도록 합니다.
+
+워커는 이미지 경로 또는 공유 메모리(인코딩된 이미지 바이트)를 받아,
+줄 단위 결과를 압축 배열(ocr_processor.RawLines)로 돌려줍니다. 문단 병합은 부모 프로세스에서 합니다.
+"""
+
+import os
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import List, Dict, Optional, Union
+
+import ocr_processor
+
+
+# --- 1. 워커 프로세스 측 ---
+_worker_reader = None # 워커 프로세스마다 하나씩 로드되는 Reader
+
+
+def _init_worker(torch_threads: int):
+    """워커 프로세스 초기화: torch 스레드 수를 맞추고 Reader를 한 번만 준비합니다."""
+    global _worker_reader
+    import torch
+    torch.set_num_threads(torch_threads)
+    # 워커마다 모델 가중치를 시작할 때 한 번만 로드 (첫 페이지가 로드 시간을 기다리지 않도록)
+    _worker_reader = ocr_processor.init_reader(gpu=False)
+
+
+def _ping() -> bool:
+    return _worker_reader is not None
+
+
+def _ocr_path(image_path: str):
+    img_cv = ocr_processor.decode_image(Path(image_path))
+    return tuple(ocr_processor.read_raw_lines(img_cv, _worker_reader))
+
+
+def _ocr_shared(shm_name: str, size: int):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        img_cv = ocr_processor.decode_image(shm.buf[:size])
+    finally:
+        shm.close()
+    return tuple(ocr_processor.read_raw_lines(img_cv, _worker_reader))
+
+
+def _ocr_shared_batch(shm_name: str, spans: List[tuple]):
+    """공유 메모리 한 블록에 이어 붙인 여러 이미지를 디코딩해 배치 OCR합니다."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        images = [ocr_processor.decode_image(shm.buf[start:end]) for start, end in spans]
+    finally:
+        shm.close()
+    return [tuple(raw) for raw in ocr_processor.read_raw_lines_batch(images, _worker_reader)]
+
+
+# --- 2. 부모 프로세스 측 ---
+class OcrProcessPool:
+    """
+    워커 프로세스 N개에 OCR을 분배하는 풀입니다.
+    사용 예:
+        pool = OcrProcessPool(workers=4)
+        paragraphs = await pool.extract(image_path)
+        pool.shutdown()
+    """
+
+    def __init__(self, workers: int = 2, torch_threads: Optional[int] = None):
+        self.workers = workers
+        cpu_count = os.cpu_count() or 1
+        self.torch_threads = torch_threads or max(1, cpu_count // workers)
+        # torch는 fork 이후 동작이 불안정하므로 spawn 사용
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.torch_threads,),
+        )
+        print(f"✅ [OCR 프로세스 풀] 워커 {workers}개 (워커당 torch 스레드 {self.torch_threads}개)")
+
+    async def warm_up(self):
+        """워커 프로세스를 미리 모두 띄워 Reader를 로드해 둡니다. (워커는 원래 첫 작업이 들어올 때 생성됨)"""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(self._executor, _ping) for _ in range(self.workers)])
+
+    async def read_raw_lines(self, image: Union[Path, bytes]) -> ocr_processor.RawLines:
+        """이미지 경로 또는 인코딩된 바이트를 워커에서 OCR하고 RawLines를 돌려줍니다."""
+        loop = asyncio.get_running_loop()
+        if isinstance(image, (bytes, bytearray, memoryview)):
+            # 바이트는 공유 메모리로 넘겨 큰 이미지를 파이프로 복사하지 않음
+            shm = shared_memory.SharedMemory(create=True, size=max(1, len(image)))
+            try:
+                shm.buf[:len(image)] = image
+                result = await loop.run_in_executor(self._executor, _ocr_shared, shm.name, len(image))
+            finally:
+                shm.close()
+                shm.unlink()
+        else:
+            result = await loop.run_in_executor(self._executor, _ocr_path, str(image))
+        return ocr_processor.RawLines(*result)
+
+    async def read_raw_lines_batch(self, images: List[bytes]) -> List[ocr_processor.RawLines]:
+        """여러 페이지(인코딩된 바이트)를 워커 하나에서 배치 OCR합니다. (ocr_processor.read_raw_lines_batch)"""
+        loop = asyncio.get_running_loop()
+        spans, total = [], 0
+        for image in images:
+            spans.append((total, total + len(image)))
+            total += len(image)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, total))
+        try:
+            for image, (start, end) in zip(images, spans):
+                shm.buf[start:end] = image
+            results = await loop.run_in_executor(self._executor, _ocr_shared_batch, shm.name, spans)
+        finally:
+            shm.close()
+            shm.unlink()
+        return [ocr_processor.RawLines(*raw) for raw in results]
+
+    async def extract(self, image: Union[Path, bytes]) -> List[Dict]:
+        """ocr_processor.extract_structured_data와 같은 형식(문단 리스트)을 돌려줍니다."""
+        raw = await self.read_raw_lines(image)
+        return ocr_processor.merge_raw_lines(raw).to_paragraphs()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
@@ -1,28 +1,91 @@
 # ocr_processor.py
+"""
+EasyOCR 기반 OCR과 문단 병합입니다.
+torch / easyocr / cv2는 무거우므로 임포트 시점이 아니라 처음 쓸 때 불러옵니다.
+(처리할 ZIP이 없거나 모든 페이지가 캐시/체크포인트에 있으면 모델을 전혀 로드하지 않음)
+Reader는 get_reader()가 처음 불릴 때 한 번만 만들어지고, 미리 로드하려면 init_reader()를 호출합니다.
+"""
 
-import easyocr
-from PIL import Image
 from pathlib import Path
-from typing import List, Dict, Union
+from typing import List, Dict, Optional, Tuple, Union, NamedTuple
+from bisect import bisect_right
+import threading
 import numpy as np
 import os
 from dotenv import load_dotenv
-import torch
-import cv2
+
+import layout
+import prefilter
+from blocks import PageBlocks
+import preprocess
+import instrumentation
 
 load_dotenv()
 
-# --- 1. EasyOCR 모델 로드 ---
-reader = None # 전역 변수로 선언
-try:
-    gpu_available = torch.cuda.is_available()
-    print(f"✅ [EasyOCR] PyTorch CUDA 사용 가능: {gpu_available}")
-    print("✅ [EasyOCR] 모델 로드 시도 ('ja', 'en' 언어, GPU 사용)...")
-    reader = easyocr.Reader(['ja', 'en'], gpu=gpu_available)
+# --- 0. OCR 설정 ---
+OCR_LANGUAGES = ['ja', 'en']
+MIN_CONFIDENCE = 0.40 # 이 값보다 신뢰도가 낮은 줄은 버림
+MAX_VERTICAL_GAP_RATIO = 0.5 # 문단 병합 기준 (줄 높이 대비 세로 간격)
+MERGE_VERSION = 2 # 문단 병합 알고리즘을 바꾸면 올려서 캐시된 문단을 무효화
+RECOGNIZER_BATCH_SIZE = int(os.getenv("OCR_RECOGNIZER_BATCH_SIZE", 64)) # 배치 OCR 시 인식기 한 번에 넣을 글자 영역 수
+
+
+class RawLines(NamedTuple):
+    """
+    EasyOCR 줄 단위 결과의 압축 표현 (신뢰도 필터링 전).
+    프로세스 간 전달 / 캐시 저장 시 줄마다 dict를 만들지 않도록 배열로 보관합니다.
+    """
+    boxes: np.ndarray # (N, 4) int32, [x, y, w, h]
+    probs: np.ndarray # (N,) float32
+    texts: List[str]
+    prefilter: Optional[Dict] = None # 글자 유무 사전 판별 결과 (prefilter.PrefilterResult.to_dict, 판별 안 했으면 None)
+
+
+def _empty_raw_lines() -> RawLines:
+    return RawLines(np.zeros((0, 4), np.int32), np.zeros(0, np.float32), [])
+
+
+# --- 1. EasyOCR 모델 로드 (지연 로딩) ---
+def create_reader(languages: List[str] = OCR_LANGUAGES, gpu: bool = None):
+    """EasyOCR Reader를 생성합니다. gpu=None이면 CUDA 사용 가능 여부를 자동 감지합니다."""
+    import torch
+    import easyocr
+    cuda_available = torch.cuda.is_available()
+    if gpu is None:
+        gpu = cuda_available
+    print(f"✅ [EasyOCR] PyTorch CUDA 사용 가능: {cuda_available}")
+    print(f"✅ [EasyOCR] 모델 로드 시도 ({languages} 언어, GPU 사용: {gpu})...")
+    with instrumentation.span("ocr.load_model"):
+        new_reader = easyocr.Reader(languages, gpu=gpu)
     print("✅ [EasyOCR] 모델 로드가 완료되었습니다.")
-except Exception as e:
-    print(f"🚨 [치명적 오류] EasyOCR 모델 로드 실패: {e}")
-    reader = None
+    return new_reader
+
+
+reader = None # 프로세스 전역 Reader (init_reader / get_reader가 채움)
+_reader_lock = threading.Lock() # OCR 스레드 여러 개가 동시에 첫 호출을 해도 한 번만 로드
+
+
+def init_reader(languages: List[str] = OCR_LANGUAGES, gpu: bool = None):
+    """
+    전역 Reader를 (아직 없으면) 로드하고 반환합니다. 이미 로드되어 있으면 그대로 반환합니다.
+    워커 시작 시 미리 호출해 두면 첫 페이지에서 모델 로드 시간을 기다리지 않습니다.
+    """
+    global reader
+    if reader is not None:
+        return reader
+    with _reader_lock:
+        if reader is None:
+            try:
+                reader = create_reader(languages, gpu)
+            except Exception as e:
+                print(f"🚨 [치명적 오류] EasyOCR 모델 로드 실패: {e}")
+                raise RuntimeError("EasyOCR 모델(Reader)이 로드되지 않았습니다.") from e
+    return reader
+
+
+def get_reader():
+    """전역 Reader를 반환합니다. 처음 호출될 때 모델을 로드합니다."""
+    return reader if reader is not None else init_reader()
 
 def _convert_easyocr_box(bbox):
     """EasyOCR bbox를 [x, y, w, h]로 변환"""
@@ -40,112 +103,226 @@ def _convert_easyocr_box(bbox):
 # --- [신규] 문단 병합 함수 ---
 def _group_lines_into_paragraphs(lines: List[Dict], max_vertical_gap_ratio: float = 0.5) -> List[Dict]:
     """
-    EasyOCR의 줄 단위 결과를 세로 간격을 기준으로 문단으로 병합합니다.
+    EasyOCR의 줄 단위 결과를 단(column) / 세로쓰기를 고려해 문단으로 병합합니다. (layout.group_lines)
     Args:
         lines: [{'box': [x,y,w,h], 'text': '...'}, ...] 형태의 줄 리스트
-        max_vertical_gap_ratio: 줄 높이 대비 최대 허용 세로 간격 비율 (예: 0.5 = 줄 높이의 50%)
+        max_vertical_gap_ratio: 줄 높이 대비 최대 허용 줄 간격 비율 (예: 0.5 = 줄 높이의 50%)
     Returns:
-        병합된 문단 리스트 [{'box': [x,y,w,h], 'text': '...'}, ...]
+        읽는 순서로 정렬된 문단 리스트 [{'box': [x,y,w,h], 'text': '...'}, ...]
     """
     if not lines:
         return []
+    boxes = np.array([line['box'] for line in lines], dtype=np.int32).reshape(-1, 4)
+    return layout.group_lines(boxes, [line['text'] for line in lines], max_vertical_gap_ratio)
 
-    # y좌표 기준으로 줄 정렬 (위에서 아래로)
-    lines.sort(key=lambda item: item['box'][1])
 
-    paragraphs = []
-    current_paragraph_lines = []
+def decode_image(image: Union[Path, bytes]) -> np.ndarray:
+    """이미지 파일 경로 또는 인코딩된 바이트를 OpenCV BGR 배열로 디코딩합니다."""
+    with instrumentation.span("ocr.decode"):
+        if isinstance(image, (bytes, bytearray, memoryview)):
+            img_bytes = np.frombuffer(image, dtype=np.uint8)
+            name = "<memory>"
+        else:
+            img_bytes = np.fromfile(image, dtype=np.uint8)
+            name = Path(image).name
+        import cv2
+        img_cv = cv2.imdecode(img_bytes, cv2.IMREAD_COLOR)
+    if img_cv is None:
+        raise ValueError(f"OpenCV could not decode image: {name}")
+    return img_cv
+
 
-    for i, line in enumerate(lines):
-        line_box = line['box']
-        line_text = line['text']
-        line_y, line_h = line_box[1], line_box[3]
+def _convert_easyocr_boxes(bboxes: list) -> np.ndarray:
+    """EasyOCR bbox(꼭짓점 4개) 여러 개를 한 번에 (N, 4) int32 [x, y, w, h]로 변환"""
+    if not bboxes:
+        return np.zeros((0, 4), np.int32)
+    try:
+        points = np.asarray(bboxes, dtype=np.float64).reshape(len(bboxes), -1, 2)
+    except (ValueError, TypeError):
+        # 꼭짓점 수가 제각각인 경우 등: 줄마다 변환
+        return np.array([_convert_easyocr_box(bbox) for bbox in bboxes], dtype=np.int32).reshape(-1, 4)
+    mins = points.min(axis=1).astype(np.int32)
+    maxs = points.max(axis=1).astype(np.int32)
+    return np.concatenate([mins, maxs - mins], axis=1)
+
+
+def _raw_lines_from_results(result) -> RawLines:
+    """EasyOCR (bbox, text, prob) 결과 리스트를 RawLines로 변환합니다."""
+    boxes = _convert_easyocr_boxes([bbox for (bbox, _, _) in result])
+    probs = np.array([prob for (_, _, prob) in result], dtype=np.float32)
+    texts = [text for (_, text, _) in result]
+    return RawLines(boxes, probs, texts)
+
+
+def _read_images(images: List[np.ndarray], ocr_reader, recognizer_batch_size: int) -> List[RawLines]:
+    """
+    (전처리가 끝난) 이미지들을 EasyOCR로 읽습니다. 한 장이면 readtext, 여러 장이면 아래 배치 방식을 씁니다.
+    1. 검출(detect): 크기가 같은 이미지끼리 묶어 한 배치로 검출기에 넣습니다.
+       (검출기는 입력 크기에 맞춰 배율을 정하므로, 작은 이미지를 큰 크기로 패딩하면 한 장씩 읽을 때와 다른 배율로 검출됨)
+    2. 인식(recognize): 모든 이미지의 글자 영역을 세로로 이어 붙인 캔버스 하나에 모아
+       인식기에 큰 배치로 넣고, 결과를 y 위치로 다시 각 이미지에 나눠 줍니다.
+    """
+    if len(images) == 1:
+        with instrumentation.span("ocr.readtext"): # 검출 + 인식
+            result = ocr_reader.readtext(images[0], detail=1, paragraph=False)
+        return [_raw_lines_from_results(result)]
 
-        if not current_paragraph_lines:
-            # 첫 줄이거나 새 문단 시작
-            current_paragraph_lines.append(line)
+    # --- 1. 검출: 크기가 같은 이미지끼리 배치 (타일 / 같은 판형의 스캔은 대부분 크기가 같음) ---
+    groups: Dict[Tuple[int, ...], List[int]] = {}
+    for i, img in enumerate(images):
+        groups.setdefault(img.shape, []).append(i)
+    horizontal_lists, free_lists = [None] * len(images), [None] * len(images)
+    with instrumentation.span("ocr.detect", images=len(images), groups=len(groups)):
+        for indices in groups.values():
+            group_h, group_f = ocr_reader.detect(np.stack([images[i] for i in indices]), reformat=False)
+            for i, h_list, f_list in zip(indices, group_h, group_f):
+                horizontal_lists[i], free_lists[i] = h_list, f_list
+    max_w = max(img.shape[1] for img in images)
+
+    # --- 2. 인식: 흑백 이미지를 세로로 이어 붙이고 각 이미지 박스를 y 오프셋만큼 이동 ---
+    import cv2
+    offsets = []
+    total_h = 0
+    for img in images:
+        offsets.append(total_h)
+        total_h += img.shape[0]
+    canvas = np.full((total_h, max_w), 255, dtype=np.uint8)
+    all_horizontal, all_free = [], []
+    for img, offset, h_list, f_list in zip(images, offsets, horizontal_lists, free_lists):
+        h, w = img.shape[:2]
+        canvas[offset:offset + h, :w] = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        # 패딩 영역까지 걸친 박스는 이미지 안으로 잘라서 다음 이미지 내용이 섞이지 않도록 함
+        for x_min, x_max, y_min, y_max in h_list:
+            all_horizontal.append([max(0, x_min), min(w, x_max),
+                                   max(0, y_min) + offset, min(h, y_max) + offset])
+        for points in f_list:
+            all_free.append([[min(max(0, x), w), min(max(0, y), h) + offset] for x, y in points])
+
+    if not all_horizontal and not all_free:
+        return [_empty_raw_lines() for _ in images]
+
+    with instrumentation.span("ocr.recognize", regions=len(all_horizontal) + len(all_free)):
+        result = ocr_reader.recognize(canvas, all_horizontal, all_free, reformat=False,
+                                      batch_size=recognizer_batch_size)
+
+    # --- 3. 결과를 y 위치로 원래 이미지에 나눠 담고 좌표를 되돌림 ---
+    per_image = [[] for _ in images]
+    for bbox, text, prob in result:
+        top = min(point[1] for point in bbox)
+        image_idx = max(0, bisect_right(offsets, top) - 1)
+        offset = offsets[image_idx]
+        per_image[image_idx].append(([[x, y - offset] for x, y in bbox], text, prob))
+    return [_raw_lines_from_results(image_result) for image_result in per_image]
+
+
+def read_raw_lines_batch(images: List[np.ndarray], ocr_reader=None,
+                         recognizer_batch_size: int = RECOGNIZER_BATCH_SIZE) -> List[RawLines]:
+    """
+    여러 페이지를 한 번에 OCR합니다.
+    페이지마다 글자 유무를 먼저 판별(prefilter)해 글자가 없는 페이지는 OCR하지 않고, 후보 영역만 남긴 뒤
+    해상도 정책(preprocess: 글자 높이에 맞춘 축소, 큰 페이지는 겹치는 타일로 분할)을 적용합니다.
+    모든 페이지의 타일을 한 배치로 검출/인식하고 결과를 원본 좌표로 되돌려 페이지별로 합칩니다.
+    신뢰도 필터링은 하지 않습니다. (merge_raw_lines에서 처리)
+    Returns: 입력 순서대로의 RawLines 리스트 (판별 결과는 RawLines.prefilter)
+    """
+    if not images:
+        return []
+
+    with instrumentation.span("ocr.prefilter", pages=len(images)):
+        filters = [prefilter.run(img) for img in images]
+    for result in filters:
+        if result is not None:
+            instrumentation.count("ocr.prefilter.text_free_pages", 0 if result.has_text else 1)
+            instrumentation.count("ocr.prefilter.skipped_area", 1.0 - result.text_area_ratio) # 페이지 단위 면적
+
+    with instrumentation.span("ocr.preprocess", pages=len(images)):
+        plans = []
+        for img, result in zip(images, filters):
+            regions = None if result is None or result.is_full_page else result.regions
+            plans.append(preprocess.plan_page(img, regions))
+        tiles, spans = [], []
+        for img, plan in zip(images, plans):
+            page_tiles = preprocess.cut_tiles(img, plan) if plan.tiles else []
+            spans.append((len(tiles), len(tiles) + len(page_tiles)))
+            tiles.extend(page_tiles)
+
+    if tiles:
+        # 모델은 실제로 OCR할 영역이 있을 때만 로드 (글자 없는 페이지만 있는 배치는 로드하지 않음)
+        tile_raws = _read_images(tiles, ocr_reader or get_reader(), recognizer_batch_size)
+    results = []
+    for plan, (start, end), result in zip(plans, spans, filters):
+        if start == end:
+            raw = _empty_raw_lines()
+        elif plan.is_identity:
+            raw = tile_raws[start]
         else:
-            # 이전 줄과 비교하여 병합 여부 결정
-            prev_line = current_paragraph_lines[-1]
-            prev_box = prev_line['box']
-            prev_y, prev_h = prev_box[1], prev_box[3]
-
-            # 세로 간격 계산
-            vertical_gap = line_y - (prev_y + prev_h)
-            # 이전 줄 높이의 일정 비율 이하 간격이면 같은 문단으로 간주
-            max_allowed_gap = prev_h * max_vertical_gap_ratio
-
-            if vertical_gap <= max_allowed_gap:
-                # 같은 문단으로 병합
-                current_paragraph_lines.append(line)
-            else:
-                # 새 문단 시작 -> 이전까지의 문단 정보 확정 및 저장
-                # 1. 문단 텍스트 조합 (일본어는 줄바꿈 없이 이어붙임)
-                para_text = "".join(p_line['text'] for p_line in current_paragraph_lines)
-                # 2. 문단 전체 경계 상자 계산
-                min_x = min(p_line['box'][0] for p_line in current_paragraph_lines)
-                min_y = min(p_line['box'][1] for p_line in current_paragraph_lines)
-                max_x = max(p_line['box'][0] + p_line['box'][2] for p_line in current_paragraph_lines)
-                max_y = max(p_line['box'][1] + p_line['box'][3] for p_line in current_paragraph_lines)
-                para_box = [int(min_x), int(min_y), int(max_x - min_x), int(max_y - min_y)]
-
-                paragraphs.append({'box': para_box, 'text': para_text})
-
-                # 현재 줄로 새 문단 시작
-                current_paragraph_lines = [line]
-
-    # 마지막 문단 처리
-    if current_paragraph_lines:
-        para_text = "".join(p_line['text'] for p_line in current_paragraph_lines)
-        min_x = min(p_line['box'][0] for p_line in current_paragraph_lines)
-        min_y = min(p_line['box'][1] for p_line in current_paragraph_lines)
-        max_x = max(p_line['box'][0] + p_line['box'][2] for p_line in current_paragraph_lines)
-        max_y = max(p_line['box'][1] + p_line['box'][3] for p_line in current_paragraph_lines)
-        para_box = [int(min_x), int(min_y), int(max_x - min_x), int(max_y - min_y)]
-        paragraphs.append({'box': para_box, 'text': para_text})
+            raw = RawLines(*preprocess.merge_tile_results(plan, tile_raws[start:end]))
+        results.append(raw._replace(prefilter=result.to_dict() if result is not None else None))
+    return results
+
 
+def read_raw_lines(img_cv: np.ndarray, ocr_reader=None) -> RawLines:
+    """
+    디코딩된 이미지에서 EasyOCR 줄 단위 결과를 읽어 RawLines(배열, 원본 좌표)로 반환합니다.
+    신뢰도 필터링은 하지 않습니다. (merge_raw_lines에서 처리)
+    """
+    return read_raw_lines_batch([img_cv], ocr_reader)[0]
+
+
+def merge_raw_lines(raw: RawLines, min_confidence: float = MIN_CONFIDENCE,
+                    max_vertical_gap_ratio: float = MAX_VERTICAL_GAP_RATIO) -> PageBlocks:
+    """RawLines를 신뢰도로 거르고 문단으로 병합해 PageBlocks(번역 전)로 돌려줍니다."""
+    texts = [text.strip() for text in raw.texts]
+    # 신뢰도 필터링 + 텍스트가 비어있지 않은 줄만 남김
+    keep = (np.asarray(raw.probs) >= min_confidence) & np.array([bool(text) for text in texts], dtype=bool)
+    kept = np.flatnonzero(keep)
+    with instrumentation.span("ocr.merge", lines=len(kept)):
+        paragraphs = PageBlocks(*layout.group_lines_columns(raw.boxes[kept], [texts[i] for i in kept],
+                                                            max_vertical_gap_ratio))
+    instrumentation.count("ocr.lines", len(kept))
+    instrumentation.count("ocr.paragraphs", len(paragraphs))
     return paragraphs
 
 
-def extract_structured_data(image_path: Path) -> List[Dict[str, Union[str, List[int]]]]:
+def merge_config() -> Dict:
+    """현재 필터링/병합 설정 (OCR 캐시의 문단 키에 사용)"""
+    return {
+        'min_confidence': MIN_CONFIDENCE,
+        'max_vertical_gap_ratio': MAX_VERTICAL_GAP_RATIO,
+        'merge_version': MERGE_VERSION,
+    }
+
+
+def extract_raw_lines(image: Union[Path, bytes]) -> RawLines:
+    """이미지(경로 또는 인코딩 바이트)를 디코딩하고 줄 단위 결과(RawLines)를 반환합니다. 오류는 호출자에게 전달됩니다."""
+    return read_raw_lines(decode_image(image))
+
+
+def extract_raw_lines_batch(images: List[Union[Path, bytes]]) -> List[RawLines]:
+    """여러 이미지(경로 또는 인코딩 바이트)를 디코딩해 한 번에 배치 OCR합니다. 오류는 호출자에게 전달됩니다."""
+    return read_raw_lines_batch([decode_image(image) for image in images])
+
+
+def extract_structured_data(image_path: Union[Path, bytes], name: str = None) -> List[Dict[str, Union[str, List[int]]]]:
     """
-    하나의 이미지 파일에서 구조화된 OCR 데이터(문단 리스트)를 추출합니다.
+    하나의 이미지(파일 경로 또는 ZIP에서 읽은 인코딩 바이트)에서 구조화된 OCR 데이터(문단 리스트)를 추출합니다.
     EasyOCR로 줄 단위 추출 후 문단으로 병합합니다.
     """
-    if reader is None:
-        raise RuntimeError("EasyOCR 모델(Reader)이 로드되지 않았습니다.")
+    name = name or (Path(image_path).name if isinstance(image_path, (str, Path)) else "<memory>")
+    get_reader() # 모델 로드 실패는 페이지 오류가 아니므로 호출자에게 전달
 
     try:
         # --- 1. 이미지 로드 ---
-        img_bytes = np.fromfile(image_path, dtype=np.uint8)
-        img_cv = cv2.imdecode(img_bytes, cv2.IMREAD_COLOR)
-        if img_cv is None:
-            raise ValueError(f"OpenCV could not decode image: {image_path.name}")
+        img_cv = decode_image(image_path)
 
         # --- 2. EasyOCR 실행 (줄 단위) ---
-        result = reader.readtext(img_cv, detail=1, paragraph=False)
-
-        if not result:
-            return []
-
-        # --- 3. [수정] 줄 단위 결과를 파싱하여 리스트로 변환 ---
-        extracted_lines = []
-        for (bbox, text, prob) in result:
-            if prob < 0.40: # 신뢰도 필터링
-                continue
-            box_xywh = _convert_easyocr_box(bbox)
-            # 텍스트가 비어있지 않은 경우만 추가
-            if text.strip():
-                extracted_lines.append({
-                    'box': box_xywh,
-                    'text': text.strip()
-                })
-
-        # --- 4. [신규] 줄들을 문단으로 병합 ---
-        processed_paragraphs = _group_lines_into_paragraphs(extracted_lines)
+        raw = read_raw_lines(img_cv)
+
+        # --- 3. 신뢰도 필터링 후 줄들을 문단으로 병합 ---
+        processed_paragraphs = merge_raw_lines(raw).to_paragraphs()
 
         return processed_paragraphs # 최종 문단 리스트 반환
 
     except Exception as e:
-        print(f"🚨 [OCR 오류] {image_path.name} 처리 중 오류 발생: {e}")
-        return []
\ No newline at end of file
+        print(f"🚨 [OCR 오류] {name} 처리 중 오류 발생: {e}")
+        return []
@@ -0,0 +1,178 @@
+# output_writer.py
+"""
+매거진별 결과 파일을 페이지 순서대로 조금씩 써 나가는 스트리밍 writer입니다.
+페이지가 끝나면(그리고 그 앞 페이지들이 모두 끝났으면) 바로 파일에 쓰고 메모리에서 버립니다.
+순서가 앞서 끝난 페이지만 잠시 들고 있으므로 매거진이 커져도 메모리 사용량이 거의 일정합니다.
+
+출력 형식 (OUTPUT_FORMAT):
+- json (기본): 기존과 같은 구조/들여쓰기의 JSON. 다 쓰기 전에는 '.part' 파일에 쓰고 끝나면 이름을 바꿉니다.
+- ndjson: 첫 줄은 매거진 정보, 이후 한 줄에 페이지 하나. 쓰는 도중에도 한 줄씩 읽을 수 있습니다.
+- msgpack: ndjson과 같은 순서의 MessagePack 객체 스트림 (msgpack 패키지 필요)
+
+페이지의 블록은 blocks.PageBlocks 그대로 들고 있다가 쓸 때 블록별 dict 없이 바로 직렬화합니다.
+"""
+
+import os
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from blocks import PageBlocks
+from page_source import PageRef
+
+OUTPUT_FORMATS = ('json', 'ndjson', 'msgpack')
+_EXTENSIONS = {'json': '.json', 'ndjson': '.ndjson', 'msgpack': '.msgpack'}
+
+
+def _dump_page(page_data: dict, indent: Optional[int]) -> str:
+    """json.dumps(page_data, indent=indent)와 같은 JSON (indent=None이면 공백 없이). 블록은 PageBlocks.to_json으로 씀"""
+    if indent is None:
+        parts = [json.dumps(key) + ":" + (value.to_json() if isinstance(value, PageBlocks)
+                                          else json.dumps(value, ensure_ascii=False, separators=(',', ':')))
+                 for key, value in page_data.items()]
+        return "{" + ",".join(parts) + "}"
+    pad = " " * indent
+    parts = [pad + json.dumps(key) + ": " + (value.to_json(indent, level=1) if isinstance(value, PageBlocks)
+                                             else json.dumps(value, ensure_ascii=False, indent=indent).replace("\n", "\n" + pad))
+             for key, value in page_data.items()]
+    return "{\n" + ",\n".join(parts) + "\n}"
+
+
+class MagazineWriter:
+    """
+    매거진 하나의 결과 파일 writer입니다.
+    사용 예:
+        writer = MagazineWriter("weekly_01", total_pages=3, out_dir=OUTPUT_DIR)
+        writer.add(1, "002.jpg", blocks) # 순서와 무관하게 호출 가능 (index는 0부터)
+        writer.close()                # 빠진 페이지는 빈 블록으로 채우고 마무리
+    """
+
+    def __init__(self, magazine_name: str, total_pages: int, out_dir: Path, fmt: str = 'json'):
+        if fmt not in OUTPUT_FORMATS:
+            raise ValueError(f"지원하지 않는 출력 형식: {fmt} (가능: {', '.join(OUTPUT_FORMATS)})")
+        if fmt == 'msgpack':
+            import msgpack # 선택 의존성: msgpack 형식을 쓸 때만 필요
+            self._packer = msgpack.Packer()
+        self.magazine_name = magazine_name
+        self.total_pages = total_pages
+        self.fmt = fmt
+        self.path = Path(out_dir) / f"{magazine_name}_translated{_EXTENSIONS[fmt]}"
+        # json은 완성되기 전까지 유효한 JSON이 아니므로 임시 파일에 씀
+        self._write_path = self.path.with_name(self.path.name + '.part') if fmt == 'json' else self.path
+        self._file = None # 첫 페이지를 쓸 때 엶 (매거진이 많아도 동시에 열린 파일 수를 줄임)
+        self._pending: Dict[int, dict] = {} # 앞 페이지를 기다리는 중인 페이지들
+        self.next_index = 0
+        self.closed = False
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self._write_path, 'wb')
+            self._write_header()
+
+    # --- 형식별 쓰기 ---
+    def _write_header(self):
+        header = {'magazine_name': self.magazine_name, 'total_pages': self.total_pages}
+        if self.fmt == 'json':
+            # json.dump(..., indent=2)과 같은 모양이 되도록 직접 조립
+            self._file.write((
+                "{\n"
+                f'  "magazine_name": {json.dumps(self.magazine_name, ensure_ascii=False)},\n'
+                f'  "total_pages": {self.total_pages},\n'
+                '  "pages": ['
+            ).encode('utf-8'))
+        elif self.fmt == 'ndjson':
+            self._file.write((json.dumps(header, ensure_ascii=False) + "\n").encode('utf-8'))
+        else:
+            self._file.write(self._packer.pack(header))
+
+    def _write_page(self, page_data: dict):
+        if self.fmt == 'json':
+            body = _dump_page(page_data, indent=2).replace("\n", "\n    ")
+            self._file.write((("," if self.next_index > 0 else "") + "\n    " + body).encode('utf-8'))
+        elif self.fmt == 'ndjson':
+            self._file.write((_dump_page(page_data, indent=None) + "\n").encode('utf-8'))
+        else:
+            chunks = [self._packer.pack_map_header(len(page_data))]
+            for key, value in page_data.items():
+                chunks.append(self._packer.pack(key))
+                chunks.append(value.pack(self._packer) if isinstance(value, PageBlocks) else self._packer.pack(value))
+            self._file.write(b"".join(chunks))
+
+    def _write_footer(self):
+        if self.fmt == 'json':
+            self._file.write(("\n  ]\n}" if self.next_index > 0 else "]\n}").encode('utf-8'))
+
+    # --- 공개 API ---
+    def add(self, index: int, filename: str, blocks: Union[PageBlocks, List[dict]], page_info: Optional[dict] = None):
+        """
+        index번째 페이지(0부터) 결과를 넘깁니다. 앞 페이지들이 모두 끝났으면 바로 파일에 씁니다.
+        page_info가 있으면 페이지 항목에 그대로 덧붙입니다. (예: {'ocr_prefilter': {...}})
+        """
+        if self.closed or index < self.next_index or index in self._pending:
+            return # 이미 쓴 페이지 (중복 호출 무시)
+        self._pending[index] = {
+            'page_number': index + 1,
+            'original_filename': filename,
+            'blocks': PageBlocks.load(blocks),
+            **(page_info or {}),
+        }
+        wrote = False
+        while self.next_index in self._pending:
+            self._open()
+            self._write_page(self._pending.pop(self.next_index))
+            self.next_index += 1
+            wrote = True
+        if wrote:
+            self._file.flush() # 읽는 쪽에서 바로 볼 수 있도록
+        if self.next_index >= self.total_pages:
+            self.close()
+
+    def close(self, filenames: List[str] = None):
+        """마무리합니다. 아직 결과가 없는 페이지는 빈 블록으로 채웁니다. (filenames: 페이지 순서의 파일 이름)"""
+        if self.closed:
+            return
+        self._open()
+        while self.next_index < self.total_pages:
+            page_data = self._pending.pop(self.next_index, None)
+            if page_data is None:
+                filename = filenames[self.next_index] if filenames else ""
+                page_data = {'page_number': self.next_index + 1, 'original_filename': filename, 'blocks': PageBlocks()}
+            self._write_page(page_data)
+            self.next_index += 1
+        self._write_footer()
+        self._file.close()
+        if self._write_path != self.path:
+            os.replace(self._write_path, self.path)
+        self.closed = True
+        print(f"  ✅ [저장 성공] {self.path}")
+
+
+class OutputWriter:
+    """
+    여러 매거진의 MagazineWriter를 묶어, PageRef로 결과를 받아 해당 매거진 파일에 흘려 넣습니다.
+    사용 예:
+        writer = OutputWriter(magazine_map, OUTPUT_DIR, fmt="ndjson")
+        writer.add(page, blocks)   # 페이지가 끝날 때마다
+        writer.close()
+    """
+
+    def __init__(self, magazine_map: Dict[str, List[PageRef]], out_dir: Path, fmt: str = 'json'):
+        Path(out_dir).mkdir(parents=True, exist_ok=True)
+        self._magazine_map = magazine_map
+        self._index: Dict[PageRef, tuple] = {}
+        self._writers: Dict[str, MagazineWriter] = {}
+        for magazine_name, pages in magazine_map.items():
+            self._writers[magazine_name] = MagazineWriter(magazine_name, len(pages), out_dir, fmt)
+            for i, page in enumerate(pages):
+                self._index[page] = (magazine_name, i)
+
+    def add(self, page: PageRef, blocks: Union[PageBlocks, List[dict]], page_info: Optional[dict] = None):
+        location = self._index.get(page)
+        if location is None:
+            return
+        magazine_name, i = location
+        self._writers[magazine_name].add(i, page.name, blocks, page_info)
+
+    def close(self):
+        for magazine_name, writer in self._writers.items():
+            writer.close([page.name for page in self._magazine_map[magazine_name]])
@@ -0,0 +1,69 @@
+# page_source.py
+"""
+입력 ZIP 안의 페이지 이미지를 가리키는 참조(PageRef)와 열거 함수들입니다.
+'stream' 모드에서는 ZIP을 02_temp_images에 풀지 않고, 페이지를 처리할 때 해당 멤버의 바이트만 읽어
+메모리에서 바로 디코딩합니다. (디스크 쓰기/재읽기 없음, 필요한 디스크 공간 없음)
+"""
+
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import Iterator, Optional
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+@dataclass(frozen=True)
+class PageRef:
+    """
+    매거진 페이지 하나에 대한 가벼운 참조입니다. (이미지 바이트는 들고 있지 않음)
+    zip_path + member로 ZIP 안의 위치를, crc/size로 페이지 내용의 지문을 나타냅니다.
+    extract 모드에서는 extracted_path에 압축 해제된 파일 경로가 들어갑니다.
+    """
+    magazine_name: str
+    zip_path: Path
+    member: str
+    crc: int
+    size: int
+    extracted_path: Optional[Path] = None
+
+    @property
+    def name(self) -> str:
+        """파일 이름 (예: '001.jpg')"""
+        return PurePosixPath(self.member).name
+
+    @property
+    def fingerprint(self) -> str:
+        """ZIP 중앙 디렉터리의 CRC32 + 크기로 만든 페이지 내용 지문 (바이트를 읽지 않고 얻을 수 있음)"""
+        return f"{self.crc:08x}-{self.size}"
+
+    def read_bytes(self) -> bytes:
+        """인코딩된 이미지 바이트를 읽습니다. (압축 해제된 파일이 있으면 그 파일에서)"""
+        if self.extracted_path is not None:
+            return self.extracted_path.read_bytes()
+        with zipfile.ZipFile(self.zip_path, 'r') as zip_ref:
+            return zip_ref.read(self.member)
+
+
+def _is_image_member(info: zipfile.ZipInfo) -> bool:
+    if info.is_dir():
+        return False
+    path = PurePosixPath(info.filename)
+    # macOS 압축 시 생기는 '__MACOSX/._001.jpg' 같은 메타데이터 파일 제외
+    if "__MACOSX" in path.parts or path.name.startswith("._"):
+        return False
+    return path.suffix.lower() in IMAGE_EXTENSIONS
+
+
+def iter_zip_pages(zip_path: Path, magazine_name: Optional[str] = None) -> Iterator[PageRef]:
+    """
+    ZIP의 중앙 디렉터리만 읽어 이미지 멤버들을 페이지 순서(이름순)로 PageRef로 내보냅니다.
+    이미지 바이트는 읽지 않습니다.
+    """
+    magazine_name = magazine_name or zip_path.stem
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        infos = sorted((info for info in zip_ref.infolist() if _is_image_member(info)),
+                       key=lambda info: info.filename)
+    for info in infos:
+        yield PageRef(magazine_name, zip_path, info.filename, info.CRC, info.file_size)
+
@@ -0,0 +1,198 @@
+# pipeline.py
+
+import time
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, Awaitable, Callable, Iterable, List, Optional, Union
+
+import instrumentation
+from instrumentation import percentile
+
+
+# 스테이지 사이 큐에 넣는 종료 신호
+_STOP = object()
+
+
+@dataclass
+class Stage:
+    """
+    파이프라인의 한 단계입니다.
+    func: 입력 항목 하나를 받아 다음 단계로 넘길 결과를 돌려주는 비동기 함수 (None이면 다음 단계로 넘기지 않음)
+    workers: 이 단계를 동시에 처리할 워커 수
+    batch_size: 지정하면 func는 항목 리스트(최대 batch_size개)를 받아 결과 리스트를 돌려줍니다.
+                워커는 첫 항목을 기다린 뒤, 큐에 이미 쌓여 있는 항목만 더 모읍니다. (배치를 채우려고 기다리지 않음)
+    weight / max_batch_weight: 지정하면 배치 항목들의 weight 합이 max_batch_weight를 넘지 않게 모읍니다.
+                (예: 페이지별 메모리 추정치. 첫 항목은 혼자라도 항상 처리하고, 넘치는 항목은 다음 배치의 첫 항목이 됨)
+    """
+    name: str
+    func: Callable[[Any], Awaitable[Any]]
+    workers: int = 1
+    batch_size: Optional[int] = None
+    weight: Optional[Callable[[Any], float]] = None
+    max_batch_weight: Optional[float] = None
+
+
+@dataclass
+class StageStats:
+    """스테이지별 처리량 / 바쁜 시간 / 입력 큐 깊이 통계."""
+    name: str
+    workers: int
+    queue_maxsize: int = 0
+    items: int = 0
+    errors: int = 0
+    busy_time: float = 0.0
+    queue_samples: int = 0
+    queue_depth_sum: int = 0
+    queue_depth_max: int = 0
+    latencies: List[float] = field(default_factory=list) # 항목별 처리 시간(초)
+
+    def sample_queue(self, depth: int):
+        self.queue_samples += 1
+        self.queue_depth_sum += depth
+        self.queue_depth_max = max(self.queue_depth_max, depth)
+
+    def utilization(self, elapsed: float) -> float:
+        """워커들이 실제로 일한 시간 비율 (1.0 = 모든 워커가 항상 바쁨)."""
+        if elapsed <= 0 or self.workers <= 0:
+            return 0.0
+        return self.busy_time / (self.workers * elapsed)
+
+    def avg_queue_depth(self) -> float:
+        return self.queue_depth_sum / self.queue_samples if self.queue_samples else 0.0
+
+    def latency_percentiles(self) -> dict:
+        return {
+            'p50': percentile(self.latencies, 50),
+            'p95': percentile(self.latencies, 95),
+            'p99': percentile(self.latencies, 99),
+        }
+
+
+@dataclass
+class PipelineReport:
+    elapsed: float
+    stages: List[StageStats] = field(default_factory=list)
+
+    def bottleneck(self) -> Optional[StageStats]:
+        """가동률이 가장 높은 스테이지 (병목 후보)."""
+        if not self.stages:
+            return None
+        return max(self.stages, key=lambda s: s.utilization(self.elapsed))
+
+    def print_report(self):
+        print(f"\n--- 파이프라인 스테이지 통계 (총 {self.elapsed:.1f}초) ---")
+        for s in self.stages:
+            print(f"  [{s.name:<10}] 워커 {s.workers}개 | 처리 {s.items}건 (오류 {s.errors}) | "
+                  f"가동률 {s.utilization(self.elapsed):.0%} | "
+                  f"입력 큐 평균 {s.avg_queue_depth():.1f} / 최대 {s.queue_depth_max} (한도 {s.queue_maxsize or '∞'})")
+        bottleneck = self.bottleneck()
+        if bottleneck is not None:
+            print(f"  -> 병목 후보: '{bottleneck.name}' 스테이지 (워커 수를 늘려 보세요)")
+
+
+async def _run_workers(stage: Stage, stats: StageStats, in_queue: asyncio.Queue, out_queue: asyncio.Queue):
+    """한 스테이지의 워커 하나: 입력 큐에서 꺼내 처리하고 결과를 다음 큐로 넘깁니다."""
+    stopping = False
+    carry = _STOP # 무게 한도 때문에 앞 배치에 넣지 못하고 꺼내 둔 항목
+    limited = stage.weight is not None and stage.max_batch_weight is not None
+    while not stopping:
+        if carry is not _STOP:
+            item, carry = carry, _STOP
+        else:
+            item = await in_queue.get()
+        if item is _STOP:
+            break
+        batch = [item]
+        weight = stage.weight(item) if limited else 0
+        while len(batch) < (stage.batch_size or 1) and not in_queue.empty():
+            item = in_queue.get_nowait()
+            if item is _STOP: # 이 워커의 종료 신호: 모아 둔 배치까지만 처리하고 종료
+                stopping = True
+                break
+            if limited:
+                if weight + stage.weight(item) > stage.max_batch_weight:
+                    carry = item
+                    break
+                weight += stage.weight(item)
+            batch.append(item)
+
+        started = time.perf_counter()
+        try:
+            if stage.batch_size is not None:
+                results = await stage.func(batch)
+            else:
+                results = [await stage.func(batch[0])]
+        except Exception as e:
+            stats.errors += len(batch)
+            print(f"🚨 [파이프라인 오류] '{stage.name}' 스테이지 처리 중 오류: {e}")
+            results = []
+        finally:
+            elapsed = time.perf_counter() - started
+            stats.busy_time += elapsed
+            stats.latencies.extend([elapsed] * len(batch)) # 배치 안의 항목은 모두 배치 전체 시간만큼 걸린 것으로 봄
+            instrumentation.observe(f"stage.{stage.name}", elapsed, items=len(batch))
+        stats.items += len(batch)
+        for result in results:
+            if result is not None:
+                await out_queue.put(result)
+
+
+async def _sample_queues(queues: List[asyncio.Queue], stats: List[StageStats], interval: float):
+    while True:
+        for queue, s in zip(queues, stats):
+            s.sample_queue(queue.qsize())
+        await asyncio.sleep(interval)
+
+
+async def run_pipeline(items: Union[Iterable[Any], AsyncIterable[Any]], stages: List[Stage], queue_size: int = 8,
+                       sample_interval: float = 0.1):
+    """
+    항목들을 여러 스테이지(예: OCR -> 번역)에 흘려보내는 스트리밍 파이프라인입니다.
+    스테이지 사이에는 크기가 제한된 큐가 있어, 앞 단계가 너무 앞서가면 자동으로 기다립니다.
+    각 스테이지의 워커 수는 독립적으로 정할 수 있습니다.
+    items가 비동기 이터러블이면 항목이 생길 때마다 넣고, 이터러블이 끝나야 파이프라인을 닫습니다.
+    (상주 서비스처럼 작업이 들어오는 대로 한 파이프라인에 계속 넣을 때)
+
+    Returns:
+        (마지막 스테이지 결과 리스트(완료 순서), PipelineReport)
+    """
+    # 첫 스테이지의 입력 큐도 제한해 항목 생성기(items)를 필요한 만큼만 소비합니다.
+    queues = [asyncio.Queue(maxsize=queue_size) for _ in stages]
+    results_queue: asyncio.Queue = asyncio.Queue()
+    stats = [StageStats(name=s.name, workers=s.workers, queue_maxsize=queue_size) for s in stages]
+
+    started = time.perf_counter()
+    sampler = asyncio.create_task(_sample_queues(queues, stats, sample_interval))
+
+    stage_tasks = []
+    for i, stage in enumerate(stages):
+        out_queue = queues[i + 1] if i + 1 < len(stages) else results_queue
+        stage_tasks.append([
+            asyncio.create_task(_run_workers(stage, stats[i], queues[i], out_queue))
+            for _ in range(stage.workers)
+        ])
+
+    try:
+        if hasattr(items, '__aiter__'):
+            async for item in items:
+                await queues[0].put(item)
+        else:
+            for item in items:
+                await queues[0].put(item)
+
+        # 앞 스테이지부터 차례로 종료: 워커 수만큼 종료 신호를 넣고 모두 끝나길 기다림
+        for i, stage in enumerate(stages):
+            for _ in range(stage.workers):
+                await queues[i].put(_STOP)
+            await asyncio.gather(*stage_tasks[i])
+    finally:
+        sampler.cancel()
+        for tasks in stage_tasks:
+            for task in tasks:
+                task.cancel()
+
+    results = []
+    while not results_queue.empty():
+        results.append(results_queue.get_nowait())
+
+    return results, PipelineReport(elapsed=time.perf_counter() - started, stages=stats)
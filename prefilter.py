@@ -0,0 +1,176 @@
+# prefilter.py
+"""
+OCR 전 글자 유무 사전 판별(prefilter)입니다.
+
+매거진에는 전면 사진 / 광고처럼 글자가 거의 없는 페이지가 많은데, EasyOCR은 이런 페이지에도
+검출 + 인식을 전부 돌립니다. 여기서는 작게 줄인 흑백 이미지에서 (OCR 없이 수 ms)
+1. 획 경계(morphological gradient)를 이진화하고 연결 요소 중 글자 크기/모양인 것만 고릅니다.
+2. 글자 덩어리를 글자 높이만큼 팽창시켜 이웃끼리 묶어 후보 영역(글줄 / 문단 덩어리)을 만듭니다.
+3. 글자 수가 적거나 덩어리 높이가 제각각인 영역(사진의 질감, 잡티)은 버립니다.
+후보 영역이 없으면 페이지 전체를 OCR하지 않습니다. (OCR_PREFILTER=page, 기본)
+OCR_PREFILTER=region이면 후보 영역이 있는 페이지도 그 영역만 잘라서 OCR합니다.
+후보 영역이 페이지 대부분을 덮으면 자르지 않고 페이지 전체를 OCR합니다.
+
+판별 결과(PrefilterResult.to_dict)는 결과 파일의 페이지 항목에 'ocr_prefilter'로 기록됩니다.
+"""
+
+import os
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# off: 사용 안 함 / page: 글자 없는 페이지만 건너뜀 (기본) / region: 후보 영역만 OCR
+# region은 후보 영역에서 빠진 글자를 놓칠 수 있으므로 bench_prefilter.py로 텍스트 일치율을 확인한 뒤 켜세요
+PREFILTER_MODE = os.getenv("OCR_PREFILTER", "page").lower()
+PREFILTER_MODES = ('off', 'page', 'region')
+ANALYSIS_MAX_SIDE = 1024      # 판별용으로 줄일 크기
+MIN_EDGE_CONTRAST = 48        # 글자 획 경계로 볼 최소 밝기 차이 (0~255)
+MIN_REGION_CHARS = 4          # 후보 영역 하나에 글자 덩어리가 이보다 적으면 버림
+MAX_HEIGHT_SPREAD = 0.6       # 영역 안 글자 높이의 (중앙 절대 편차 / 중앙값)가 이보다 크면 글자가 아니라고 봄
+REGION_PADDING = 1.0          # 후보 영역을 글자 높이의 이 배수만큼 넓혀서 자름
+FULL_PAGE_RATIO = 0.6         # 후보 영역 면적 합이 페이지의 이 비율 이상이면 자르지 않고 전체를 OCR
+
+
+@dataclass
+class PrefilterResult:
+    """페이지 하나의 판별 결과. regions는 원본 좌표 [x, y, w, h] (전체 페이지를 OCR하면 페이지 전체 한 개)"""
+    has_text: bool
+    regions: List[Tuple[int, int, int, int]] = field(default_factory=list)
+    text_area_ratio: float = 0.0 # OCR할 면적 / 페이지 면적
+    n_components: int = 0        # 글자로 본 연결 요소 수
+    elapsed_ms: float = 0.0
+
+    @property
+    def is_full_page(self) -> bool:
+        return self.has_text and self.text_area_ratio >= 1.0
+
+    def to_dict(self) -> dict:
+        return {
+            'has_text': self.has_text,
+            'regions': [list(region) for region in self.regions],
+            'text_area_ratio': round(self.text_area_ratio, 4),
+            'n_components': self.n_components,
+            'elapsed_ms': round(self.elapsed_ms, 2),
+        }
+
+
+def prefilter_config() -> dict:
+    """현재 판별 설정 (OCR 캐시 키에 사용: 설정이 바뀌면 OCR하는 영역도 달라짐)"""
+    if PREFILTER_MODE == 'off':
+        return {'prefilter': 'off'}
+    return {
+        'prefilter': PREFILTER_MODE,
+        'min_edge_contrast': MIN_EDGE_CONTRAST,
+        'min_region_chars': MIN_REGION_CHARS,
+        'max_height_spread': MAX_HEIGHT_SPREAD,
+        'region_padding': REGION_PADDING,
+        'full_page_ratio': FULL_PAGE_RATIO,
+    }
+
+
+def _char_components(gray: np.ndarray) -> np.ndarray:
+    """글자 크기/모양의 연결 요소 stats (N, 5: x, y, w, h, area). 흰 바탕 검은 글자 / 반전 모두 잡음"""
+    import cv2
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+    gradient = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, kernel)
+    # 사진의 부드러운 질감은 경계가 약하므로 Otsu 값이 낮게 나와도 MIN_EDGE_CONTRAST 미만은 버림
+    otsu, _ = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    _, binary = cv2.threshold(gradient, max(otsu, MIN_EDGE_CONTRAST), 255, cv2.THRESH_BINARY)
+    _, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    stats = stats[1:]
+    widths = stats[:, cv2.CC_STAT_WIDTH]
+    heights = stats[:, cv2.CC_STAT_HEIGHT]
+    plausible = (heights >= 4) & (heights <= 0.08 * gray.shape[0]) \
+        & (widths <= 8 * heights) & (6 * widths >= heights)
+    return stats[plausible]
+
+
+def _merge_overlapping(boxes: List[List[int]]) -> List[List[int]]:
+    """겹치는 [x0, y0, x1, y1] 상자들을 합칩니다. (합친 결과가 다시 겹치면 반복)"""
+    merged = True
+    while merged:
+        merged = False
+        result = []
+        for box in boxes:
+            for other in result:
+                if box[0] < other[2] and other[0] < box[2] and box[1] < other[3] and other[1] < box[3]:
+                    other[:] = [min(box[0], other[0]), min(box[1], other[1]),
+                                max(box[2], other[2]), max(box[3], other[3])]
+                    merged = True
+                    break
+            else:
+                result.append(list(box))
+        boxes = result
+    return boxes
+
+
+def analyze_page(img: np.ndarray) -> PrefilterResult:
+    """페이지에서 글자가 있을 만한 영역을 찾습니다."""
+    import cv2
+    started = time.perf_counter()
+    h, w = img.shape[:2]
+    gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    scale = min(1.0, ANALYSIS_MAX_SIDE / max(h, w))
+    if scale < 1.0:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    chars = _char_components(gray)
+    regions = []
+    if len(chars):
+        char_h = float(np.median(chars[:, cv2.CC_STAT_HEIGHT]))
+        # 글자 덩어리를 그린 마스크를 팽창시켜 이웃 글자끼리 한 영역으로 묶음
+        mask = np.zeros(gray.shape, dtype=np.uint8)
+        for x, y, cw, ch, _ in chars.tolist():
+            mask[y:y + ch, x:x + cw] = 255
+        size = max(3, int(round(char_h)) | 1)
+        mask = cv2.dilate(mask, cv2.getStructuringElement(cv2.MORPH_RECT, (size, size)))
+        n_labels, labels, region_stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        centers_x = chars[:, 0] + chars[:, 2] // 2
+        centers_y = chars[:, 1] + chars[:, 3] // 2
+        char_labels = labels[centers_y, centers_x]
+        for label in range(1, n_labels):
+            heights = chars[char_labels == label, cv2.CC_STAT_HEIGHT].astype(np.float64)
+            if len(heights) < MIN_REGION_CHARS:
+                continue
+            median = np.median(heights)
+            if np.median(np.abs(heights - median)) > MAX_HEIGHT_SPREAD * median:
+                continue
+            x, y, rw, rh = region_stats[label, :4].tolist()
+            pad = REGION_PADDING * median
+            regions.append([
+                max(0, int((x - pad) / scale)), max(0, int((y - pad) / scale)),
+                min(w, int(np.ceil((x + rw + pad) / scale))), min(h, int(np.ceil((y + rh + pad) / scale))),
+            ])
+
+    regions = _merge_overlapping(regions)
+    area = sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in regions) / float(h * w)
+    result = PrefilterResult(has_text=bool(regions), n_components=int(len(chars)))
+    if area >= FULL_PAGE_RATIO:
+        result.regions, result.text_area_ratio = [(0, 0, w, h)], 1.0
+    else:
+        result.regions = [(x0, y0, x1 - x0, y1 - y0) for x0, y0, x1, y1 in sorted(regions, key=lambda r: (r[1], r[0]))]
+        result.text_area_ratio = area
+    result.elapsed_ms = (time.perf_counter() - started) * 1000
+    return result
+
+
+def run(img: np.ndarray, mode: str = None) -> Optional[PrefilterResult]:
+    """
+    설정된 모드로 판별합니다. mode='off'면 None (판별 안 함)
+    mode='page'면 글자가 있는 페이지는 항상 전체 페이지 한 영역으로 돌려줍니다.
+    """
+    mode = mode or PREFILTER_MODE
+    if mode not in PREFILTER_MODES:
+        raise ValueError(f"지원하지 않는 OCR_PREFILTER 값: {mode} (가능: {', '.join(PREFILTER_MODES)})")
+    if mode == 'off':
+        return None
+    result = analyze_page(img)
+    if mode == 'page' and result.has_text and not result.is_full_page:
+        h, w = img.shape[:2]
+        result.regions, result.text_area_ratio = [(0, 0, w, h)], 1.0
+    return result
@@ -0,0 +1,279 @@
+# preprocess.py
+"""
+OCR 전 해상도 정책 (축소 + 타일 분할) 입니다.
+
+600dpi 스캔을 원본 해상도 그대로 검출기에 넣으면 느리고 메모리를 많이 씁니다.
+1. 글자 높이 측정: 작게 줄인 흑백 이미지에서 연결 요소(글자 덩어리)의 높이 중앙값을 구합니다. (OCR 없이 수 ms)
+2. 축소: 글자 높이가 TARGET_TEXT_HEIGHT 정도가 되도록 줄입니다. (확대는 하지 않음, 기본은 꺼짐)
+3. 타일 분할: 축소 후에도 긴 변이 TILE_SIZE보다 크면 겹치는 타일로 나눕니다.
+   타일들은 한 배치로 OCR되고(ocr_processor.read_raw_lines_batch), 결과 상자는 원본 좌표로 되돌린 뒤
+   - 같은 이음선에서 양쪽으로 잘린 한 줄의 조각들은 하나의 상자/텍스트로 이어 붙이고
+   - 겹친 영역에서 두 번 검출된 상자는 NMS로 하나만 남깁니다.
+   한 줄이 겹침보다 길면 어느 타일에서도 온전히 검출되지 않으므로, 조각을 버리면 글자가 사라집니다.
+4. 글자 영역(prefilter): 사전 판별이 찾은 후보 영역이 있으면 페이지 전체 대신 그 영역들만 타일로 자릅니다.
+"""
+
+import os
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+import prefilter
+
+load_dotenv()
+
+# 축소 목표 글자 높이(px, 예: 32). 0이면 축소하지 않음 (기본)
+# 축소하면 작은 글자의 인식 결과가 달라질 수 있으므로 bench_preprocess.py로 텍스트 일치율을 확인한 뒤 켜세요
+TARGET_TEXT_HEIGHT = int(os.getenv("OCR_TARGET_TEXT_HEIGHT", 0))
+# 축소 후 긴 변이 이보다 크면 타일로 나눔. 0이면 나누지 않음 (기본)
+# 이음선에 걸친 줄의 인식 결과가 달라질 수 있으므로 bench_preprocess.py로 텍스트 일치율을 확인한 뒤 켜세요
+TILE_SIZE = int(os.getenv("OCR_TILE_SIZE", 0))
+# 타일 사이 최소 겹침(px, 축소 후 기준). 실제 겹침은 글자 높이의 4배와 이 값 중 큰 쪽
+TILE_OVERLAP = int(os.getenv("OCR_TILE_OVERLAP", 128))
+MIN_SCALE = 0.25              # 아무리 글자가 커도 이보다 작게 줄이지 않음
+ANALYSIS_MAX_SIDE = 1600      # 글자 높이 측정용으로 줄일 크기
+MIN_COMPONENTS = 20           # 글자 덩어리가 이보다 적으면 측정 결과를 믿지 않음 (축소 안 함)
+NMS_OVERLAP_THRESHOLD = 0.5   # 작은 상자 면적 대비 겹침이 이 이상이면 같은 줄로 봄
+
+
+@dataclass
+class PagePlan:
+    """페이지 하나의 전처리 계획: 축소 배율과 (축소 좌표 기준) 타일 영역 [x0, y0, x1, y1]"""
+    scale: float = 1.0
+    tiles: List[Tuple[int, int, int, int]] = field(default_factory=list)
+    text_height: Optional[float] = None # 측정된 원본 글자 높이(px), 측정 실패 시 None
+    cropped: bool = False # 페이지 전체가 아니라 글자 후보 영역만 자른 경우
+
+    @property
+    def is_identity(self) -> bool:
+        return self.scale == 1.0 and len(self.tiles) <= 1 and not self.cropped
+
+
+def preprocess_config() -> dict:
+    """현재 전처리 설정 (OCR 캐시 키에 사용: 설정이 바뀌면 줄 단위 결과도 달라짐)"""
+    return {
+        'target_text_height': TARGET_TEXT_HEIGHT,
+        'tile_size': TILE_SIZE,
+        'tile_overlap': TILE_OVERLAP,
+        **prefilter.prefilter_config(),
+    }
+
+
+def _to_gray(img: np.ndarray) -> np.ndarray:
+    import cv2 # cv2는 임포트가 느리므로 실제로 이미지를 다룰 때 불러옴
+    return img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+
+def estimate_text_height(img: np.ndarray) -> Optional[float]:
+    """페이지의 대표 글자 높이(px, 원본 기준)를 추정합니다. 글자를 충분히 찾지 못하면 None"""
+    import cv2
+    gray = _to_gray(img)
+    analysis_scale = min(1.0, ANALYSIS_MAX_SIDE / max(gray.shape[:2]))
+    if analysis_scale < 1.0:
+        gray = cv2.resize(gray, None, fx=analysis_scale, fy=analysis_scale, interpolation=cv2.INTER_AREA)
+
+    # 글자 = 배경보다 어두운 덩어리 (Otsu 이진화 후 연결 요소)
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    _, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    areas = stats[1:, cv2.CC_STAT_AREA]
+
+    # 잡티, 괘선, 사진 같은 덩어리는 제외
+    plausible = (heights >= 3) & (heights <= 0.1 * gray.shape[0]) \
+        & (widths <= 4 * heights) & (4 * widths >= heights) \
+        & (areas >= 0.1 * widths * heights)
+    if np.count_nonzero(plausible) < MIN_COMPONENTS:
+        return None
+    return float(np.median(heights[plausible])) / analysis_scale
+
+
+def _tile_starts(length: int, tile: int, overlap: int) -> List[int]:
+    if length <= tile:
+        return [0]
+    step = max(1, tile - overlap)
+    starts = list(range(0, length - tile, step))
+    starts.append(length - tile) # 마지막 타일은 끝에 맞춤
+    return starts
+
+
+def plan_page(img: np.ndarray, regions: Optional[List[Tuple[int, int, int, int]]] = None) -> PagePlan:
+    """
+    이미지 크기와 글자 높이로 축소 배율과 타일을 정합니다.
+    regions(원본 좌표 [x, y, w, h] 리스트)가 있으면 그 영역들만 타일로 나눕니다. (빈 리스트면 타일 없음)
+    """
+    h, w = img.shape[:2]
+    plan = PagePlan()
+    if TARGET_TEXT_HEIGHT > 0:
+        plan.text_height = estimate_text_height(img)
+        if plan.text_height is not None and plan.text_height > TARGET_TEXT_HEIGHT:
+            plan.scale = max(MIN_SCALE, TARGET_TEXT_HEIGHT / plan.text_height)
+
+    scaled_w, scaled_h = round(w * plan.scale), round(h * plan.scale)
+    if regions is None:
+        areas = [(0, 0, scaled_w, scaled_h)]
+    else:
+        plan.cropped = True
+        areas = [(int(x * plan.scale), int(y * plan.scale),
+                  min(scaled_w, round((x + rw) * plan.scale)), min(scaled_h, round((y + rh) * plan.scale)))
+                 for x, y, rw, rh in regions]
+
+    text_h = (plan.text_height or 0) * plan.scale
+    overlap = int(max(TILE_OVERLAP, 4 * text_h))
+    for ax0, ay0, ax1, ay1 in areas:
+        area_w, area_h = ax1 - ax0, ay1 - ay0
+        if area_w <= 0 or area_h <= 0:
+            continue
+        if TILE_SIZE > 0 and max(area_w, area_h) > TILE_SIZE:
+            plan.tiles.extend(
+                (ax0 + x, ay0 + y, min(ax1, ax0 + x + TILE_SIZE), min(ay1, ay0 + y + TILE_SIZE))
+                for y in _tile_starts(area_h, TILE_SIZE, overlap)
+                for x in _tile_starts(area_w, TILE_SIZE, overlap)
+            )
+        else:
+            plan.tiles.append((ax0, ay0, ax1, ay1))
+    return plan
+
+
+def cut_tiles(img: np.ndarray, plan: PagePlan) -> List[np.ndarray]:
+    """계획대로 축소하고 타일 이미지 리스트를 돌려줍니다. (타일은 축소 이미지의 view)"""
+    if plan.scale != 1.0:
+        import cv2
+        img = cv2.resize(img, None, fx=plan.scale, fy=plan.scale, interpolation=cv2.INTER_AREA)
+    return [img[y0:y1, x0:x1] for x0, y0, x1, y1 in plan.tiles]
+
+
+def _suppress_duplicates(boxes: np.ndarray, scores: np.ndarray, tile_ids: np.ndarray) -> np.ndarray:
+    """
+    서로 다른 타일에서 같은 줄을 검출한 상자 중 점수가 높은 쪽만 남기는 인덱스를 돌려줍니다.
+    겹침 = 교집합 / 작은 상자 면적 (타일 경계에서 잘린 조각이 온전한 상자에 포함되는 경우도 제거)
+    """
+    order = np.argsort(-scores, kind='stable')
+    x0, y0 = boxes[:, 0], boxes[:, 1]
+    x1, y1 = x0 + boxes[:, 2], y0 + boxes[:, 3]
+    areas = np.maximum(boxes[:, 2], 1) * np.maximum(boxes[:, 3], 1)
+    suppressed = np.zeros(len(boxes), dtype=bool)
+    keep = []
+    for i in order.tolist():
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        inter_w = np.clip(np.minimum(x1, x1[i]) - np.maximum(x0, x0[i]), 0, None)
+        inter_h = np.clip(np.minimum(y1, y1[i]) - np.maximum(y0, y0[i]), 0, None)
+        overlap = inter_w * inter_h / np.minimum(areas, areas[i])
+        suppressed |= (overlap >= NMS_OVERLAP_THRESHOLD) & (tile_ids != tile_ids[i])
+    return np.array(sorted(keep), dtype=np.int64)
+
+
+def _stitch_text(head: str, tail: str, overlap_chars: int) -> str:
+    """
+    이음선 앞 조각(head)과 뒤 조각(tail)의 텍스트를 잇습니다.
+    겹친 영역의 글자는 양쪽에 다 들어 있으므로, head의 끝과 tail의 앞이 같은 구간을 찾아 한 번만 남깁니다.
+    (잘린 글자가 잘못 읽혀 같은 구간을 못 찾으면 겹친 폭에 비례한 글자 수 overlap_chars만큼 tail 앞을 버림)
+    """
+    tolerance = max(2, overlap_chars // 2)
+    for k in range(min(len(head), len(tail)), 0, -1):
+        if abs(k - overlap_chars) <= tolerance and head.endswith(tail[:k]):
+            return head + tail[k:]
+    return head + tail[min(len(tail), overlap_chars):]
+
+
+def _merge_seam_pieces(boxes: np.ndarray, probs: np.ndarray, texts: list, cuts: np.ndarray, tile_ids: np.ndarray):
+    """
+    타일 이음선에서 잘린 한 줄의 조각들을 하나로 합칩니다.
+    앞 조각은 이음선 쪽(오른쪽/아래쪽)이, 뒤 조각은 반대쪽(왼쪽/위쪽)이 잘려 있고
+    두 조각이 겹친 영역에서 어긋나게 겹치며 줄 방향과 수직으로 충분히 겹치면 같은 줄로 봅니다.
+    cuts: (N, 4) bool [왼, 위, 오른, 아래]가 타일 안쪽 경계에 닿았는지
+    """
+    boxes = boxes.astype(np.float64)
+    probs, texts, cuts, tile_ids = probs.copy(), list(texts), cuts.copy(), tile_ids.copy()
+    alive = np.ones(len(boxes), dtype=bool)
+    merged = True
+    while merged:
+        merged = False
+        for i in np.flatnonzero(alive & (cuts[:, 2] | cuts[:, 3])).tolist():
+            if not alive[i]:
+                continue
+            x0, y0 = boxes[:, 0], boxes[:, 1]
+            x1, y1 = x0 + boxes[:, 2], y0 + boxes[:, 3]
+            for axis, (lo, hi, cross_lo, cross_hi) in enumerate(((x0, x1, y0, y1), (y0, y1, x0, x1))):
+                # axis 0: 가로 이음선 (줄이 좌우로 이어짐), axis 1: 세로 이음선 (세로쓰기 줄이 위아래로 이어짐)
+                if not cuts[i, 2 + axis]:
+                    continue
+                cross = np.clip(np.minimum(cross_hi, cross_hi[i]) - np.maximum(cross_lo, cross_lo[i]), 0, None)
+                cross_len = np.maximum(np.minimum(cross_hi - cross_lo, cross_hi[i] - cross_lo[i]), 1)
+                candidates = alive & cuts[:, axis] & (tile_ids != tile_ids[i]) \
+                    & (lo > lo[i]) & (lo < hi[i]) & (hi > hi[i]) \
+                    & (cross / cross_len >= NMS_OVERLAP_THRESHOLD)
+                if not candidates.any():
+                    continue
+                j = int(np.flatnonzero(candidates)[np.argmax(cross[candidates])])
+                overlap_px = hi[i] - lo[j]
+                overlap_chars = round(len(texts[j]) * overlap_px / max(1.0, hi[j] - lo[j]))
+                texts[i] = _stitch_text(texts[i], texts[j], overlap_chars)
+                nx0, ny0 = min(x0[i], x0[j]), min(y0[i], y0[j])
+                nx1, ny1 = max(x1[i], x1[j]), max(y1[i], y1[j])
+                boxes[i] = (nx0, ny0, nx1 - nx0, ny1 - ny0)
+                probs[i] = min(probs[i], probs[j])
+                # 합친 상자의 뒤쪽 끝은 뒤 조각의 끝: 거기서 또 잘렸으면 다음 이음선에서 계속 이어 붙임
+                cuts[i, 2 + axis] = cuts[j, 2 + axis]
+                cuts[i, 1 - axis] |= cuts[j, 1 - axis]
+                cuts[i, 3 - axis] |= cuts[j, 3 - axis]
+                tile_ids[i] = tile_ids[j]
+                alive[j] = False
+                merged = True
+                break
+    keep = np.flatnonzero(alive)
+    return boxes[keep], probs[keep], [texts[k] for k in keep.tolist()], cuts[keep], tile_ids[keep]
+
+
+def merge_tile_results(plan: PagePlan, tile_results: List[tuple]):
+    """
+    타일별 (boxes, probs, texts) 결과를 원본 좌표로 되돌려 합치고 중복을 제거합니다.
+    Returns: (boxes (N, 4) int32 [x, y, w, h], probs (N,) float32, texts)
+    """
+    all_boxes, all_probs, all_texts, all_tiles, cut = [], [], [], [], []
+    page_w = max(t[2] for t in plan.tiles)
+    page_h = max(t[3] for t in plan.tiles)
+    for tile_id, ((tx0, ty0, tx1, ty1), (boxes, probs, texts, *_)) in enumerate(zip(plan.tiles, tile_results)):
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        if not len(boxes):
+            continue
+        # 타일 안쪽 경계(페이지 가장자리가 아닌 쪽)에 닿은 상자는 잘렸을 수 있음 [왼, 위, 오른, 아래]
+        touches = np.zeros((len(boxes), 4), dtype=bool)
+        if tx0 > 0:
+            touches[:, 0] = boxes[:, 0] <= 1
+        if ty0 > 0:
+            touches[:, 1] = boxes[:, 1] <= 1
+        if tx1 < page_w:
+            touches[:, 2] = boxes[:, 0] + boxes[:, 2] >= (tx1 - tx0) - 1
+        if ty1 < page_h:
+            touches[:, 3] = boxes[:, 1] + boxes[:, 3] >= (ty1 - ty0) - 1
+        boxes[:, 0] += tx0
+        boxes[:, 1] += ty0
+        all_boxes.append(boxes / plan.scale)
+        all_probs.append(np.asarray(probs, dtype=np.float32))
+        all_texts.extend(texts)
+        all_tiles.append(np.full(len(boxes), tile_id))
+        cut.append(touches)
+
+    if not all_boxes:
+        return np.zeros((0, 4), np.int32), np.zeros(0, np.float32), []
+
+    boxes = np.concatenate(all_boxes)
+    probs = np.concatenate(all_probs)
+    if len(plan.tiles) > 1:
+        # 이음선에서 잘린 조각들을 먼저 이어 붙인 뒤, 겹친 영역의 중복 검출을 제거
+        boxes, probs, all_texts, cuts, tile_ids = _merge_seam_pieces(
+            boxes, probs, all_texts, np.concatenate(cut), np.concatenate(all_tiles))
+        boxes = np.rint(boxes).astype(np.int32)
+        # 잘리지 않은 상자를 우선, 그다음 신뢰도 순
+        scores = probs + np.where(cuts.any(axis=1), 0.0, 1.0)
+        keep = _suppress_duplicates(boxes, scores, tile_ids)
+        boxes, probs = boxes[keep], probs[keep]
+        all_texts = [all_texts[i] for i in keep.tolist()]
+    else:
+        boxes = np.rint(boxes).astype(np.int32)
+    return boxes, probs, all_texts
@@ -0,0 +1,170 @@
+# rate_limiter.py
+
+import os
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import instrumentation
+
+
+# --- 1. 기본 설정 (.env로 덮어쓸 수 있음) ---
+# Azure F0(무료) 등급 기준: 시간당 200만 자 ≈ 분당 약 33,000자
+DEFAULT_CHARS_PER_MINUTE = 33000
+DEFAULT_REQUESTS_PER_SECOND = 10.0
+DEFAULT_INITIAL_CONCURRENCY = 2
+DEFAULT_MAX_CONCURRENCY = 16
+
+
+class TokenBucket:
+    """
+    토큰 버킷 방식의 속도 제한기입니다.
+    rate(초당 보충량)만큼 토큰이 차오르며, 최대 capacity까지 쌓입니다.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    async def acquire(self, amount: float = 1.0):
+        """
+        토큰 amount개를 확보할 때까지 기다립니다.
+        capacity보다 큰 요청은 버킷이 가득 찰 때까지 기다린 뒤 amount 전체를 가져가고,
+        모자란 만큼은 빚(음수 잔량)으로 남겨 다음 요청들이 그만큼 더 기다리게 합니다.
+        """
+        need = min(amount, self.capacity)
+        async with self._lock: # 먼저 온 요청부터 순서대로 토큰을 가져감
+            while True:
+                self._refill()
+                if self._tokens >= need:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((need - self._tokens) / self.rate)
+
+
+class AzureRateLimiter:
+    """
+    번역 요청 전체가 공유하는 속도 제한기입니다.
+    - 분당 문자 수 / 초당 요청 수를 토큰 버킷으로 제한
+    - 429 응답의 Retry-After 동안 모든 요청을 일시 정지
+    - 동시 요청 수를 AIMD 방식으로 조절 (성공 시 +1, 429 시 절반)
+    """
+
+    def __init__(self,
+                 chars_per_minute: int = DEFAULT_CHARS_PER_MINUTE,
+                 requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+                 initial_concurrency: int = DEFAULT_INITIAL_CONCURRENCY,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 min_concurrency: int = 1):
+        self.char_bucket = TokenBucket(chars_per_minute / 60.0, chars_per_minute)
+        self.request_bucket = TokenBucket(requests_per_second, max(1.0, requests_per_second))
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.concurrency = max(min_concurrency, min(initial_concurrency, max_concurrency))
+
+        self._in_flight = 0
+        self._successes_since_change = 0
+        self._paused_until = 0.0
+        self._cond = asyncio.Condition()
+        self._wake_tasks = set() # _notify가 만든 태스크 (참조를 들고 있지 않으면 실행 중에 GC될 수 있음)
+
+        # 통계 (실행 후 리포트용)
+        self.throttled_count = 0
+        self.request_count = 0
+
+    @classmethod
+    def from_env(cls) -> "AzureRateLimiter":
+        """.env의 AZURE_CHARS_PER_MINUTE / AZURE_REQUESTS_PER_SECOND / AZURE_MAX_CONCURRENCY 값으로 생성합니다."""
+        return cls(
+            chars_per_minute=int(os.getenv("AZURE_CHARS_PER_MINUTE", DEFAULT_CHARS_PER_MINUTE)),
+            requests_per_second=float(os.getenv("AZURE_REQUESTS_PER_SECOND", DEFAULT_REQUESTS_PER_SECOND)),
+            max_concurrency=int(os.getenv("AZURE_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)),
+        )
+
+    @asynccontextmanager
+    async def slot(self, n_chars: int):
+        """
+        요청 1회를 보낼 권한을 얻습니다.
+        동시 요청 한도 -> Retry-After 정지 -> 요청 수 / 문자 수 토큰 순으로 대기합니다.
+        """
+        started = time.perf_counter()
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._in_flight < self.concurrency)
+            self._in_flight += 1
+        acquired = time.perf_counter()
+        instrumentation.observe("translate.wait.concurrency", acquired - started)
+        try:
+            await self.acquire_tokens(n_chars)
+            instrumentation.observe("translate.wait.rate_limit", time.perf_counter() - acquired)
+            yield
+        finally:
+            async with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
+
+    async def acquire_tokens(self, n_chars: int):
+        """
+        Retry-After 정지가 끝나길 기다린 뒤 요청 1회 / n_chars자 만큼의 토큰을 가져갑니다. (동시성 한도는 보지 않음)
+        토큰을 기다리는 사이 새 429로 정지가 걸렸을 수 있으므로, 토큰을 확보한 뒤에도 정지가 끝날 때까지 다시 기다립니다.
+        """
+        await self._wait_pause()
+        await self.request_bucket.acquire(1)
+        await self.char_bucket.acquire(n_chars)
+        await self._wait_pause()
+        self.request_count += 1
+
+    async def _wait_pause(self):
+        """_paused_until이 지날 때까지 기다립니다. (기다리는 중에 정지가 연장되면 그만큼 더 기다림)"""
+        while True:
+            delay = self._paused_until - time.monotonic()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    def on_success(self):
+        """성공 응답: 현재 동시성만큼 연속 성공하면 동시성을 1 늘립니다. (Additive Increase)"""
+        self._successes_since_change += 1
+        if self._successes_since_change >= self.concurrency and self.concurrency < self.max_concurrency:
+            self.concurrency += 1
+            self._successes_since_change = 0
+            self._notify()
+
+    def on_throttle(self, retry_after: Optional[float] = None):
+        """429 응답: 동시성을 절반으로 줄이고 Retry-After 동안 새 요청을 멈춥니다. (Multiplicative Decrease)"""
+        self.throttled_count += 1
+        self.concurrency = max(self.min_concurrency, self.concurrency // 2)
+        self._successes_since_change = 0
+        wait = retry_after if retry_after is not None else 1.0
+        self._paused_until = max(self._paused_until, time.monotonic() + wait)
+
+    def _notify(self):
+        async def _wake():
+            async with self._cond:
+                self._cond.notify_all()
+        task = asyncio.ensure_future(_wake())
+        self._wake_tasks.add(task)
+        task.add_done_callback(self._wake_done)
+
+    def _wake_done(self, task: asyncio.Task):
+        self._wake_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"⚠️ [속도 제한] 대기 중인 요청 깨우기 실패: {task.exception()}")
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After 헤더(초 단위)를 float로 변환합니다. 값이 없거나 잘못되면 None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
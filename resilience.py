@@ -0,0 +1,262 @@
+# resilience.py
+"""
+번역 API 호출의 재시도 / 마감 시간 / 헤징 / 서킷 브레이커입니다.
+
+- 재시도: 429, 5xx, 타임아웃, 네트워크 오류는 지수 백오프(full jitter)로 다시 보냅니다.
+  Retry-After 헤더가 있으면 그 시간보다 먼저 보내지 않습니다.
+- 마감 시간: 요청 1회(attempt)의 제한 시간과, 재시도를 포함한 전체 제한 시간을 따로 둡니다.
+- 헤징(선택): 요청이 hedge_after초 안에 끝나지 않으면 같은 요청을 한 번 더 보내 먼저 온 응답을 씁니다.
+  (번역 요청은 멱등이므로 안전하지만 문자 수 한도를 두 번 씁니다. 기본값은 꺼짐)
+- 서킷 브레이커: 엔드포인트별로 연속 실패가 쌓이면 일정 시간 요청을 보내지 않고,
+  그 뒤 시험 요청 하나가 성공하면 다시 엽니다. (429는 한도 문제이므로 실패로 세지 않음)
+
+최종 실패는 TranslationFailure(status, detail) 예외로 알려, 호출자가 번역문 대신 상태로 기록하게 합니다.
+"""
+
+import os
+import time
+import random
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional
+
+import httpx
+
+import instrumentation
+from rate_limiter import AzureRateLimiter, parse_retry_after
+
+
+# --- 1. 기본 설정 (.env로 덮어쓸 수 있음) ---
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_BASE = 0.5      # 첫 재시도 대기 상한(초). 이후 2배씩
+DEFAULT_BACKOFF_MAX = 30.0
+DEFAULT_REQUEST_TIMEOUT = 30.0  # 요청 1회 제한 시간(초)
+DEFAULT_DEADLINE = 120.0        # 재시도를 포함한 전체 제한 시간(초)
+DEFAULT_HEDGE_AFTER = 0.0       # 0이면 헤징하지 않음
+DEFAULT_BREAKER_THRESHOLD = 5   # 연속 실패 이 횟수면 서킷을 엶
+DEFAULT_BREAKER_RESET = 30.0    # 서킷을 연 뒤 시험 요청까지 기다리는 시간(초)
+
+# 실패 상태 (번역 블록의 translation_status에 그대로 기록)
+STATUS_THROTTLED = "throttled"       # 429가 계속됨
+STATUS_SERVER_ERROR = "server_error" # 5xx가 계속됨
+STATUS_HTTP_ERROR = "http_error"     # 재시도해도 소용없는 4xx (키 오류, 요청 형식 등)
+STATUS_TIMEOUT = "timeout"
+STATUS_NETWORK_ERROR = "network_error"
+STATUS_CIRCUIT_OPEN = "circuit_open"
+
+
+class TranslationFailure(Exception):
+    """재시도 후에도 번역 요청이 실패했을 때 발생합니다. status는 위 STATUS_* 중 하나"""
+
+    def __init__(self, status: str, detail: str = ""):
+        super().__init__(f"{status}: {detail}" if detail else status)
+        self.status = status
+        self.detail = detail
+
+
+@dataclass
+class RetryPolicy:
+    max_retries: int = DEFAULT_MAX_RETRIES
+    backoff_base: float = DEFAULT_BACKOFF_BASE
+    backoff_max: float = DEFAULT_BACKOFF_MAX
+    request_timeout: float = DEFAULT_REQUEST_TIMEOUT
+    deadline: float = DEFAULT_DEADLINE
+    hedge_after: float = DEFAULT_HEDGE_AFTER
+
+    @classmethod
+    def from_env(cls) -> "RetryPolicy":
+        """.env의 AZURE_MAX_RETRIES / AZURE_REQUEST_TIMEOUT / AZURE_DEADLINE / AZURE_HEDGE_AFTER 등으로 생성합니다."""
+        return cls(
+            max_retries=int(os.getenv("AZURE_MAX_RETRIES", DEFAULT_MAX_RETRIES)),
+            backoff_base=float(os.getenv("AZURE_BACKOFF_BASE", DEFAULT_BACKOFF_BASE)),
+            backoff_max=float(os.getenv("AZURE_BACKOFF_MAX", DEFAULT_BACKOFF_MAX)),
+            request_timeout=float(os.getenv("AZURE_REQUEST_TIMEOUT", DEFAULT_REQUEST_TIMEOUT)),
+            deadline=float(os.getenv("AZURE_DEADLINE", DEFAULT_DEADLINE)),
+            hedge_after=float(os.getenv("AZURE_HEDGE_AFTER", DEFAULT_HEDGE_AFTER)),
+        )
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """attempt번째(1부터) 재시도 전 대기 시간: [0, base * 2^(attempt-1)] 균등 분포, Retry-After 이상"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1))))
+        return max(delay, retry_after) if retry_after is not None else delay
+
+
+class CircuitBreaker:
+    """
+    엔드포인트 하나의 서킷 브레이커입니다.
+    closed(정상) -> 연속 실패 threshold회 -> open(요청 차단) -> reset_timeout 후 half_open(시험 요청 1개)
+    -> 성공하면 closed, 실패하면 다시 open
+    """
+
+    def __init__(self, failure_threshold: int = DEFAULT_BREAKER_THRESHOLD,
+                 reset_timeout: float = DEFAULT_BREAKER_RESET):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self.open_count = 0 # 통계 (실행 후 리포트용)
+
+    @classmethod
+    def from_env(cls) -> "CircuitBreaker":
+        return cls(
+            failure_threshold=int(os.getenv("AZURE_BREAKER_THRESHOLD", DEFAULT_BREAKER_THRESHOLD)),
+            reset_timeout=float(os.getenv("AZURE_BREAKER_RESET", DEFAULT_BREAKER_RESET)),
+        )
+
+    def allow(self) -> bool:
+        """지금 요청을 보내도 되는지. half_open에서는 시험 요청 하나만 허용합니다."""
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = "half_open"
+            self._trial_in_flight = False
+        if self._trial_in_flight:
+            return False
+        self._trial_in_flight = True
+        return True
+
+    def seconds_until_trial(self) -> float:
+        """다음 시험 요청까지 남은 시간 (open이 아니면 0)"""
+        if self.state != "open":
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def on_success(self):
+        if self.state != "closed":
+            print("✅ [서킷 브레이커] 시험 요청 성공, 요청을 다시 보냅니다.")
+        self.state = "closed"
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def on_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            self.open_count += 1
+            instrumentation.count("translate.circuit_open")
+            print(f"🚨 [서킷 브레이커] 연속 실패 {self.failures}회, {self.reset_timeout:.0f}초 동안 요청을 멈춥니다.")
+
+    def release(self):
+        """결과를 판정하지 않고 끝난 시험 요청(4xx, 429 등)의 자리를 돌려줍니다."""
+        self._trial_in_flight = False
+
+
+# 엔드포인트별로 프로세스 안에서 공유하는 브레이커
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def breaker_for(endpoint: str) -> CircuitBreaker:
+    if endpoint not in _breakers:
+        _breakers[endpoint] = CircuitBreaker.from_env()
+    return _breakers[endpoint]
+
+
+# --- 2. 요청 실행 ---
+async def _hedged(post: Callable[[], Awaitable[httpx.Response]], hedge_after: float,
+                  limiter: Optional[AzureRateLimiter], n_chars: int) -> httpx.Response:
+    """post()를 보내고, hedge_after초 안에 끝나지 않으면 한 번 더 보내 먼저 성공한 응답을 돌려줍니다."""
+    tasks = {asyncio.ensure_future(post())}
+    try:
+        if hedge_after > 0:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+            if not done:
+                instrumentation.count("translate.hedged")
+                if limiter is not None:
+                    await limiter.acquire_tokens(n_chars) # 중복 요청도 한도를 쓰므로 토큰을 같이 가져감
+                tasks.add(asyncio.ensure_future(post()))
+        error = None
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = error or task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def send_with_retries(post: Callable[[], Awaitable[httpx.Response]], n_chars: int,
+                            policy: RetryPolicy, breaker: CircuitBreaker,
+                            limiter: Optional[AzureRateLimiter] = None) -> httpx.Response:
+    """
+    요청 1회를 보내는 post()를 정책에 따라 재시도하며 실행하고, 성공(2xx) 응답을 돌려줍니다.
+    limiter가 있으면 매 시도마다 limiter.slot을 거치고, 429 / 성공을 limiter에 알립니다.
+    최종 실패는 TranslationFailure로 알립니다.
+    """
+    deadline = time.monotonic() + policy.deadline
+    attempt = 0
+    while True:
+        if not breaker.allow():
+            wait = max(breaker.seconds_until_trial(), policy.backoff_base)
+            if time.monotonic() + wait >= deadline:
+                raise TranslationFailure(STATUS_CIRCUIT_OPEN, "엔드포인트 연속 실패로 요청을 보내지 않음")
+            await asyncio.sleep(wait)
+            continue
+
+        retry_after = None
+        timeout = max(0.0, min(policy.request_timeout, deadline - time.monotonic()))
+        trial = breaker.state == "half_open" # 이 시도가 half_open의 시험 요청 자리를 차지했는지
+        settled = False                      # 브레이커에 결과(성공 / 실패 / release)를 알렸는지
+        try:
+            try:
+                if limiter is None:
+                    response = await asyncio.wait_for(_hedged(post, policy.hedge_after, None, n_chars), timeout)
+                else:
+                    async with limiter.slot(n_chars):
+                        response = await asyncio.wait_for(_hedged(post, policy.hedge_after, limiter, n_chars),
+                                                          timeout)
+            except asyncio.TimeoutError:
+                breaker.on_failure()
+                settled = True
+                status, detail = STATUS_TIMEOUT, f"{timeout:.2f}초 안에 응답 없음"
+            except httpx.TransportError as e:
+                breaker.on_failure()
+                settled = True
+                status, detail = STATUS_NETWORK_ERROR, f"{type(e).__name__}: {e}"
+            else:
+                code = response.status_code
+                if code < 400:
+                    breaker.on_success()
+                    settled = True
+                    if limiter is not None:
+                        limiter.on_success()
+                    return response
+                detail = f"{code} - {response.text[:200]}"
+                if code == 429:
+                    # 한도 초과: 엔드포인트는 정상이므로 브레이커 실패로 세지 않음
+                    breaker.release()
+                    settled = True
+                    status = STATUS_THROTTLED
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                    if limiter is not None:
+                        limiter.on_throttle(retry_after)
+                elif code >= 500:
+                    breaker.on_failure()
+                    settled = True
+                    status = STATUS_SERVER_ERROR
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                else:
+                    breaker.release()
+                    settled = True
+                    raise TranslationFailure(STATUS_HTTP_ERROR, detail)
+        finally:
+            # 취소되거나 다른 예외(httpx.DecodingError 등)로 끝난 시험 요청: 자리를 돌려주지 않으면
+            # half_open에서 영영 요청을 보내지 못함
+            if trial and not settled:
+                breaker.release()
+
+        attempt += 1
+        delay = policy.backoff(attempt, retry_after)
+        if attempt > policy.max_retries or time.monotonic() + delay >= deadline:
+            raise TranslationFailure(status, detail)
+        instrumentation.count("translate.retries")
+        print(f"⏳ [Azure 재시도] {status} ({detail[:80]}), {delay:.1f}초 후 재시도 ({attempt}/{policy.max_retries})")
+        await asyncio.sleep(delay)
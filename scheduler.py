@@ -0,0 +1,328 @@
+# scheduler.py
+"""
+페이지 크기와 사용 가능한 메모리에 맞춰 OCR을 얼마나 동시에 돌릴지 정하는 스케줄러입니다.
+
+OCR 한 페이지가 쓰는 메모리(디코딩한 이미지 + 검출 / 인식 중간 결과)는 픽셀 수에 거의 비례합니다.
+워커 수만 고정하면 작은 페이지에는 너무 보수적이고, 큰 양면 스프레드 여러 장이 한꺼번에 들어오면 메모리가 부족해집니다.
+
+1. 크기 추정: 이미지 헤더(PNG IHDR / JPEG SOF)만 읽어 (디코딩 없이) 가로세로를 구하고,
+   픽셀 수 x OCR_BYTES_PER_PIXEL을 페이지의 메모리 비용으로 봅니다.
+2. 순서: OCR_SCHEDULE_WINDOW 페이지씩 끊어, 그 안에서 큰(오래 걸리는) 페이지부터 처리합니다. (LPT: 긴 작업 먼저)
+   큰 페이지가 실행 끝에 혼자 남아 다른 워커가 노는 시간을 줄입니다.
+   창 안에서만 순서를 바꾸므로 결과 파일 writer가 순서를 맞추려고 들고 있는 페이지도 창 크기 정도입니다.
+3. 입장(admission): OCR 직전에 비용만큼 예산(OCR_MEMORY_BUDGET_MB)을 받고, 끝나면 돌려줍니다.
+   예산이 남아 있으면 작은 페이지 여러 장이 함께 실행되고, 큰 페이지는 자리가 날 때까지 기다립니다.
+   예산보다 큰 페이지는 다른 OCR이 모두 끝난 뒤 혼자 실행합니다.
+   입장은 도착 순서대로(FIFO)라 큰 페이지가 작은 페이지에 계속 밀리지 않습니다.
+   선읽기(ingestion.Prefetcher)가 버퍼에 넣어 둔 페이지도 hold()로 같은 예산에 걸리고,
+   OCR에 들어갈 때 admit(held=...)로 그 페이지의 입장 비용으로 넘어갑니다. (디코딩한 이미지를 두 번 세지 않음)
+4. 워커 / 배치 크기: 예산이 있으면 OCR 스테이지 워커 수를 OCR_WORKERS로 고정하지 않고
+   예산에 A4 300dpi 페이지가 몇 장 들어가는지로 정합니다. (stage_workers, 최대 OCR_MAX_WORKERS)
+   실제 동시 실행은 입장이 정하므로 작은 페이지가 많으면 OCR_WORKERS보다 많이 돌 수 있습니다.
+   OCR_BATCH_PAGES를 정하지 않았으면(0) 예산이 있을 때 작은 페이지를 한 배치로 묶고 (batch_pages),
+   한 배치의 비용 합은 (예산 / 워커 수) 이하로 맞춰 큰 페이지는 따로 돌립니다. (batch_limit)
+입장 결정(대기 횟수 / 시간, 최대 사용량, 최대 동시 페이지 수, 예산 초과 페이지)은 stats()와 instrumentation 카운터로 남습니다.
+"""
+
+import os
+import time
+import struct
+import asyncio
+import contextlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+import instrumentation
+import ingestion
+from page_source import PageRef
+
+load_dotenv()
+
+# OCR 메모리 예산 (MB): auto = 시작할 때 사용 가능한 메모리의 절반, 0 = 제한 없음 (OCR_WORKERS만으로 조절)
+OCR_MEMORY_BUDGET_MB = os.getenv("OCR_MEMORY_BUDGET_MB", "auto")
+# 픽셀당 메모리 추정치 (바이트): 디코딩한 BGR / 흑백 이미지 + EasyOCR 검출기의 float 입력과 특징 맵
+OCR_BYTES_PER_PIXEL = float(os.getenv("OCR_BYTES_PER_PIXEL", 60))
+# 큰 페이지부터 처리하도록 순서를 바꾸는 창 크기 (페이지, 1 이하면 입력 순서 그대로)
+OCR_SCHEDULE_WINDOW = int(os.getenv("OCR_SCHEDULE_WINDOW", 16))
+# 예산이 있을 때 OCR 스테이지 워커 수 상한 (워커 수는 예산으로 정하고, 동시 실행은 입장이 조절)
+OCR_MAX_WORKERS = int(os.getenv("OCR_MAX_WORKERS", 8))
+# 예산이 있고 OCR_BATCH_PAGES를 정하지 않았을 때 배치 하나에 묶는 최대 페이지 수
+OCR_BUDGET_BATCH_PAGES = int(os.getenv("OCR_BUDGET_BATCH_PAGES", 8))
+AUTO_BUDGET_FRACTION = 0.5
+FALLBACK_SIZE = (2480, 3508)  # 헤더를 읽지 못한 페이지의 크기 가정 (A4 300dpi)
+MAX_HEADER_BYTES = 1 << 20    # JPEG SOF를 찾으며 읽을 최대 바이트 (EXIF 썸네일이 큰 파일 대비)
+
+
+# --- 1. 크기 추정 ---
+def available_memory() -> Optional[int]:
+    """지금 사용 가능한 메모리 (바이트, 컨테이너 메모리 제한 반영). 알 수 없으면 None"""
+    available = None
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    available = int(line.split()[1]) * 1024
+                    break
+    except OSError:
+        pass
+    if available is None:
+        try:
+            import psutil
+            available = psutil.virtual_memory().available
+        except ImportError:
+            pass
+    # cgroup v2 (docker 등): 컨테이너 한도 - 현재 사용량이 더 작으면 그 값
+    try:
+        with open('/sys/fs/cgroup/memory.max') as f:
+            limit = f.read().strip()
+        with open('/sys/fs/cgroup/memory.current') as f:
+            current = int(f.read().strip())
+        if limit != 'max':
+            remaining = max(0, int(limit) - current)
+            available = remaining if available is None else min(available, remaining)
+    except (OSError, ValueError):
+        pass
+    return available
+
+
+def _jpeg_size(f) -> Optional[Tuple[int, int]]:
+    """SOI 다음부터 마커를 따라가며 SOF 세그먼트의 (가로, 세로)를 찾습니다."""
+    consumed = 0
+    while consumed < MAX_HEADER_BYTES:
+        byte = f.read(1)
+        while byte and byte != b'\xff': # 다음 마커까지
+            byte = f.read(1)
+        while byte == b'\xff':          # 채움 바이트
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8: # 길이 없는 마커
+            continue
+        if marker in (0xD9, 0xDA): # 이미지 끝 / 스캔 시작: SOF가 없었음
+            return None
+        length = f.read(2)
+        if len(length) < 2:
+            return None
+        length = struct.unpack('>H', length)[0]
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC): # SOF0 ~ SOF15 (DHT / JPG / DAC 제외)
+            segment = f.read(5)
+            if len(segment) < 5:
+                return None
+            _, height, width = struct.unpack('>BHH', segment)
+            return (width, height)
+        f.read(length - 2)
+        consumed += length
+    return None
+
+
+def image_size(f) -> Optional[Tuple[int, int]]:
+    """이미지 파일 객체의 헤더만 읽어 (가로, 세로)를 돌려줍니다. (PNG / JPEG, 그 외나 손상된 헤더는 None)"""
+    head = f.read(24)
+    if head[:8] == b'\x89PNG\r\n\x1a\n' and head[12:16] == b'IHDR':
+        return struct.unpack('>II', head[16:24])
+    if head[:2] == b'\xff\xd8':
+        f.seek(2) # 파일 / ZIP 멤버 모두 seek 가능 (ZIP은 앞에서부터 다시 풀지만 몇 바이트뿐)
+        return _jpeg_size(f)
+    return None
+
+
+def _parse_budget(value: str) -> Optional[int]:
+    value = str(value).strip().lower()
+    if value in ('', 'auto'):
+        available = available_memory()
+        return int(available * AUTO_BUDGET_FRACTION) if available else None
+    mb = float(value)
+    return int(mb * 1024 * 1024) if mb > 0 else None
+
+
+class MemoryScheduler:
+    """
+    사용 예:
+        scheduler = MemoryScheduler()                    # .env 설정 (예산 / 픽셀당 메모리 / 순서 창)
+        await asyncio.to_thread(scheduler.measure, pages) # 헤더에서 크기 읽기
+        pages = scheduler.order(pages)                    # 창 안에서 큰 페이지 먼저
+        async with scheduler.admit(batch):                # 예산이 날 때까지 기다렸다가 OCR
+            ...
+    budget_bytes가 None이면 입장 제한 없이 순서 / 배치 묶기만 합니다.
+    선읽기 버퍼처럼 OCR 밖에서 잡고 있는 메모리는 hold(nbytes)로 예산에 걸고 release(nbytes)로 돌려줍니다.
+    """
+
+    def __init__(self, budget_bytes: Optional[int] = -1, bytes_per_pixel: float = OCR_BYTES_PER_PIXEL,
+                 window: int = OCR_SCHEDULE_WINDOW):
+        self.budget = _parse_budget(OCR_MEMORY_BUDGET_MB) if budget_bytes == -1 else budget_bytes
+        self.bytes_per_pixel = bytes_per_pixel
+        self.window = window
+        self._sizes: Dict[PageRef, Optional[Tuple[int, int]]] = {}
+        self._cond = asyncio.Condition()
+        self._queue = deque() # 입장을 기다리는 순서 (FIFO)
+        self._in_use = 0
+        self._held = 0        # 선읽기 버퍼 등 OCR 밖에서 잡고 있는 바이트 (hold / release)
+        self._running = 0     # 지금 OCR 중인 페이지 수
+
+        # 입장 결정 통계
+        self.admitted = 0      # 입장한 OCR 호출 (배치) 수
+        self.admitted_pages = 0
+        self.waited = 0        # 바로 들어가지 못하고 기다린 횟수
+        self.wait_seconds = 0.0
+        self.max_wait = 0.0
+        self.peak_bytes = 0
+        self.peak_held = 0
+        self.peak_pages = 0
+        self.oversize_pages = 0 # 예산보다 커서 혼자 실행한 페이지
+        self.unknown_sizes = 0  # 헤더를 읽지 못해 FALLBACK_SIZE로 본 페이지
+
+    # --- 크기 / 비용 ---
+    def measure(self, pages: List[PageRef], workers: int = None):
+        """페이지 이미지 헤더에서 크기를 읽어 둡니다. (스레드 풀, 이미 읽은 페이지는 건너뜀)"""
+        pages = [page for page in pages if page not in self._sizes]
+        if not pages:
+            return
+        readers = ingestion._ZipReaders()
+
+        def _size(page):
+            try:
+                with readers.open(page) as f:
+                    return image_size(f)
+            except Exception:
+                return None
+
+        try:
+            with instrumentation.span("ocr.schedule.headers", pages=len(pages)):
+                with ThreadPoolExecutor(max_workers=max(1, workers or ingestion.INGEST_WORKERS)) as executor:
+                    sizes = list(executor.map(_size, pages))
+        finally:
+            readers.close()
+        for page, size in zip(pages, sizes):
+            self._sizes[page] = size
+            if size is None:
+                self.unknown_sizes += 1
+
+    def forget(self, pages: List[PageRef]):
+        """끝난 페이지의 크기 정보를 지웁니다. (상주 서비스에서 작업이 끝날 때)"""
+        for page in pages:
+            self._sizes.pop(page, None)
+
+    def size(self, page: PageRef) -> Tuple[int, int]:
+        return self._sizes.get(page) or FALLBACK_SIZE
+
+    def cost(self, page: PageRef) -> int:
+        """페이지 하나를 OCR하는 동안의 메모리 추정치 (바이트)"""
+        width, height = self.size(page)
+        return int(width * height * self.bytes_per_pixel)
+
+    def stage_workers(self, workers: int, max_workers: int = OCR_MAX_WORKERS) -> int:
+        """
+        OCR 스테이지 워커 수: 예산이 없으면 workers 그대로, 있으면 예산에 A4 300dpi(FALLBACK_SIZE) 페이지가
+        들어가는 장수 (workers 이상 max_workers 이하). 그보다 작은 페이지는 batch_pages / batch_limit로 묶여 함께 돕니다.
+        """
+        if not self.budget:
+            return workers
+        fit = self.budget // max(1, int(FALLBACK_SIZE[0] * FALLBACK_SIZE[1] * self.bytes_per_pixel))
+        return max(workers, min(max_workers, fit))
+
+    def batch_pages(self, requested: int) -> int:
+        """배치 하나의 최대 페이지 수: requested > 0이면 그 값, 아니면 예산이 있을 때 OCR_BUDGET_BATCH_PAGES (없으면 1)"""
+        if requested > 0:
+            return requested
+        return max(1, OCR_BUDGET_BATCH_PAGES) if self.budget else 1
+
+    def batch_limit(self, workers: int) -> Optional[int]:
+        """배치 하나에 담을 비용 합 상한 (워커마다 예산을 고르게 나눔, 예산이 없으면 None)"""
+        return self.budget // max(1, workers) if self.budget else None
+
+    def order(self, pages: List[PageRef]) -> List[PageRef]:
+        """window 페이지씩 끊어 그 안에서 비용이 큰 페이지부터 (같으면 원래 순서)"""
+        if self.window <= 1:
+            return list(pages)
+        ordered = []
+        for start in range(0, len(pages), self.window):
+            chunk = pages[start:start + self.window]
+            ordered.extend(sorted(chunk, key=self.cost, reverse=True))
+        return ordered
+
+    # --- 예산에 거는 OCR 밖의 메모리 ---
+    def hold(self, nbytes: int):
+        """선읽기 버퍼 등에 올린 바이트를 예산에 겁니다. (늘리기만 하므로 기다리는 입장이 없음, 이벤트 루프에서 호출)"""
+        self._held += nbytes
+        self.peak_held = max(self.peak_held, self._held)
+        self.peak_bytes = max(self.peak_bytes, self._in_use + self._held)
+
+    async def release(self, nbytes: int):
+        """hold()로 건 바이트를 돌려줍니다. (OCR하지 않고 끝난 페이지, 선읽기 종료)"""
+        if nbytes <= 0:
+            return
+        async with self._cond:
+            self._held -= nbytes
+            self._cond.notify_all()
+
+    # --- 입장 ---
+    def _fits(self, cost: int, held: int) -> bool:
+        return (self.budget is None or self._running == 0
+                or self._in_use + self._held - held + cost <= self.budget)
+
+    @contextlib.asynccontextmanager
+    async def admit(self, pages: List[PageRef], held: int = 0):
+        """
+        pages를 OCR할 메모리가 예산 안에 들어올 때까지 기다립니다. (먼저 기다린 요청이 먼저 들어감)
+        held: pages 몫으로 hold()해 둔 바이트 (선읽기에서 꺼낸 페이지). 입장하면 OCR 비용으로 넘어가고
+        (OCR이 끝나면 비용과 함께 빠짐) 입장 전에 취소되면 그대로 돌려줍니다.
+        """
+        cost = sum(self.cost(page) for page in pages)
+        ticket = object()
+        started = time.perf_counter()
+        async with self._cond:
+            self._queue.append(ticket)
+            immediate = self._queue[0] is ticket and self._fits(cost, held)
+            try:
+                await self._cond.wait_for(lambda: self._queue[0] is ticket and self._fits(cost, held))
+            except BaseException:
+                self._held -= held
+                raise
+            finally:
+                self._queue.remove(ticket)
+                self._cond.notify_all() # 다음 순서가 들어갈 수 있는지 다시 확인 (취소된 경우 포함)
+            waited = time.perf_counter() - started
+            self._held -= held
+            self._in_use += cost
+            self._running += len(pages)
+            self.admitted += 1
+            self.admitted_pages += len(pages)
+            if not immediate:
+                self.waited += 1
+                self.wait_seconds += waited
+                self.max_wait = max(self.max_wait, waited)
+            if self.budget is not None and cost > self.budget:
+                self.oversize_pages += len(pages)
+                instrumentation.count("ocr.schedule.oversize_pages", len(pages))
+            self.peak_bytes = max(self.peak_bytes, self._in_use + self._held)
+            self.peak_pages = max(self.peak_pages, self._running)
+        instrumentation.count("ocr.schedule.admitted_pages", len(pages))
+        if not immediate:
+            instrumentation.observe("ocr.schedule.wait", waited, pages=len(pages))
+        try:
+            yield
+        finally:
+            async with self._cond:
+                self._in_use -= cost
+                self._running -= len(pages)
+                self._cond.notify_all()
+
+    def stats(self) -> dict:
+        mb = 1024 * 1024
+        return {
+            'budget_mb': round(self.budget / mb) if self.budget else None,
+            'admitted': self.admitted,
+            'admitted_pages': self.admitted_pages,
+            'waited': self.waited,
+            'wait_seconds': round(self.wait_seconds, 2),
+            'max_wait_seconds': round(self.max_wait, 2),
+            'peak_mb': round(self.peak_bytes / mb),
+            'peak_prefetch_mb': round(self.peak_held / mb),
+            'peak_pages': self.peak_pages,
+            'oversize_pages': self.oversize_pages,
+            'unknown_sizes': self.unknown_sizes,
+        }
@@ -0,0 +1,659 @@
+# service.py
+"""
+상주(service) 모드: 한 번 띄워 두고 로컬 HTTP API로 번역 작업(job)을 받는 데몬입니다.
+
+main.py는 실행할 때마다 OCR 모델을 다시 로드하고 01_input_zips를 다시 훑은 뒤 모두 정리하고 끝납니다.
+service 모드는 EasyOCR Reader(process 모드면 OCR 프로세스 풀), Azure HTTP 커넥션 풀, 번역 백엔드,
+번역 메모리 / OCR 캐시 / 체크포인트를 계속 열어 둔 채로 작업을 받으므로 새 작업이 모델 로드를 기다리지 않습니다.
+
+- 작업은 ZIP 업로드 또는 서버에서 읽을 수 있는 ZIP 경로로 제출합니다. (ZIP 하나 = 매거진 하나)
+- 우선순위(priority, 클수록 먼저)가 높은 작업부터, 같으면 먼저 들어온 작업부터 처리합니다.
+  할 일이 있는 동안은 OCR -> 번역 파이프라인 하나를 계속 띄워 두고, 작업을 SERVICE_SLICE_PAGES 페이지씩 나눠
+  넣을 때마다 작업을 다시 고르므로, 큰 작업이 도는 중에 들어온 급한 작업도 지금 조각 다음에 바로 들어갑니다.
+  조각 사이에서 파이프라인을 비우지 않으므로 앞 조각의 번역과 다음 조각의 OCR이 겹쳐 돕니다.
+- 페이지가 끝나는 대로 결과를 NDJSON(한 줄에 페이지 하나, 결과 파일의 페이지 항목과 같은 형식, 완료 순서)으로 흘려보냅니다.
+  결과 파일(03_output_results)과 체크포인트도 배치 실행(main.py)과 똑같이 씁니다.
+- 작업 목록은 메모리에만 있습니다. 서비스를 다시 띄운 뒤 같은 ZIP을 다시 제출하면 끝난 페이지는 체크포인트에서 바로 복원됩니다.
+
+제출한 경로의 파일을 서버가 그대로 읽으므로 로컬 전용(기본 127.0.0.1)으로 띄우세요.
+
+HTTP API (기본 http://127.0.0.1:8800):
+    POST   /jobs               작업 제출: JSON {"path": "/abs/weekly_01.zip", "priority": 0, "name": "weekly_01"}
+                               또는 ZIP 본문 그대로 (Content-Type: application/zip, ?priority=&name=)
+    GET    /jobs               작업 목록과 진행 상황
+    GET    /jobs/<id>          작업 하나의 진행 상황
+    GET    /jobs/<id>/results  끝난 페이지를 NDJSON으로 스트리밍 (작업이 끝나면 응답 종료, ?follow=0이면 지금까지 끝난 것만)
+    DELETE /jobs/<id>          작업 취소 (처리 중이면 이미 파이프라인에 넣은 조각까지만 처리)
+    GET    /health             모델 로드 여부 / 작업 수
+
+사용법:
+    python service.py --port 8800
+    curl -X POST 'localhost:8800/jobs?priority=5' -H 'Content-Type: application/zip' --data-binary @weekly_01.zip
+    curl -N localhost:8800/jobs/1/results
+"""
+
+import os
+import re
+import json
+import time
+import signal
+import asyncio
+import zipfile
+import argparse
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional
+from urllib.parse import urlparse, parse_qs
+
+import httpx
+from dotenv import load_dotenv
+
+import main as app
+import ocr_processor
+import preprocess
+import page_source
+import translation_backends
+import instrumentation
+from page_source import PageRef
+from blocks import PageBlocks
+from checkpoint import CheckpointJournal
+import dedup
+from dedup import DedupIndex
+from scheduler import MemoryScheduler
+from ocr_cache import OcrCache
+from ocr_pool import OcrProcessPool
+from output_writer import OutputWriter, _dump_page
+from rate_limiter import AzureRateLimiter
+from translation_memory import TranslationMemory
+
+load_dotenv()
+
+SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", 8800))
+# 작업 조각 크기(페이지): 파이프라인에 조각을 넣을 때마다 우선순위가 가장 높은 작업을 다시 고름
+SERVICE_SLICE_PAGES = int(os.getenv("SERVICE_SLICE_PAGES", 8))
+# 끝난 작업을 메모리에 남겨 두는 개수 (진행 상황 / 결과 조회용, 넘으면 오래된 것부터 버림)
+SERVICE_KEEP_JOBS = int(os.getenv("SERVICE_KEEP_JOBS", 100))
+UPLOAD_DIR = app.CACHE_DIR / "uploads" # 업로드된 ZIP (작업이 끝나면 삭제)
+# 작업별 결과 스트림 (끝난 페이지의 NDJSON 줄, 완료 순서), 작업이 목록에서 빠지면 삭제
+RESULTS_DIR = app.CACHE_DIR / "service_results"
+UPLOAD_CHUNK = 1024 * 1024
+
+FINISHED_STATES = ('done', 'cancelled', 'failed')
+
+
+class JobConflict(Exception):
+    """같은 이름(=같은 결과 파일)의 작업이 아직 끝나지 않았을 때 발생합니다."""
+
+
+@dataclass(eq=False)
+class Job:
+    """
+    제출된 작업 하나입니다. 상태: queued -> running -> done / cancelled / failed
+    HTTP 스레드와 작업 루프가 같이 읽으므로 값은 TranslationService의 잠금(_cond) 안에서 바꿉니다.
+    """
+    job_id: str
+    name: str
+    zip_path: Path
+    pages: List[PageRef]
+    priority: int = 0
+    seq: int = 0
+    uploaded: bool = False # 업로드된 ZIP이면 작업이 끝난 뒤 삭제
+    status: str = 'queued'
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    first_page_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    restored_pages: int = 0 # 체크포인트에서 복원한 페이지
+    failed_pages: int = 0   # OCR에 실패해 빈 결과로 남은 페이지
+    cancel_requested: bool = False
+    error: Optional[str] = None
+    in_flight: int = 0     # 파이프라인에 넣었지만 아직 끝나지 않은 페이지 수
+    done_pages: int = 0    # 결과 스트림에 나간 페이지 수
+    results_size: int = 0  # 결과 파일에서 줄이 끝까지 쓰인 곳 (바이트, 읽는 쪽은 여기까지만 읽음)
+    results_path: Optional[Path] = None
+    # 작업 루프만 쓰는 값
+    remaining: List[PageRef] = field(default_factory=list)
+    page_index: Dict[PageRef, int] = field(default_factory=dict)
+    writer: Optional[OutputWriter] = None
+    results_file: Optional[BinaryIO] = None
+    zip_hash: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def summary(self) -> dict:
+        end = self.finished_at or time.time()
+        return {
+            'job_id': self.job_id,
+            'name': self.name,
+            'status': self.status,
+            'priority': self.priority,
+            'total_pages': len(self.pages),
+            'done_pages': self.done_pages,
+            'restored_pages': self.restored_pages,
+            'failed_pages': self.failed_pages,
+            'progress': round(self.done_pages / len(self.pages), 4) if self.pages else 1.0,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            # 제출부터 첫 페이지 결과까지 / 제출부터 지금(끝났으면 끝난 시각)까지
+            'first_page_sec': round(self.first_page_at - self.submitted_at, 3) if self.first_page_at else None,
+            'elapsed_sec': round(end - self.submitted_at, 3),
+            'error': self.error,
+        }
+
+
+class TranslationService:
+    """
+    작업 큐와 상주 자원(Reader, 커넥션 풀, 캐시)을 들고 있는 서비스입니다.
+    HTTP 요청은 서버 스레드에서 submit / cancel / iter_results 등을 호출하고,
+    실제 처리는 run()의 asyncio 루프에서 main.run_ocr_translate_pipeline 하나에 작업 조각을 차례로 넣어 합니다.
+    """
+
+    def __init__(self, slice_pages: int = SERVICE_SLICE_PAGES, keep_jobs: int = SERVICE_KEEP_JOBS):
+        self.slice_pages = max(1, slice_pages)
+        self.keep_jobs = keep_jobs
+        self.model_ready = False
+        self.pages_done = 0
+        self.started_at = time.time()
+        self._cond = threading.Condition() # 작업 상태 잠금 + 결과 스트림 깨우기
+        self._jobs: Dict[str, Job] = {}     # 제출 순서
+        self._seq = 0
+        self._page_info = {}                # OCR 스테이지가 채우는 페이지별 추가 정보 (글자 유무 판별 결과)
+        self._page_jobs: Dict[PageRef, Job] = {} # 파이프라인에 넣은 페이지 -> 작업 (작업 루프만 씀)
+        self.dedup_index: Optional[DedupIndex] = None
+        self.scheduler: Optional[MemoryScheduler] = None # 모든 작업이 같은 메모리 예산을 나눠 씀
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    # --- HTTP 스레드에서 호출 ---
+    def submit(self, zip_path: Path, name: Optional[str] = None, priority: int = 0,
+               uploaded: bool = False) -> Job:
+        """ZIP의 페이지 목록을 읽어 작업을 큐에 넣습니다. (ZIP이 아니거나 페이지가 없으면 ValueError / BadZipFile)"""
+        with self._cond:
+            self._seq += 1
+            seq = self._seq
+        # 결과 파일 이름으로 쓰이므로 경로 구분자 등은 '_'로 바꿈
+        name = re.sub(r'[^\w.\-]+', '_', name or (f"upload_{seq}" if uploaded else zip_path.stem)).strip('.')
+        if not name:
+            raise ValueError("작업 이름이 비어 있습니다.")
+        pages = list(page_source.iter_zip_pages(zip_path, name))
+        if not pages:
+            raise ValueError(f"'{zip_path.name}' 안에 페이지 이미지가 없습니다.")
+
+        job = Job(str(seq), name, zip_path, pages, priority, seq, uploaded)
+        job.page_index = {page: i for i, page in enumerate(pages)}
+        with self._cond:
+            if any(other.name == name and not other.finished for other in self._jobs.values()):
+                raise JobConflict(f"이름이 '{name}'인 작업이 아직 처리 중입니다.")
+            self._jobs[job.job_id] = job
+        self._loop.call_soon_threadsafe(self._wakeup.set)
+        print(f"  [작업 {job.job_id}] 접수: '{name}' ({len(pages)}페이지, 우선순위 {priority})")
+        return job
+
+    def submit_upload(self, body: BinaryIO, length: int, name: Optional[str] = None, priority: int = 0) -> Job:
+        """요청 본문(ZIP)을 UPLOAD_DIR에 저장하고 작업으로 제출합니다."""
+        if length <= 0:
+            raise ValueError("요청 본문(ZIP)이 비어 있습니다.")
+        UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+        upload_path = UPLOAD_DIR / f"{time.time_ns()}_{threading.get_ident()}.zip"
+        try:
+            with open(upload_path, 'wb') as f:
+                remaining = length
+                while remaining > 0:
+                    chunk = body.read(min(UPLOAD_CHUNK, remaining))
+                    if not chunk:
+                        raise ValueError("요청 본문이 Content-Length보다 짧습니다.")
+                    f.write(chunk)
+                    remaining -= len(chunk)
+            return self.submit(upload_path, name, priority, uploaded=True)
+        except BaseException:
+            upload_path.unlink(missing_ok=True)
+            raise
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[Job]:
+        with self._cond:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """대기 중인 작업은 바로 취소하고, 처리 중인 작업은 이미 파이프라인에 넣은 페이지가 끝나면 멈춥니다."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                return job
+            job.cancel_requested = True
+            if job.status != 'queued':
+                self._loop.call_soon_threadsafe(self._wakeup.set) # 작업 루프가 다음 조각을 넣지 않고 정리하도록
+                return job
+            job.status = 'cancelled' # 작업 루프가 더 이상 고르지 않도록 잠금 안에서 바로 표시
+        self._finish(job, 'cancelled') # 아직 결과 파일을 열지 않았으므로 HTTP 스레드에서 정리해도 됨
+        return job
+
+    def iter_results(self, job: Job, follow: bool = True) -> Iterator[str]:
+        """
+        끝난 페이지의 NDJSON 줄을 작업의 결과 파일에서 읽어 내보냅니다. (메모리에는 줄을 들고 있지 않음)
+        follow=True면 작업이 끝날 때까지 새 페이지를 기다립니다.
+        """
+        sent = 0
+        f = None
+        try:
+            while True:
+                with self._cond:
+                    while follow and sent >= job.results_size and not job.finished:
+                        self._cond.wait(timeout=1.0)
+                    end = job.results_size
+                    last = not follow or job.finished
+                if end > sent:
+                    if f is None:
+                        f = open(job.results_path, 'rb')
+                    f.seek(sent)
+                    while f.tell() < end:
+                        yield f.readline().decode('utf-8').rstrip("\n")
+                    sent = end
+                if last:
+                    return
+        finally:
+            if f is not None:
+                f.close()
+
+    def health(self) -> dict:
+        with self._cond:
+            states = Counter(job.status for job in self._jobs.values())
+            pages_done = self.pages_done
+        return {
+            'status': 'ok' if self.model_ready else 'warming_up',
+            'model_loaded': self.model_ready,
+            'ocr_execution_mode': app.OCR_EXECUTION_MODE,
+            'jobs': dict(states),
+            'pages_done': pages_done,
+            'dedup': self.dedup_index.stats() if self.dedup_index is not None else None,
+            'scheduler': self.scheduler.stats() if self.scheduler is not None else None,
+            'uptime_sec': round(time.time() - self.started_at, 1),
+        }
+
+    # --- 작업 루프 (asyncio) ---
+    def _next_job(self) -> Optional[Job]:
+        """파이프라인에 넣을 페이지가 남은 작업 중 우선순위가 가장 높은(같으면 먼저 들어온) 작업을 골라 running으로 표시합니다."""
+        with self._cond:
+            candidates = [job for job in self._jobs.values()
+                          if not job.cancel_requested
+                          and (job.status == 'queued' or (job.status == 'running' and job.remaining))]
+            if not candidates:
+                return None
+            job = max(candidates, key=lambda j: (j.priority, -j.seq))
+            job.status = 'running'
+            return job
+
+    def _has_work(self) -> bool:
+        with self._cond:
+            return any(not job.finished for job in self._jobs.values())
+
+    def _emit(self, job: Job, page: PageRef, blocks: PageBlocks, info: Optional[dict]):
+        """끝난 페이지를 결과 파일에 쓰고 결과 스트림(작업의 NDJSON 파일)에 붙입니다."""
+        index = job.page_index[page]
+        job.writer.add(page, blocks, info)
+        line = _dump_page({'page_number': index + 1, 'original_filename': page.name, 'blocks': blocks,
+                           **(info or {})}, indent=None)
+        data = (line + "\n").encode('utf-8')
+        job.results_file.write(data)
+        job.results_file.flush()
+        with self._cond:
+            job.done_pages += 1
+            job.results_size += len(data)
+            if job.first_page_at is None:
+                job.first_page_at = time.time()
+            self.pages_done += 1
+            self._cond.notify_all()
+        instrumentation.count("pages")
+
+    async def _start_job(self, job: Job):
+        """체크포인트에서 끝난 페이지를 복원하고 결과 파일 writer를 엽니다."""
+        with self._cond:
+            job.started_at = time.time()
+        print(f"\n--- [작업 {job.job_id}] 시작: '{job.name}' ({len(job.pages)}페이지, 우선순위 {job.priority}) ---")
+        restored, job.remaining, zip_hashes = await asyncio.to_thread(app.split_finished_pages, self.journal, job.pages)
+        job.zip_hash = zip_hashes[job.zip_path]
+        job.writer = OutputWriter({job.name: job.pages}, app.OUTPUT_DIR, app.OUTPUT_FORMAT)
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        job.results_path = RESULTS_DIR / f"{job.job_id}.ndjson"
+        job.results_file = open(job.results_path, 'wb')
+        with self._cond:
+            job.restored_pages = len(restored)
+        if restored:
+            print(f"  [체크포인트] 이전에 끝난 {len(restored)}개 페이지를 바로 돌려줍니다.")
+        for page, blocks in restored:
+            self._emit(job, page, blocks, self.journal.page_info(page, job.zip_hash))
+
+    async def _slices(self):
+        """
+        파이프라인에 넣을 다음 조각(최대 slice_pages 페이지)을 조각마다 우선순위로 작업을 다시 골라 내줍니다.
+        파이프라인에는 조각 두 개까지만 넣어 둡니다. (한 조각을 번역하는 동안 다음 조각을 OCR할 만큼,
+        더 앞서 넣으면 나중에 들어온 급한 작업 / 취소가 그만큼 늦게 반영됨)
+        넣을 페이지가 없으면 파이프라인에 있는 페이지가 끝나길 기다리고, 그것도 없으면 끝납니다. (파이프라인 종료)
+        """
+        while True:
+            self._wakeup.clear()
+            self._settle_jobs()
+            if len(self._page_jobs) >= 2 * self.slice_pages:
+                await self._wakeup.wait()
+                continue
+            job = self._next_job()
+            if job is None:
+                if not self._page_jobs:
+                    return
+                await self._wakeup.wait() # 페이지가 끝나거나 새 작업이 들어오면 다시 확인
+                continue
+            if job.writer is None:
+                try:
+                    await self._start_job(job)
+                except Exception as e:
+                    self._fail_job(job, e)
+                    continue
+            pages, job.remaining = job.remaining[:self.slice_pages], job.remaining[self.slice_pages:]
+            if not pages:
+                continue # 모두 체크포인트에서 복원됨 -> 다음 반복에서 정리
+            with self._cond:
+                job.in_flight += len(pages)
+            for page in pages:
+                self._page_jobs[page] = job
+            instrumentation.count("service.slices")
+            yield pages
+
+    def _settle_jobs(self):
+        """파이프라인에 남은 페이지가 없는 작업 중 다 끝났거나 취소된 작업을 끝냅니다."""
+        with self._cond:
+            settled = [job for job in self._jobs.values()
+                       if job.status == 'running' and job.in_flight == 0
+                       and (not job.remaining or job.cancel_requested)]
+        for job in settled:
+            self._finish(job, 'done' if not job.remaining else 'cancelled')
+
+    def _fail_job(self, job: Job, error: Exception):
+        print(f"🚨 [작업 {job.job_id}] 처리 중 오류: {error}")
+        with self._cond:
+            job.error = str(error)
+        self._finish(job, 'failed')
+
+    def _page_finished(self, page: PageRef, failed: bool = False):
+        job = self._page_jobs.pop(page)
+        self._page_info.pop(page, None)
+        with self._cond:
+            job.in_flight -= 1
+            if failed:
+                job.failed_pages += 1
+        self._wakeup.set()
+
+    def _on_page_done(self, page: PageRef, blocks: PageBlocks):
+        job = self._page_jobs[page]
+        info = self._page_info.get(page)
+        if app._is_page_complete(blocks):
+            self.journal.record(page, job.zip_hash, blocks, info)
+        with instrumentation.span("save", page=page.name):
+            self._emit(job, page, blocks, info)
+        self._page_finished(page)
+
+    def _on_page_failed(self, page: PageRef):
+        """OCR에 실패했거나 처리 중 오류가 난 페이지 (결과 파일에는 작업이 끝날 때 빈 블록으로 채움)"""
+        if page in self._page_jobs:
+            self._page_finished(page, failed=True)
+
+    async def _run_pipeline(self):
+        """할 일이 없어질 때까지 파이프라인 하나에 작업 조각을 계속 넣습니다."""
+        try:
+            with instrumentation.span("service.pipeline"):
+                await app.run_ocr_translate_pipeline(self.session, self._slices(), self.limiter, self.memory,
+                                                     self.ocr_pool, self.ocr_cache,
+                                                     on_page_done=self._on_page_done, collect_results=False,
+                                                     translator=self.translator, page_info=self._page_info,
+                                                     dedup_index=self.dedup_index, scheduler=self.scheduler,
+                                                     on_page_failed=self._on_page_failed)
+        except Exception as e:
+            # 파이프라인 자체가 멈추면 처리 중이던 작업을 모두 실패로 끝냄 (페이지 상태를 알 수 없음)
+            with self._cond:
+                running = [job for job in self._jobs.values() if job.status == 'running']
+            self._page_jobs.clear()
+            self._page_info.clear()
+            for job in running:
+                with self._cond:
+                    job.in_flight = 0
+                self._fail_job(job, e)
+
+    def _finish(self, job: Job, status: str):
+        """작업을 끝냅니다. 결과가 없는 페이지(OCR 실패 / 취소)는 결과 파일에 빈 블록으로 채웁니다."""
+        if job.writer is not None:
+            job.writer.close()
+        if job.results_file is not None:
+            job.results_file.close()
+        with self._cond:
+            job.status = status
+            job.finished_at = time.time()
+            job.remaining = []
+            self._cond.notify_all()
+            finished = [other for other in self._jobs.values() if other.finished]
+            dropped = finished[:max(0, len(finished) - self.keep_jobs)]
+            for old in dropped:
+                del self._jobs[old.job_id]
+        for old in dropped:
+            if old.results_path is not None:
+                old.results_path.unlink(missing_ok=True)
+        if job.uploaded:
+            job.zip_path.unlink(missing_ok=True)
+        if self.dedup_index is not None:
+            self.dedup_index.forget(job.pages)
+        if self.scheduler is not None:
+            self.scheduler.forget(job.pages)
+        summary = job.summary()
+        first_page = f"첫 페이지 {summary['first_page_sec']}초, " if summary['first_page_sec'] is not None else ""
+        print(f"--- [작업 {job.job_id}] {status}: '{job.name}' {summary['done_pages']}/{summary['total_pages']}페이지 "
+              f"({first_page}전체 {summary['elapsed_sec']}초) ---")
+
+    def _report_idle(self):
+        """할 일이 없어지면 그동안의 성능 리포트를 출력하고 계측을 비웁니다. (상주 중 메모리가 계속 늘지 않도록)"""
+        print(f"\n--- [서비스] 대기 중 (번역 요청 {self.limiter.request_count}회, 429 제한 {self.limiter.throttled_count}회) ---")
+        instrumentation.recorder.print_report()
+        if instrumentation.TRACE_FILE:
+            instrumentation.recorder.write_chrome_trace(instrumentation.TRACE_FILE)
+        instrumentation.recorder.reset()
+
+    async def _warm_up(self):
+        """첫 작업이 모델 로드를 기다리지 않도록 Reader(또는 OCR 워커 프로세스)를 미리 로드합니다."""
+        started = time.perf_counter()
+        with instrumentation.span("service.warm_up"):
+            if self.ocr_pool is not None:
+                await self.ocr_pool.warm_up()
+            else:
+                await asyncio.to_thread(ocr_processor.init_reader)
+        self.model_ready = True
+        print(f"✅ [서비스] OCR 모델 준비 완료 ({time.perf_counter() - started:.1f}초)")
+
+    async def _process_jobs(self):
+        while True:
+            self._wakeup.clear()
+            if not self._has_work():
+                await self._wakeup.wait()
+                continue
+            await self._run_pipeline()
+            self._report_idle()
+
+    async def run(self, host: str = SERVICE_HOST, port: int = SERVICE_PORT):
+        """HTTP 서버를 띄우고 작업을 처리합니다. (취소 / Ctrl+C까지)"""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        try:
+            # SIGTERM(서비스 관리자의 종료 요청)도 Ctrl+C처럼 자원을 정리하고 끝냄
+            self._loop.add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        except (NotImplementedError, RuntimeError):
+            pass # Windows
+        app.OUTPUT_DIR.mkdir(exist_ok=True)
+        # 이전에 띄웠던 서비스의 결과 스트림 (작업 목록은 메모리에만 있으므로 더 이상 조회할 수 없음)
+        for stale in RESULTS_DIR.glob("*.ndjson"):
+            stale.unlink(missing_ok=True)
+        self.limiter = AzureRateLimiter.from_env()
+        self.memory = TranslationMemory(app.CACHE_DIR / "translation_memory.sqlite3")
+        self.ocr_cache = OcrCache(app.CACHE_DIR / "ocr_cache.sqlite3")
+        self.journal = CheckpointJournal(app.CACHE_DIR / "checkpoint.jsonl",
+                                         translation_backends.translation_config_hash())
+        if dedup.OCR_DEDUP != "off":
+            self.dedup_index = DedupIndex(app.CACHE_DIR / "dedup_index.sqlite3",
+                                          dedup.dedup_config(ocr_processor.OCR_LANGUAGES, preprocess.preprocess_config(),
+                                                             ocr_processor.merge_config()))
+        self.scheduler = MemoryScheduler()
+        self.ocr_pool = OcrProcessPool(workers=app.OCR_WORKERS) if app.OCR_EXECUTION_MODE == "process" else None
+        ocr_workers, ocr_batch_pages = app.ocr_stage_size(self.scheduler, self.ocr_pool)
+
+        # 모델을 로드하는 동안에도 작업은 받아 둠 (로드가 끝나면 바로 시작)
+        server = ThreadingHTTPServer((host, port), _make_handler(self))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"✅ [서비스] http://{host}:{server.server_address[1]} 에서 작업 대기 중 "
+              f"(조각 {self.slice_pages}페이지, OCR 워커 {ocr_workers}개 (배치 최대 {ocr_batch_pages}페이지) / "
+              f"번역 워커 {app.TRANSLATE_WORKERS}개)")
+        try:
+            async with httpx.AsyncClient(timeout=30.0) as session:
+                self.session = session
+                # 모든 작업이 같은 번역 백엔드를 공유 (로컬 모델 / 용어집을 한 번만 로드)
+                self.translator = translation_backends.create_backend(session, self.limiter, self.memory)
+                await self._warm_up()
+                await self._process_jobs()
+        finally:
+            server.shutdown()
+            server.server_close()
+            if self.ocr_pool is not None:
+                self.ocr_pool.shutdown()
+            self.memory.close()
+            self.ocr_cache.close()
+            if self.dedup_index is not None:
+                self.dedup_index.close()
+            self.journal.close()
+
+
+# --- HTTP API ---
+def _make_handler(service: TranslationService):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass # 콘솔 로그 생략
+
+        def _send_json(self, status: int, payload):
+            data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            try:
+                self.wfile.write(data)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def _route(self):
+            url = urlparse(self.path)
+            return [part for part in url.path.split('/') if part], parse_qs(url.query)
+
+        def _job_or_404(self, parts) -> Optional[Job]:
+            job = service.get(parts[1])
+            if job is None:
+                self._send_json(404, {'error': f"작업 {parts[1]}이(가) 없습니다."})
+            return job
+
+        def _stream_results(self, job: Job, follow: bool):
+            # HTTP/1.0 응답: Content-Length 없이 보내고 연결을 닫아 끝을 알림 (줄 단위로 바로 읽을 수 있음)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+            self.end_headers()
+            try:
+                for line in service.iter_results(job, follow):
+                    self.wfile.write((line + "\n").encode('utf-8'))
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass # 클라이언트가 먼저 끊음
+
+        def do_GET(self):
+            parts, query = self._route()
+            if parts == ['health']:
+                self._send_json(200, service.health())
+            elif parts == ['jobs']:
+                self._send_json(200, {'jobs': [job.summary() for job in service.jobs()]})
+            elif len(parts) in (2, 3) and parts[0] == 'jobs' and parts[2:] in ([], ['results']):
+                job = self._job_or_404(parts)
+                if job is None:
+                    return
+                if len(parts) == 2:
+                    self._send_json(200, job.summary())
+                else:
+                    self._stream_results(job, follow=query.get('follow', ['1'])[0] != '0')
+            else:
+                self._send_json(404, {'error': 'not found'})
+
+        def do_POST(self):
+            parts, query = self._route()
+            if parts != ['jobs']:
+                self._send_json(404, {'error': 'not found'})
+                return
+            content_type = self.headers.get('Content-Type', '').split(';')[0].strip().lower()
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                if content_type == 'application/json':
+                    body = json.loads(self.rfile.read(length) or b'{}')
+                    if not isinstance(body, dict):
+                        raise ValueError("JSON 본문은 객체여야 합니다. (예: {\"path\": \"/abs/weekly_01.zip\"})")
+                    if not body.get('path'):
+                        raise ValueError("'path'(ZIP 경로)가 필요합니다.")
+                    zip_path = Path(body['path']).expanduser().resolve()
+                    if not zip_path.is_file():
+                        self._send_json(404, {'error': f"파일이 없습니다: {zip_path}"})
+                        return
+                    job = service.submit(zip_path, body.get('name'), int(body.get('priority', 0)))
+                else:
+                    job = service.submit_upload(self.rfile, length, query.get('name', [None])[0],
+                                                int(query.get('priority', ['0'])[0]))
+            except JobConflict as e:
+                self._send_json(409, {'error': str(e)})
+                return
+            except (ValueError, TypeError, AttributeError, zipfile.BadZipFile) as e:
+                # 잘못된 값(priority: null, 숫자가 아닌 path 등)도 응답 없이 끊지 않고 400으로 알림
+                self._send_json(400, {'error': f"잘못된 요청: {e}"})
+                return
+            self._send_json(202, job.summary())
+
+        def do_DELETE(self):
+            parts, _ = self._route()
+            if len(parts) != 2 or parts[0] != 'jobs':
+                self._send_json(404, {'error': 'not found'})
+                return
+            job = service.cancel(parts[1])
+            if job is None:
+                self._send_json(404, {'error': f"작업 {parts[1]}이(가) 없습니다."})
+            else:
+                self._send_json(200, job.summary())
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="상주 번역 서비스 (로컬 HTTP 작업 API)")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--slice-pages", type=int, default=SERVICE_SLICE_PAGES,
+                        help="작업을 나눠 처리하는 조각 크기 (조각마다 우선순위를 다시 확인)")
+    args = parser.parse_args()
+
+    print("=========================================")
+    print("   매거진 번역 서비스 시작")
+    print("=========================================\n")
+    try:
+        asyncio.run(TranslationService(slice_pages=args.slice_pages).run(args.host, args.port))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    print("\n--- [서비스] 종료 ---")
+
+
+if __name__ == "__main__":
+    main()
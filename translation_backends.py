@@ -0,0 +1,307 @@
+# translation_backends.py
+"""
+번역 백엔드(엔진) 인터페이스와 구현들입니다.
+모든 백엔드는 같은 배치 비동기 API를 가집니다:
+
+    translations = await backend.translate(texts, 'ja', 'ko')  # -> List[api_clients.Translation]
+
+구현:
+- AzureBackend: Azure Translator (api_clients.call_azure_translation_batch, 재시도/속도 제한 포함)
+- MemoryBackend: 번역 메모리 + 용어집(TSV)만 조회. 없는 텍스트는 STATUS_NOT_FOUND
+- CTranslate2Backend: 로컬 CPU 번역 모델 (CTranslate2로 변환한 Marian/OPUS-MT 등, 선택 의존성)
+- RoutingBackend: 캐시/용어집에 있으면 그대로, 짧은 텍스트는 로컬 모델, 긴 텍스트는 원격(Azure)으로 나눠 보냄
+  (로컬 모델이 실패한 텍스트는 원격으로 다시 보냄)
+
+TRANSLATION_BACKEND 환경 변수로 고릅니다: azure(기본) / memory / local / auto(= RoutingBackend)
+잡지에는 짧은 캡션 / 라벨이 많으므로 auto를 쓰면 네트워크 왕복과 문자 수 요금을 크게 줄일 수 있습니다.
+"""
+
+import os
+import json
+import asyncio
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from dotenv import load_dotenv
+
+import api_clients
+import instrumentation
+from api_clients import Translation
+from rate_limiter import AzureRateLimiter
+from resilience import RetryPolicy
+from translation_memory import TranslationMemory, normalize_source
+
+load_dotenv()
+
+# 사용할 백엔드: azure / memory / local / auto
+TRANSLATION_BACKEND = os.getenv("TRANSLATION_BACKEND", "azure")
+# 용어집(TSV: 원문<TAB>번역문) 경로. 비어 있으면 사용하지 않음
+GLOSSARY_PATH = os.getenv("GLOSSARY_PATH", "")
+# 로컬 번역 모델 (CTranslate2 변환 모델 폴더, source.spm / target.spm 포함)
+LOCAL_MT_MODEL_DIR = os.getenv("LOCAL_MT_MODEL_DIR", "")
+LOCAL_MT_DEVICE = os.getenv("LOCAL_MT_DEVICE", "cpu")
+LOCAL_MT_COMPUTE_TYPE = os.getenv("LOCAL_MT_COMPUTE_TYPE", "int8")
+LOCAL_MT_LANGUAGES = tuple(os.getenv("LOCAL_MT_LANGUAGES", "ja:ko").split(":")) # 모델이 지원하는 (원문, 대상) 언어
+# auto 라우팅: 이 글자 수 이하의 텍스트는 로컬 모델로 번역
+LOCAL_MT_MAX_CHARS = int(os.getenv("LOCAL_MT_MAX_CHARS", 16))
+
+BACKENDS = ('azure', 'memory', 'local', 'auto')
+STATUS_NOT_FOUND = "not_found"     # 메모리/용어집에 없음 (MemoryBackend)
+STATUS_UNSUPPORTED = "unsupported" # 백엔드가 지원하지 않는 언어 쌍
+STATUS_LOCAL_ERROR = "local_error" # 로컬 모델 실행 중 오류
+
+
+class TranslatorBackend:
+    """번역 백엔드 기본 클래스. translate()는 입력과 같은 순서/길이의 Translation 리스트를 돌려줍니다."""
+
+    name = "base"
+
+    async def translate(self, texts: List[str], from_lang: str = 'ja', to_lang: str = 'ko') -> List[Translation]:
+        raise NotImplementedError
+
+
+# --- 1. 원격: Azure ---
+class AzureBackend(TranslatorBackend):
+    """
+    Azure Translator. 번역 메모리를 넘기면 메모리 조회 / 저장도 함께 합니다.
+    memory_lookup=False면 새 번역을 저장만 합니다. (RoutingBackend 뒤: 메모리는 cache 단계에서 이미 조회함)
+    """
+
+    name = "azure"
+
+    def __init__(self, session: httpx.AsyncClient, limiter: Optional[AzureRateLimiter] = None,
+                 memory: Optional[TranslationMemory] = None, policy: Optional[RetryPolicy] = None,
+                 memory_lookup: bool = True):
+        self.session = session
+        self.limiter = limiter
+        self.memory = memory
+        self.policy = policy
+        self.memory_lookup = memory_lookup
+
+    async def translate(self, texts, from_lang='ja', to_lang='ko'):
+        return await api_clients.call_azure_translation_batch(self.session, texts, from_lang, to_lang,
+                                                              limiter=self.limiter, memory=self.memory,
+                                                              policy=self.policy,
+                                                              memory_lookup=self.memory_lookup)
+
+
+# --- 2. 로컬: 번역 메모리 + 용어집 ---
+def load_glossary(path: Path) -> Dict[str, str]:
+    """TSV 용어집(원문<TAB>번역문, '#'로 시작하는 줄은 주석)을 {정규화된 원문: 번역문}으로 읽습니다."""
+    glossary = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line.strip() or line.startswith("#") or "\t" not in line:
+                continue
+            source, target = line.split("\t", 1)
+            glossary[normalize_source(source)] = target.strip()
+    return glossary
+
+
+class MemoryBackend(TranslatorBackend):
+    """
+    네트워크 없이 번역 메모리와 용어집만 조회합니다. (용어집이 우선)
+    찾지 못한 텍스트는 text="" / status=STATUS_NOT_FOUND로 돌려줍니다.
+    """
+
+    name = "memory"
+
+    def __init__(self, memory: Optional[TranslationMemory] = None, glossary: Optional[Dict[str, str]] = None):
+        self.memory = memory
+        self.glossary = glossary or {}
+
+    async def translate(self, texts, from_lang='ja', to_lang='ko'):
+        results = [Translation("")] * len(texts)
+        pending = []
+        n_texts = 0
+        for i, text in enumerate(texts):
+            if not text.strip():
+                continue
+            n_texts += 1
+            found = self.glossary.get(normalize_source(text))
+            if found is not None:
+                results[i] = Translation(found)
+            else:
+                pending.append(i)
+        if pending and self.memory is not None:
+            cached = self.memory.get_many([texts[i] for i in pending], from_lang, to_lang)
+            for i, value in zip(pending, cached):
+                if value is not None:
+                    results[i] = Translation(value)
+            pending = [i for i, value in zip(pending, cached) if value is None]
+        for i in pending:
+            results[i] = Translation("", STATUS_NOT_FOUND, "번역 메모리 / 용어집에 없음")
+        instrumentation.count("translate.local_hits", n_texts - len(pending))
+        return results
+
+
+# --- 3. 로컬: CTranslate2 번역 모델 ---
+class CTranslate2Backend(TranslatorBackend):
+    """
+    CTranslate2로 변환한 SentencePiece 기반 번역 모델(Marian / OPUS-MT 등)을 CPU에서 실행합니다.
+    모델 폴더에는 CTranslate2 모델과 source.spm / target.spm이 있어야 합니다.
+    (pip install ctranslate2 sentencepiece, 변환: ct2-transformers-converter --model <hf 모델> --output_dir <폴더>)
+    """
+
+    name = "local"
+
+    def __init__(self, model_dir: Path, languages: Tuple[str, str] = LOCAL_MT_LANGUAGES,
+                 device: str = LOCAL_MT_DEVICE, compute_type: str = LOCAL_MT_COMPUTE_TYPE,
+                 beam_size: int = 2, max_batch_size: int = 32):
+        import ctranslate2 # 선택 의존성: 로컬 번역 모델을 쓸 때만 필요
+        import sentencepiece
+        model_dir = Path(model_dir)
+        self.languages = tuple(languages)
+        self.beam_size = beam_size
+        self.max_batch_size = max_batch_size
+        print(f"✅ [로컬 번역] 모델 로드 시도 ({model_dir}, {'->'.join(self.languages)}, {device}/{compute_type})...")
+        self._translator = ctranslate2.Translator(str(model_dir), device=device, compute_type=compute_type)
+        self._sp_source = sentencepiece.SentencePieceProcessor(model_file=str(model_dir / "source.spm"))
+        self._sp_target = sentencepiece.SentencePieceProcessor(model_file=str(model_dir / "target.spm"))
+        print("✅ [로컬 번역] 모델 로드가 완료되었습니다.")
+
+    def _translate_sync(self, texts: List[str]) -> List[str]:
+        tokens = [self._sp_source.encode(text, out_type=str) + ["</s>"] for text in texts]
+        results = self._translator.translate_batch(tokens, beam_size=self.beam_size,
+                                                   max_batch_size=self.max_batch_size)
+        return [self._sp_target.decode([t for t in r.hypotheses[0] if t != "</s>"]) for r in results]
+
+    async def translate(self, texts, from_lang='ja', to_lang='ko'):
+        results = [Translation("")] * len(texts)
+        pending = [i for i, text in enumerate(texts) if text.strip()]
+        if not pending:
+            return results
+        if (from_lang, to_lang) != self.languages:
+            for i in pending:
+                results[i] = Translation("", STATUS_UNSUPPORTED, f"로컬 모델은 {'->'.join(self.languages)}만 지원")
+            return results
+        try:
+            with instrumentation.span("translate.local", texts=len(pending)):
+                # 모델 추론은 CPU를 오래 쓰므로 이벤트 루프 밖(스레드)에서 실행
+                translated = await asyncio.to_thread(self._translate_sync, [texts[i] for i in pending])
+        except Exception as e:
+            print(f"🚨 [로컬 번역 오류] {e}")
+            for i in pending:
+                results[i] = Translation("", STATUS_LOCAL_ERROR, str(e))
+            return results
+        for i, text in zip(pending, translated):
+            results[i] = Translation(text)
+        instrumentation.count("translate.local_texts", len(pending))
+        return results
+
+
+_local_backend = None # 프로세스마다 한 번만 로드
+_local_lock = threading.Lock()
+
+
+def get_local_backend() -> Optional[CTranslate2Backend]:
+    """LOCAL_MT_MODEL_DIR의 로컬 모델을 (처음 한 번만) 로드해 돌려줍니다. 설정이 없거나 로드에 실패하면 None"""
+    global _local_backend
+    if not LOCAL_MT_MODEL_DIR:
+        return None
+    with _local_lock:
+        if _local_backend is None:
+            try:
+                _local_backend = CTranslate2Backend(Path(LOCAL_MT_MODEL_DIR))
+            except Exception as e:
+                print(f"⚠️ [로컬 번역] 모델 로드 실패, 로컬 모델 없이 진행합니다: {e}")
+                _local_backend = False # 실패도 기억해서 매번 다시 시도하지 않음
+    return _local_backend or None
+
+
+# --- 4. 라우팅 ---
+class RoutingBackend(TranslatorBackend):
+    """
+    텍스트마다 백엔드를 고릅니다.
+    1. 번역 메모리 / 용어집(cache)에 있으면 그대로 사용
+    2. 로컬 모델(local)이 있고 max_local_chars자 이하면 로컬 모델
+    3. 나머지(와 로컬 모델이 실패한 텍스트)는 원격(remote)
+    """
+
+    name = "auto"
+
+    def __init__(self, remote: TranslatorBackend, local: Optional[TranslatorBackend] = None,
+                 cache: Optional[MemoryBackend] = None, max_local_chars: int = LOCAL_MT_MAX_CHARS):
+        self.remote = remote
+        self.local = local
+        self.cache = cache
+        self.max_local_chars = max_local_chars
+
+    async def translate(self, texts, from_lang='ja', to_lang='ko'):
+        results = [Translation("")] * len(texts)
+        pending = [i for i, text in enumerate(texts) if text.strip()]
+
+        if self.cache is not None and pending:
+            cached = await self.cache.translate([texts[i] for i in pending], from_lang, to_lang)
+            for i, translation in zip(pending, cached):
+                results[i] = translation
+            pending = [i for i, translation in zip(pending, cached) if not translation.ok]
+
+        remote = pending
+        if self.local is not None:
+            short = [i for i in pending if len(normalize_source(texts[i])) <= self.max_local_chars]
+            remote = [i for i in pending if len(normalize_source(texts[i])) > self.max_local_chars]
+            if short:
+                local_results = await self.local.translate([texts[i] for i in short], from_lang, to_lang)
+                for i, translation in zip(short, local_results):
+                    results[i] = translation
+                remote.extend(i for i, translation in zip(short, local_results) if not translation.ok)
+                remote.sort()
+
+        if remote:
+            remote_results = await self.remote.translate([texts[i] for i in remote], from_lang, to_lang)
+            for i, translation in zip(remote, remote_results):
+                results[i] = translation
+        instrumentation.count("translate.routed_remote", len(remote))
+        return results
+
+
+def create_backend(session: httpx.AsyncClient, limiter: Optional[AzureRateLimiter] = None,
+                   memory: Optional[TranslationMemory] = None,
+                   kind: str = TRANSLATION_BACKEND) -> TranslatorBackend:
+    """TRANSLATION_BACKEND 설정(kind)에 맞는 백엔드를 만듭니다."""
+    if kind not in BACKENDS:
+        raise ValueError(f"지원하지 않는 번역 백엔드: {kind} (가능: {', '.join(BACKENDS)})")
+    if kind == 'azure':
+        return AzureBackend(session, limiter, memory)
+
+    glossary = load_glossary(Path(GLOSSARY_PATH)) if GLOSSARY_PATH else None
+    cache = MemoryBackend(memory, glossary)
+    if kind == 'memory':
+        return cache
+    local = get_local_backend()
+    if kind == 'local':
+        if local is None:
+            raise RuntimeError("로컬 번역 모델을 쓸 수 없습니다. (LOCAL_MT_MODEL_DIR 확인)")
+        return RoutingBackend(remote=local, cache=cache)
+    # auto: 원격으로 번역한 결과만 번역 메모리에 저장됨 (로컬 모델 결과는 저장하지 않음)
+    # 메모리는 cache(MemoryBackend)에서 한 번만 조회하고, Azure는 저장만 함 (미적중이 두 번 세어지지 않도록)
+    return RoutingBackend(remote=AzureBackend(session, limiter, memory, memory_lookup=False),
+                          local=local, cache=cache)
+
+
+def translation_config(kind: str = TRANSLATION_BACKEND, from_lang: str = 'ja', to_lang: str = 'ko') -> Dict:
+    """
+    현재 번역 설정 (체크포인트 키에 사용: 백엔드 / 언어 / 용어집 / 로컬 모델이 바뀌면 끝난 페이지도 다시 번역)
+    용어집은 경로가 아니라 파일 내용의 해시로 구분합니다. (같은 파일을 고쳐 써도 다른 설정)
+    """
+    config = {'backend': kind, 'from': from_lang, 'to': to_lang}
+    if kind != 'azure' and GLOSSARY_PATH:
+        glossary_path = Path(GLOSSARY_PATH)
+        config['glossary'] = (hashlib.sha256(glossary_path.read_bytes()).hexdigest()
+                              if glossary_path.is_file() else GLOSSARY_PATH)
+    if kind in ('local', 'auto'):
+        config['local_model'] = LOCAL_MT_MODEL_DIR
+        if kind == 'auto':
+            config['local_max_chars'] = LOCAL_MT_MAX_CHARS
+    return config
+
+
+def translation_config_hash(config: Optional[Dict] = None) -> str:
+    """translation_config()의 짧은 해시 (체크포인트 항목에 기록)"""
+    config = translation_config() if config is None else config
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode('utf-8')).hexdigest()[:16]
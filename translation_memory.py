@@ -0,0 +1,196 @@
+# translation_memory.py
+
+import os
+import time
+import sqlite3
+import hashlib
+import unicodedata
+import re
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import List, Optional, Dict
+
+
+# --- 1. 기본 설정 ---
+DEFAULT_MAX_ENTRIES = int(os.getenv("TM_MAX_ENTRIES", 200000)) # 디스크(SQLite) 최대 항목 수
+DEFAULT_HOT_SIZE = 4096 # 프로세스 내 메모리 캐시(핫 레이어) 크기
+TOUCH_FLUSH_SIZE = 256  # 핫 레이어 적중을 디스크(last_used)에 모아서 쓰는 단위
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_source(text: str) -> str:
+    """
+    캐시 키용 원문 정규화: NFKC(전각/반각 통일) + 공백 정리.
+    OCR 결과마다 미세하게 다른 공백/문자 폭 때문에 캐시가 빗나가지 않도록 합니다.
+    """
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def _make_key(text: str, from_lang: str, to_lang: str) -> str:
+    raw = f"{from_lang}\t{to_lang}\t{normalize_source(text)}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class TranslationMemory:
+    """
+    SQLite 기반의 번역 메모리(캐시)입니다.
+    (정규화된 원문, 원본 언어, 대상 언어)를 키로 번역문을 저장하며,
+    자주 쓰는 항목은 프로세스 내 LRU(핫 레이어)에서 바로 꺼냅니다.
+    디스크 항목 수가 max_entries를 넘으면 가장 오래 사용하지 않은 항목부터 지웁니다.
+    핫 레이어 적중도 디스크의 last_used / use_count에 모아서 반영하므로 (다음 디스크 조회 / 삭제 / close 때,
+    또는 TOUCH_FLUSH_SIZE개가 쌓이면) 자주 쓰는 항목이 오래된 항목으로 지워지지 않습니다.
+    """
+
+    def __init__(self, db_path: Path, max_entries: int = DEFAULT_MAX_ENTRIES, hot_size: int = DEFAULT_HOT_SIZE):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.hot_size = hot_size
+        self._hot: "OrderedDict[str, str]" = OrderedDict()
+        self._touched: Counter = Counter() # 핫 레이어에서 적중했지만 디스크에 아직 반영하지 않은 키 -> 적중 횟수
+
+        self._conn = sqlite3.connect(str(self.db_path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                key TEXT PRIMARY KEY,
+                from_lang TEXT NOT NULL,
+                to_lang TEXT NOT NULL,
+                source TEXT NOT NULL,
+                target TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                use_count INTEGER NOT NULL DEFAULT 1
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_translations_last_used ON translations(last_used)")
+        self._conn.commit()
+        # 항목 수 추정치 (저장할 때마다 COUNT(*)를 돌리지 않기 위함)
+        (self._approx_count,) = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()
+
+        # 통계 (실행 후 리포트용)
+        self.hits = 0
+        self.hot_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # --- 2. 핫 레이어 (프로세스 내 LRU) ---
+    def _hot_get(self, key: str) -> Optional[str]:
+        value = self._hot.get(key)
+        if value is not None:
+            self._hot.move_to_end(key)
+        return value
+
+    def _hot_put(self, key: str, value: str):
+        self._hot[key] = value
+        self._hot.move_to_end(key)
+        while len(self._hot) > self.hot_size:
+            self._hot.popitem(last=False)
+
+    # --- 3. 조회 / 저장 ---
+    def get_many(self, texts: List[str], from_lang: str = 'ja', to_lang: str = 'ko') -> List[Optional[str]]:
+        """텍스트 리스트의 캐시된 번역을 같은 순서로 돌려줍니다. 없는 항목은 None."""
+        keys = [_make_key(t, from_lang, to_lang) for t in texts]
+        results: List[Optional[str]] = [None] * len(texts)
+
+        disk_keys = []
+        for i, key in enumerate(keys):
+            value = self._hot_get(key)
+            if value is not None:
+                results[i] = value
+                self.hot_hits += 1
+                self._touched[key] += 1
+            else:
+                disk_keys.append(key)
+
+        found: Dict[str, str] = {}
+        unique_disk_keys = list(dict.fromkeys(disk_keys))
+        for start in range(0, len(unique_disk_keys), 500): # SQLite 변수 개수 제한 회피
+            chunk = unique_disk_keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT key, target FROM translations WHERE key IN ({placeholders})", chunk
+            ).fetchall()
+            found.update(rows)
+
+        if found or len(self._touched) >= TOUCH_FLUSH_SIZE:
+            self._flush_touched(found)
+
+        for i, key in enumerate(keys):
+            if results[i] is not None:
+                continue
+            value = found.get(key)
+            if value is not None:
+                results[i] = value
+                self.hits += 1
+                self._hot_put(key, value)
+            else:
+                self.misses += 1
+        return results
+
+    def _flush_touched(self, found: Optional[Dict[str, str]] = None):
+        """디스크에서 찾은 키(found)와 핫 레이어 적중을 last_used / use_count에 한 번에 반영합니다."""
+        uses = Counter(self._touched)
+        uses.update(found.keys() if found else ())
+        self._touched.clear()
+        if not uses:
+            return
+        now = time.time()
+        self._conn.executemany(
+            "UPDATE translations SET last_used = ?, use_count = use_count + ? WHERE key = ?",
+            [(now, count, key) for key, count in uses.items()]
+        )
+        self._conn.commit()
+
+    def put_many(self, pairs: List[tuple], from_lang: str = 'ja', to_lang: str = 'ko'):
+        """(원문, 번역문) 쌍들을 저장합니다."""
+        if not pairs:
+            return
+        now = time.time()
+        rows = []
+        for source, target in pairs:
+            key = _make_key(source, from_lang, to_lang)
+            self._hot_put(key, target)
+            rows.append((key, from_lang, to_lang, normalize_source(source), target, now))
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO translations (key, from_lang, to_lang, source, target, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            rows
+        )
+        self._conn.commit()
+        self._approx_count += len(rows)
+        self._evict_if_needed()
+
+    def _evict_if_needed(self):
+        """디스크 항목 수가 한도를 넘으면 오래 쓰지 않은 항목부터 10% 여유가 생길 때까지 삭제합니다."""
+        if self._approx_count <= self.max_entries:
+            return
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()
+        self._approx_count = count
+        if count <= self.max_entries:
+            return
+        n_delete = count - int(self.max_entries * 0.9)
+        self._flush_touched() # 핫 레이어에서 쓰인 항목이 오래된 항목으로 지워지지 않도록 먼저 반영
+        self._conn.execute(
+            "DELETE FROM translations WHERE key IN "
+            "(SELECT key FROM translations ORDER BY last_used ASC LIMIT ?)",
+            (n_delete,)
+        )
+        self._conn.commit()
+        self._approx_count -= n_delete
+        self.evictions += n_delete
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.hot_hits + self.misses
+        return {
+            'hits': self.hits,
+            'hot_hits': self.hot_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.hot_hits) / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+        }
+
+    def close(self):
+        self._flush_touched()
+        self._conn.close()